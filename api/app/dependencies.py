@@ -2,18 +2,72 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
-from functools import lru_cache
+import traceback
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Union,
+)
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.pool import NullPool
 
+from .metrics import span
+from .services.batch import DEFAULT_QUERIES_PER_STATEMENT, BatchSearchService
+from .services.cache import CachedSearchService, CachingEmbedder, CorpusGeneration, SearchCache
 from .services.embedding import EmbeddingClient
-from .services.search import PgVectorSearchService, SearchService
+from .services.jobs import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MAX_PENDING,
+    IngestionJob,
+    IngestionQueue,
+    ingest_document,
+)
+from .services.local_index import LocalSearchService, LocalVectorIndex
+from .services.search import (
+    DEFAULT_SEARCH_OPTIONS,
+    PgVectorSearchService,
+    SearchOptions,
+    SearchService,
+    text,
+)
+from .services.token_cache import shared_token_cache
+from .services.uploads import DEFAULT_MAX_UPLOAD_BYTES
+from .storage import CORPUS_GENERATION_SQL, DOCUMENT_BY_SHA256_SQL, psycopg_url
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 
 DATABASE_URL_ENV = "DATABASE_URL"
+EMBEDDING_VOCAB_PATH_ENV = "EMBEDDING_VOCAB_PATH"
+SEARCH_CACHE_SIZE_ENV = "SEARCH_CACHE_SIZE"
+SEARCH_CACHE_TTL_ENV = "SEARCH_CACHE_TTL"
+SEARCH_CACHE_CHECK_INTERVAL_ENV = "SEARCH_CACHE_CHECK_INTERVAL"
+SEARCH_BATCH_CONCURRENCY_ENV = "SEARCH_BATCH_CONCURRENCY"
+SEARCH_BATCH_STATEMENT_SIZE_ENV = "SEARCH_BATCH_STATEMENT_SIZE"
+SEARCH_BACKEND_ENV = "SEARCH_BACKEND"
+LOCAL_INDEX_PATH_ENV = "LOCAL_INDEX_PATH"
+SEARCH_BACKENDS = ("pgvector", "local")
+RAW_DATA_DIR_ENV = "RAW_DATA_DIR"
+EXTRACT_CACHE_DIR_ENV = "KARKINOS_EXTRACT_CACHE"
+INGEST_CONCURRENCY_ENV = "INGEST_CONCURRENCY"
+INGEST_QUEUE_SIZE_ENV = "INGEST_QUEUE_SIZE"
+MAX_UPLOAD_BYTES_ENV = "MAX_UPLOAD_BYTES"
+WARMUP_ENV = "API_WARMUP"
+WARMUP_QUERY = "EGFR mutation targeted therapy"
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
 
 
 @lru_cache
@@ -26,10 +80,111 @@ def _get_engine_url() -> str:
     return database_url
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Connection pool configuration read from ``DB_POOL_*`` variables.
+
+    ``DB_POOL=null`` restores the previous behaviour of opening a fresh
+    connection per request.  ``DB_STATEMENT_CACHE_SIZE`` controls how many
+    prepared statements each pooled connection keeps (asyncpg's
+    ``prepared_statement_cache_size``, psycopg's ``prepared_max``), so the hot
+    search query is parsed and planned once per connection rather than once
+    per request.  ``0`` disables preparing.
+    """
+
+    enabled: bool = True
+    size: int = 5
+    max_overflow: int = 10
+    timeout: float = 30.0
+    recycle: int = 1800
+    pre_ping: bool = True
+    statement_cache_size: int = 100
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        return cls(
+            enabled=os.getenv("DB_POOL", "queue").strip().lower() != "null",
+            size=int(os.getenv("DB_POOL_SIZE", cls.size)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", cls.max_overflow)),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", cls.timeout)),
+            recycle=int(os.getenv("DB_POOL_RECYCLE", cls.recycle)),
+            pre_ping=_env_bool("DB_POOL_PRE_PING", cls.pre_ping),
+            statement_cache_size=int(
+                os.getenv("DB_STATEMENT_CACHE_SIZE", cls.statement_cache_size)
+            ),
+        )
+
+    def engine_kwargs(self, database_url: str) -> Dict[str, Any]:
+        from sqlalchemy.engine import make_url
+        from sqlalchemy.pool import NullPool
+
+        kwargs: Dict[str, Any] = {"future": True}
+        if self.enabled:
+            kwargs.update(
+                pool_size=self.size,
+                max_overflow=self.max_overflow,
+                pool_timeout=self.timeout,
+                pool_recycle=self.recycle,
+                pool_pre_ping=self.pre_ping,
+            )
+        else:
+            kwargs["poolclass"] = NullPool
+
+        driver = make_url(database_url).get_driver_name()
+        if driver == "asyncpg":
+            kwargs["connect_args"] = {
+                "prepared_statement_cache_size": self.statement_cache_size,
+            }
+        elif driver == "psycopg":
+            # Prepare on first execution; a cache size of 0 disables it.  The
+            # size itself is not a connect argument, see size_statement_cache.
+            kwargs["connect_args"] = {
+                "prepare_threshold": 0 if self.statement_cache_size else None,
+            }
+        return kwargs
+
+    def size_statement_cache(self, dbapi_connection: Any, connection_record: Any) -> None:
+        """Pool ``connect`` hook setting psycopg's ``prepared_max`` on new connections."""
+        if self.statement_cache_size:
+            dbapi_connection.driver_connection.prepared_max = self.statement_cache_size
+
+
+def create_engine_from_settings(database_url: str, settings: PoolSettings) -> AsyncEngine:
+    from sqlalchemy import event
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(database_url, **settings.engine_kwargs(database_url))
+    if make_url(database_url).get_driver_name() == "psycopg":
+        event.listen(engine.sync_engine, "connect", settings.size_statement_cache)
+    return engine
+
+
+@lru_cache
+def _get_engine() -> AsyncEngine:
+    return create_engine_from_settings(_get_engine_url(), PoolSettings.from_env())
+
+
 @lru_cache
 def _get_session_maker() -> async_sessionmaker[AsyncSession]:
-    engine = create_async_engine(_get_engine_url(), poolclass=NullPool, future=True)
-    return async_sessionmaker(engine, expire_on_commit=False)
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    return async_sessionmaker(_get_engine(), expire_on_commit=False)
+
+
+async def dispose_engine() -> None:
+    """Close pooled connections if the engine was ever created."""
+    if _get_engine.cache_info().currsize:
+        await _get_engine().dispose()
+        _get_session_maker.cache_clear()
+        _get_engine.cache_clear()
 
 
 async def get_session() -> AsyncSession:
@@ -42,8 +197,253 @@ async def get_embedder() -> EmbeddingClient:
     return EmbeddingClient()
 
 
+@lru_cache
+def _get_search_cache() -> SearchCache:
+    return SearchCache(
+        maxsize=int(os.getenv(SEARCH_CACHE_SIZE_ENV, "1024")),
+        ttl=float(os.getenv(SEARCH_CACHE_TTL_ENV, "300")),
+    )
+
+
+async def _load_corpus_generation() -> int:
+    async with _get_engine().connect() as conn:
+        return (await conn.execute(text(CORPUS_GENERATION_SQL))).scalar_one()
+
+
+@lru_cache
+def _get_corpus_generation() -> CorpusGeneration:
+    return CorpusGeneration(
+        _get_search_cache(),
+        _load_corpus_generation,
+        interval=float(os.getenv(SEARCH_CACHE_CHECK_INTERVAL_ENV, "1")),
+    )
+
+
+async def get_search_cache() -> SearchCache:
+    """The worker's search cache, invalidated first if the corpus changed anywhere."""
+    # The local backend serves a fixed snapshot; only the database changes.
+    if _search_backend() == "pgvector" and os.getenv(DATABASE_URL_ENV):
+        await _get_corpus_generation().refresh()
+    return _get_search_cache()
+
+
+def _search_backend() -> str:
+    backend = os.getenv(SEARCH_BACKEND_ENV, "pgvector").strip().lower()
+    if backend not in SEARCH_BACKENDS:
+        raise RuntimeError(
+            f"{SEARCH_BACKEND_ENV} must be one of {', '.join(SEARCH_BACKENDS)}, got {backend!r}"
+        )
+    return backend
+
+
+@lru_cache
+def _get_local_index() -> LocalVectorIndex:
+    index_path = os.getenv(LOCAL_INDEX_PATH_ENV)
+    if not index_path:
+        raise RuntimeError(
+            f"{LOCAL_INDEX_PATH_ENV} must point at a snapshot when {SEARCH_BACKEND_ENV}=local"
+        )
+    return LocalVectorIndex.load(index_path)
+
+
+def warm_embedding_cache() -> int:
+    """Preload the shared token cache from ``EMBEDDING_VOCAB_PATH`` if set."""
+    vocab_path = os.getenv(EMBEDDING_VOCAB_PATH_ENV)
+    if not vocab_path:
+        return 0
+    return shared_token_cache().load_vocabulary(vocab_path)
+
+
+async def _open_pool_connections(
+    engine: AsyncEngine, count: int, embedder: EmbeddingClient
+) -> None:
+    """Check out *count* connections at once and run the hot search on each.
+
+    Connections return to the pool afterwards, so the first requests neither
+    pay for connecting nor, with a statement cache, for planning the query.
+    """
+    params: Dict[str, Any] = {"query_vector": await embedder.embed(WARMUP_QUERY)}
+    params.update(DEFAULT_SEARCH_OPTIONS.vector_params(1))
+    statement = DEFAULT_SEARCH_OPTIONS.statement(dimension=embedder.dimensions)
+
+    async def run() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(statement, params)
+
+    await asyncio.gather(*(run() for _ in range(max(count, 1))))
+
+
+async def warm_up() -> Optional[str]:
+    """Do the work of the first request before the worker reports ready.
+
+    Runs from the application lifespan, so uvicorn only accepts connections
+    (and ``/health`` only answers) once the vocabulary, embedder, local index
+    and connection pool are loaded.  Each step is timed as a ``startup.*``
+    stage on ``/metrics``.  A failed index or pool step prints its traceback
+    and is returned rather than raised, so an unreachable database does not
+    keep the API down but ``/health`` can report it.  ``API_WARMUP=0``
+    disables the warm-up.
+    """
+    if not _env_bool(WARMUP_ENV, True):
+        return None
+
+    embedder = EmbeddingClient()
+    with span("startup.vocabulary"):
+        warm_embedding_cache()
+    with span("startup.embedder"):
+        await embedder.embed(WARMUP_QUERY)
+    try:
+        if _search_backend() == "local":
+            with span("startup.local_index"):
+                await _warm_local_index(embedder)
+        elif os.getenv(DATABASE_URL_ENV):
+            settings = PoolSettings.from_env()
+            with span("startup.pool"):
+                await _open_pool_connections(
+                    _get_engine(), settings.size if settings.enabled else 1, embedder
+                )
+    except Exception as exc:  # the worker still starts; first requests pay instead
+        print("warm-up failed:")
+        traceback.print_exc()
+        return f"{type(exc).__name__}: {exc}"
+    return None
+
+
+async def _warm_local_index(embedder: EmbeddingClient) -> None:
+    # One exact scan faults the whole vector file into the page cache.
+    service = LocalSearchService(_get_local_index(), embedder)
+    await service.search(WARMUP_QUERY, 1, options=SearchOptions(exact=True))
+
+
+SearchServiceFactory = Callable[[], AsyncContextManager[SearchService]]
+
+
+@asynccontextmanager
+async def open_search_service(
+    embedder: EmbeddingClient, cache: SearchCache
+) -> AsyncIterator[SearchService]:
+    """Open the configured backend, closing its database session on exit."""
+
+    if _search_backend() == "local":
+        local = LocalSearchService(_get_local_index(), CachingEmbedder(embedder, cache))
+        yield CachedSearchService(local, cache)
+        return
+
+    session_factory = _get_session_maker()
+    async with session_factory() as session:
+        service = PgVectorSearchService(
+            session=session,
+            embedder=CachingEmbedder(embedder, cache),
+            session_factory=session_factory,
+        )
+        yield CachedSearchService(service, cache)
+
+
 async def get_search_service(
-    session: AsyncSession = Depends(get_session),
     embedder: EmbeddingClient = Depends(get_embedder),
-) -> SearchService:
-    return PgVectorSearchService(session=session, embedder=embedder)
+    cache: SearchCache = Depends(get_search_cache),
+) -> AsyncIterator[SearchService]:
+    """Yield the configured backend; ``SEARCH_BACKEND=local`` needs no database."""
+
+    async with open_search_service(embedder, cache) as service:
+        yield service
+
+
+async def get_search_service_factory(
+    embedder: EmbeddingClient = Depends(get_embedder),
+    cache: SearchCache = Depends(get_search_cache),
+) -> SearchServiceFactory:
+    """Open the backend on demand, for searches that run after the endpoint returns.
+
+    A streamed response is iterated after the request's yield dependencies
+    have been closed on FastAPI < 0.118, so it must own its session.
+    """
+
+    return partial(open_search_service, embedder, cache)
+
+
+async def get_batch_search_service(
+    embedder: EmbeddingClient = Depends(get_embedder),
+    cache: SearchCache = Depends(get_search_cache),
+) -> Union[BatchSearchService, LocalSearchService]:
+    if _search_backend() == "local":
+        return LocalSearchService(_get_local_index(), embedder)
+
+    # Default to one session per pooled connection so a large batch does not
+    # spill into overflow connections or starve concurrent /search requests.
+    concurrency = os.getenv(SEARCH_BATCH_CONCURRENCY_ENV)
+    return BatchSearchService(
+        _get_session_maker(),
+        embedder,
+        cache,
+        max_concurrency=int(concurrency) if concurrency else PoolSettings.from_env().size,
+        queries_per_statement=int(
+            os.getenv(SEARCH_BATCH_STATEMENT_SIZE_ENV, DEFAULT_QUERIES_PER_STATEMENT)
+        ),
+    )
+
+
+def get_raw_data_dir() -> Path:
+    """Directory uploaded documents are stored in (``RAW_DATA_DIR``)."""
+    return Path(os.getenv(RAW_DATA_DIR_ENV) or DATA_DIR / "raw")
+
+
+def get_max_upload_bytes() -> int:
+    """Per-file upload limit in bytes (``MAX_UPLOAD_BYTES``)."""
+    return int(os.getenv(MAX_UPLOAD_BYTES_ENV, DEFAULT_MAX_UPLOAD_BYTES))
+
+
+# Answers whether a document with the given content hash is in the database.
+DocumentLookup = Callable[[str], Awaitable[bool]]
+
+
+async def _document_ingested(sha256: str) -> bool:
+    async with _get_session_maker()() as session:
+        result = await session.execute(text(DOCUMENT_BY_SHA256_SQL), {"sha256": sha256})
+        return result.first() is not None
+
+
+async def get_document_lookup() -> Optional[DocumentLookup]:
+    """Lookup of ingested documents by content hash; ``None`` without a database."""
+    return _document_ingested if os.getenv(DATABASE_URL_ENV) else None
+
+
+def _ingestion_database_url() -> Optional[str]:
+    """``DATABASE_URL`` for the synchronous psycopg driver ingestion uses."""
+    database_url = os.getenv(DATABASE_URL_ENV)
+    if not database_url:
+        return None
+    return psycopg_url(database_url)
+
+
+def _invalidate_after_ingest(job: IngestionJob) -> None:
+    if job.chunks_written:
+        _get_search_cache().invalidate()
+
+
+@lru_cache
+def _get_ingestion_queue() -> IngestionQueue:
+    return IngestionQueue(
+        partial(
+            ingest_document,
+            db_url=_ingestion_database_url(),
+            extract_cache=Path(os.getenv(EXTRACT_CACHE_DIR_ENV) or DATA_DIR / "extracted"),
+        ),
+        concurrency=int(os.getenv(INGEST_CONCURRENCY_ENV, DEFAULT_CONCURRENCY)),
+        max_pending=int(os.getenv(INGEST_QUEUE_SIZE_ENV, DEFAULT_MAX_PENDING)),
+        on_complete=_invalidate_after_ingest,
+    )
+
+
+async def get_ingestion_queue() -> IngestionQueue:
+    queue = _get_ingestion_queue()
+    queue.start()
+    return queue
+
+
+async def stop_ingestion_queue() -> None:
+    """Stop ingestion workers if the queue was ever created."""
+    if _get_ingestion_queue.cache_info().currsize:
+        await _get_ingestion_queue().stop()
+        _get_ingestion_queue.cache_clear()
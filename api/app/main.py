@@ -2,14 +2,31 @@
 
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
-from .routers import search
+from .dependencies import dispose_engine, stop_ingestion_queue, warm_up
+from .metrics import RequestTimingMiddleware
+from .routers import documents, health, metrics, search
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    app.state.warm_up_error = await warm_up()
+    yield
+    await stop_ingestion_queue()
+    await dispose_engine()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Karkinos API", version="1.0.0")
+    app = FastAPI(title="Karkinos API", version="1.0.0", lifespan=lifespan)
+    app.include_router(health.router)
     app.include_router(search.router)
+    app.include_router(documents.router)
+    app.include_router(metrics.router)
+    app.add_middleware(RequestTimingMiddleware)
     return app
 
 
@@ -0,0 +1,331 @@
+"""In-process latency histograms and counters in the Prometheus text format.
+
+Stages of the search path and of ingestion are timed with :func:`span`
+and aggregated into the ``karkinos_stage_seconds`` histogram, labelled by
+stage.  :func:`render` produces the exposition served on ``/metrics`` and
+written by ``ingest.py --metrics-file`` for the node exporter's textfile
+collector.  Everything is standard library and thread safe, since
+ingestion and the API's worker threads record concurrently.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+# Upper bounds in seconds, from sub-millisecond row mapping to slow ingestion
+# batches.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+ASGIApp = Callable[..., Awaitable[None]]
+T = TypeVar("T")
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named family of series, one per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def labelsets(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return [dict(key) for key in self._series]
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def _key(self, labels: Dict[str, str]) -> Labels:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+
+class Histogram(Metric):
+    """Cumulative latency histogram."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        # Series layout: one count per bucket, the +Inf count, then the sum.
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return int(sum(series[:-1])) if series else 0
+
+    def total(self, **labels: str) -> float:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[-1] if series else 0.0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(key, le)} {_format_value(cumulative)}"
+            yield f"{self.name}_sum{_format_labels(key)} {series[-1]!r}"
+            yield f"{self.name}_count{_format_labels(key)} {_format_value(cumulative)}"
+
+
+class Counter(Metric):
+    """Monotonic total."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0])
+            series[0] += amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[0] if series else 0.0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = {key: series[0] for key, series in self._series.items()}
+        for key, value in sorted(snapshot.items()):
+            yield f"{self.name}_total{_format_labels(key)} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = self._register(Histogram(name, documentation, labelnames, buckets))
+        assert isinstance(metric, Histogram)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = self._register(Counter(name, documentation, labelnames))
+        assert isinstance(metric, Counter)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            for metric in self._metrics.values():
+                metric.reset()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram(
+    "karkinos_stage_seconds", "Time spent in each stage of search and ingestion.", ("stage",)
+)
+STAGE_ITEMS = REGISTRY.counter(
+    "karkinos_stage_items", "Items (rows, chunks, queries) processed by each stage.", ("stage",)
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "karkinos_http_request_seconds",
+    "End-to-end API request latency.",
+    ("method", "route", "status"),
+)
+
+
+@contextmanager
+def span(stage: str, items: int = 0) -> Iterator[None]:
+    """Time the enclosed block as *stage*, counting *items* processed in it."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+        if items:
+            STAGE_ITEMS.inc(items, stage=stage)
+
+
+def observe(stage: str, seconds: float, items: int = 0) -> None:
+    """Record a stage duration measured elsewhere, e.g. by a bulk loader."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if items:
+        STAGE_ITEMS.inc(items, stage=stage)
+
+
+def timed(iterable: Iterable[T], stage: str) -> Iterator[T]:
+    """Yield from *iterable*, recording the time spent producing its items as *stage*.
+
+    Only the time inside the producer counts, not the time the consumer
+    holds each item, so a lazy pipeline stage is measured on its own.  One
+    observation covering every item is recorded once the iterable is
+    exhausted or closed.
+    """
+    iterator = iter(iterable)
+    elapsed = 0.0
+    count = 0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - started
+            count += 1
+            yield item
+    finally:
+        observe(stage, elapsed, items=count)
+
+
+def stage_throughput(prefix: str = "") -> List[Tuple[str, float, float]]:
+    """``(stage, seconds, items)`` totals for every stage starting with *prefix*."""
+    stages = [labels["stage"] for labels in STAGE_SECONDS.labelsets()]
+    return [
+        (stage, STAGE_SECONDS.total(stage=stage), STAGE_ITEMS.value(stage=stage))
+        for stage in sorted(stages)
+        if stage.startswith(prefix)
+    ]
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def write_textfile(path: str) -> None:
+    """Write :func:`render` to *path* atomically, for the textfile collector."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix=".prom.tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            fp.write(render())
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temporary)
+        raise
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware recording request latency by method, route template and status.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware`` so streamed responses pass
+    through untouched.  The route template, not the raw path, is the label,
+    keeping the series count bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=route,
+                status=str(status),
+            )
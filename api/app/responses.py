@@ -0,0 +1,95 @@
+"""Direct JSON and NDJSON encoding of search results.
+
+:class:`~.services.search.ChunkMatch` already has the field names of the
+public result shape, so results are encoded straight from the dataclasses
+instead of being rebuilt as dicts and ``ChunkMatchModel`` objects and then
+validated again by ``response_model``.  orjson encodes dataclasses natively
+and is used when installed; otherwise the standard library encoder is used
+with the same compact output.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from fastapi.responses import Response
+
+from .metrics import observe
+from .services.search import ChunkMatch, DocumentRef
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _plain(value: Any) -> Dict[str, Any]:
+    if isinstance(value, ChunkMatch):
+        return {
+            "chunk_id": value.chunk_id,
+            "text": value.text,
+            "score": value.score,
+            "document": _plain(value.document),
+        }
+    if isinstance(value, DocumentRef):
+        return {
+            "id": value.id,
+            "title": value.title,
+            "source": value.source,
+            "cancer_type": value.cancer_type,
+        }
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode *content*, which may contain :class:`ChunkMatch` objects, as compact JSON."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, default=_plain, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response whose content is encoded by :func:`dumps`, bypassing ``response_model``."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def search_content(query: str, top_k: int, matches: Iterable[ChunkMatch]) -> Dict[str, Any]:
+    """The ``SearchResponse`` shape, with the matches left for :func:`dumps` to encode."""
+    return {"query": query, "top_k": top_k, "results": list(matches)}
+
+
+async def iter_ndjson(
+    matches: Iterable[ChunkMatch], stage: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """One JSON object per line, in rank order.
+
+    An async generator so ``StreamingResponse`` sends each line without a
+    thread pool hop per result.  With *stage*, the time spent encoding (not
+    sending) the lines is recorded under that name once the stream ends.
+    """
+    encoding = 0.0
+    lines = 0
+    try:
+        for match in matches:
+            started = time.perf_counter()
+            line = dumps(match) + b"\n"
+            encoding += time.perf_counter() - started
+            lines += 1
+            yield line
+    finally:
+        if stage is not None:
+            observe(stage, encoding, items=lines)
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
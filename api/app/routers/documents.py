@@ -2,48 +2,182 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
-from uuid import uuid4
+from typing import List, Optional
+from uuid import UUID, uuid5
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 
-router = APIRouter()
+from ..dependencies import (
+    DocumentLookup,
+    get_document_lookup,
+    get_ingestion_queue,
+    get_max_upload_bytes,
+    get_raw_data_dir,
+)
+from ..schemas.documents import (
+    IngestionJobList,
+    IngestionJobModel,
+    UploadedDocumentModel,
+    UploadResponse,
+)
+from ..services.jobs import IngestionJob, IngestionQueue, QueueFull
+from ..services.uploads import UploadTooLarge, store_upload
 
+router = APIRouter(tags=["documents"])
 
-@router.post("/documents")
-async def upload_documents(files: List[UploadFile] = File(...)) -> dict:
-    """Accept one or more documents and persist them to the raw data store.
+# Document ids are derived from the content hash, so re-uploading the same
+# file yields the same id.
+DOCUMENT_ID_NAMESPACE = UUID("5243f7d9-3b98-5069-b3db-435e4975cc65")
+
+
+def _to_job_model(job: IngestionJob) -> IngestionJobModel:
+    return IngestionJobModel(
+        job_id=job.id,
+        document_id=job.document_id,
+        filename=job.filename,
+        status=job.status,
+        chunks_prepared=job.chunks_prepared,
+        chunks_written=job.chunks_written,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _stored_copy(raw_dir: Path, document_id: str) -> Optional[Path]:
+    return next(raw_dir.glob(f"{document_id}_*"), None)
+
+
+async def _ingested(
+    lookup: Optional[DocumentLookup], sha256: str, job: Optional[IngestionJob]
+) -> bool:
+    # Jobs only live in memory, so the database is the record of what was
+    # ingested; without one, fall back to this process's finished job.
+    if lookup is None:
+        return job is not None and job.status == "succeeded"
+    return await lookup(sha256)
+
+
+@router.post("/documents", response_model=UploadResponse)
+async def upload_documents(
+    files: List[UploadFile] = File(...),
+    queue: IngestionQueue = Depends(get_ingestion_queue),
+    raw_dir: Path = Depends(get_raw_data_dir),
+    max_bytes: int = Depends(get_max_upload_bytes),
+    document_lookup: Optional[DocumentLookup] = Depends(get_document_lookup),
+) -> UploadResponse:
+    """Accept one or more documents, persist them and queue them for ingestion.
+
+    Files are streamed to disk in blocks on a worker thread and hashed on
+    the way, so memory per upload is constant and searches are not stalled.
+    Any file over ``MAX_UPLOAD_BYTES`` fails the request with 413.
+
+    A file is a duplicate while a job for its content is queued or running,
+    or once its content hash is stored in ``documents``.  Otherwise it is
+    (re-)ingested, from the copy kept by an earlier upload if there is one,
+    so documents whose job failed or was lost on restart are not stranded.
 
     Args:
         files: Uploaded file objects provided by the client.
 
     Returns:
-        A JSON payload containing the generated document identifiers.
+        The generated document identifiers and, per document, whether it
+        duplicates earlier content and the ingestion job tracking it.
     """
     if not files:
         raise HTTPException(status_code=400, detail="No files were provided")
+    # Reject oversized files before anything is stored or queued.
+    for upload in files:
+        if upload.size is not None and upload.size > max_bytes:
+            raise HTTPException(status_code=413, detail=str(UploadTooLarge(max_bytes)))
 
-    project_root = Path(__file__).resolve().parents[3]
-    raw_dir = project_root / "data" / "raw"
     raw_dir.mkdir(parents=True, exist_ok=True)
 
-    document_ids: list[str] = []
+    documents: list[UploadedDocumentModel] = []
 
     for upload in files:
-        contents = await upload.read()
-        if not contents:
+        try:
+            stored = await store_upload(upload.file, raw_dir, max_bytes)
+        except UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc)) from exc
+        if not stored.size:
+            stored.discard()
             continue
 
-        document_id = str(uuid4())
+        sha256 = stored.sha256
+        document_id = str(uuid5(DOCUMENT_ID_NAMESPACE, sha256))
         sanitized_name = Path(upload.filename or "document").name
-        target_path = raw_dir / f"{document_id}_{sanitized_name}"
 
-        with target_path.open("wb") as fp:
-            fp.write(contents)
+        job = queue.find(sha256)
+        if job is not None and job.status == "failed":
+            job = None
+        if (job is not None and not job.done) or await _ingested(document_lookup, sha256, job):
+            stored.discard()
+            duplicate = True
+        else:
+            existing = _stored_copy(raw_dir, document_id)
+            if existing is not None:
+                stored.discard()
+                path = existing
+            else:
+                path = stored.keep(raw_dir / f"{document_id}_{sanitized_name}")
+            live = queue.find(sha256)
+            try:
+                job = _submit(queue, document_id, sanitized_name, path, sha256)
+            except HTTPException:
+                if existing is None:
+                    path.unlink()
+                raise
+            # submit() hands back the live job if a concurrent upload of the
+            # same content queued one while this request awaited the lookup.
+            duplicate = job is live
+            if duplicate and existing is None and job.path != path:
+                path.unlink()
 
-        document_ids.append(document_id)
+        documents.append(
+            UploadedDocumentModel(
+                document_id=document_id,
+                filename=sanitized_name,
+                sha256=sha256,
+                duplicate=duplicate,
+                job=_to_job_model(job) if job is not None else None,
+            )
+        )
 
-    if not document_ids:
+    if not documents:
         raise HTTPException(status_code=400, detail="All provided files were empty")
 
-    return {"document_ids": document_ids}
+    return UploadResponse(
+        document_ids=[document.document_id for document in documents], documents=documents
+    )
+
+
+def _submit(
+    queue: IngestionQueue, document_id: str, filename: str, path: Path, sha256: str
+) -> IngestionJob:
+    try:
+        return queue.submit(document_id, filename, path, sha256)
+    except QueueFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+
+@router.get("/documents/jobs", response_model=IngestionJobList)
+async def list_ingestion_jobs(
+    queue: IngestionQueue = Depends(get_ingestion_queue),
+) -> IngestionJobList:
+    """List tracked ingestion jobs, newest first."""
+
+    return IngestionJobList(jobs=[_to_job_model(job) for job in queue.jobs()])
+
+
+@router.get("/documents/jobs/{job_id}", response_model=IngestionJobModel)
+async def get_ingestion_job(
+    job_id: str, queue: IngestionQueue = Depends(get_ingestion_queue)
+) -> IngestionJobModel:
+    """Report the status and progress of one ingestion job."""
+
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingestion job {job_id}")
+    return _to_job_model(job)
@@ -0,0 +1,25 @@
+"""Health check router."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/health")
+async def health(request: Request) -> JSONResponse:
+    """Readiness probe; it answers once the lifespan warm-up has finished.
+
+    A failed warm-up answers 503 with the error, so orchestrators keep the
+    worker out of rotation instead of routing traffic to it.
+    """
+
+    error = getattr(request.app.state, "warm_up_error", None)
+    if error is not None:
+        return JSONResponse(
+            {"status": "warm-up failed", "error": error},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return JSONResponse({"status": "ok"})
@@ -0,0 +1,19 @@
+"""Prometheus metrics router."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from .. import metrics
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics() -> PlainTextResponse:
+    """Expose per-stage and per-route latency histograms for scraping."""
+
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
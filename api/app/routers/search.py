@@ -2,36 +2,131 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from typing import Optional, Union
 
-from ..dependencies import get_search_service
-from ..schemas.search import ChunkMatchModel, SearchRequest, SearchResponse
-from ..services.search import ChunkMatch, SearchService
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..dependencies import get_batch_search_service, get_search_cache, get_search_service
+from ..metrics import span
+from ..responses import (
+    NDJSON_MEDIA_TYPE,
+    FastJSONResponse,
+    iter_ndjson,
+    search_content,
+    wants_ndjson,
+)
+from ..schemas.search import (
+    BatchSearchRequest,
+    BatchSearchResponse,
+    SearchParameters,
+    SearchRequest,
+    SearchResponse,
+)
+from ..services.batch import BatchSearchService
+from ..services.cache import SearchCache
+from ..services.local_index import LocalSearchService
+from ..services.search import QuantizationUnavailable, SearchOptions, SearchService
 
 router = APIRouter(tags=["search"])
 
 
-def _to_model(result: ChunkMatch) -> ChunkMatchModel:
-    return ChunkMatchModel(
-        chunk_id=result.chunk_id,
-        text=result.text,
-        score=result.score,
-        document={
-            "id": result.document.id,
-            "title": result.document.title,
-            "source": result.document.source,
-            "cancer_type": result.document.cancer_type,
-        },
+def _to_options(payload: SearchParameters) -> SearchOptions:
+    return SearchOptions(
+        exact=payload.exact,
+        ef_search=payload.ef_search,
+        probes=payload.probes,
+        sources=tuple(payload.sources or ()),
+        cancer_types=tuple(payload.cancer_types or ()),
+        document_ids=tuple(payload.document_ids or ()),
+        mode=payload.mode,
+        vector_weight=payload.vector_weight,
+        lexical_weight=payload.lexical_weight,
+        quantization=payload.quantization,
     )
 
 
-@router.post("/search", response_model=SearchResponse)
+@router.post(
+    "/search",
+    response_model=SearchResponse,
+    response_class=FastJSONResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
 async def search(
     payload: SearchRequest,
     search_service: SearchService = Depends(get_search_service),
-) -> SearchResponse:
-    """Execute an ANN search against the pgvector backed store."""
+    accept: Optional[str] = Header(None),
+) -> Union[FastJSONResponse, StreamingResponse]:
+    """Execute an ANN search against the pgvector backed store.
+
+    Results are encoded directly from the service's matches.  Clients
+    sending ``Accept: application/x-ndjson`` receive one result per line
+    instead of a single JSON document.
+    """
+
+    options = _to_options(payload)
+    try:
+        matches = await search_service.search(payload.query, payload.top_k, options=options)
+    except QuantizationUnavailable as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if wants_ndjson(accept):
+        # Lines are encoded as they are sent, so the stream times itself.
+        return StreamingResponse(
+            iter_ndjson(matches, stage="search.serialize"), media_type=NDJSON_MEDIA_TYPE
+        )
+    with span("search.serialize"):
+        return FastJSONResponse(search_content(payload.query, payload.top_k, matches))
+
+
+@router.post(
+    "/search/batch", response_model=BatchSearchResponse, response_class=FastJSONResponse
+)
+async def search_batch(
+    payload: BatchSearchRequest,
+    batch_service: Union[BatchSearchService, LocalSearchService] = Depends(
+        get_batch_search_service
+    ),
+) -> FastJSONResponse:
+    """Answer many queries with one embedding pass and multi-query SQL."""
+
+    try:
+        batch = await batch_service.search_many(
+            payload.queries, payload.top_k, options=_to_options(payload)
+        )
+    except QuantizationUnavailable as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return FastJSONResponse(
+        {
+            "top_k": payload.top_k,
+            "embedding_ms": batch.embedding_ms,
+            "elapsed_ms": batch.elapsed_ms,
+            "results": [
+                {
+                    "query": result.query,
+                    "elapsed_ms": result.elapsed_ms,
+                    "cached": result.cached,
+                    "results": list(result.matches),
+                }
+                for result in batch.results
+            ],
+        }
+    )
+
+
+@router.get("/search/cache")
+async def search_cache_stats(cache: SearchCache = Depends(get_search_cache)) -> dict:
+    """Report size and hit rate of the query embedding and result caches."""
+
+    return cache.stats()
+
+
+@router.delete("/search/cache")
+async def invalidate_search_cache(cache: SearchCache = Depends(get_search_cache)) -> dict:
+    """Drop this worker's cached results.
+
+    Writes to the database invalidate every worker's cache on their own
+    (see ``corpus_generation``); this is for the local backend and tests.
+    """
 
-    matches = await search_service.search(payload.query, payload.top_k)
-    models = [_to_model(match) for match in matches]
-    return SearchResponse(query=payload.query, top_k=payload.top_k, results=models)
+    cache.invalidate()
+    return cache.stats()
@@ -0,0 +1,43 @@
+"""Pydantic models for document upload and ingestion jobs."""
+
+from __future__ import annotations
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class IngestionJobModel(BaseModel):
+    job_id: str
+    document_id: str
+    filename: str
+    status: JobStatus
+    chunks_prepared: int = Field(..., description="Chunks read from the document so far")
+    chunks_written: int = Field(..., description="Chunks stored once the job succeeded")
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class UploadedDocumentModel(BaseModel):
+    document_id: str
+    filename: str
+    sha256: str
+    duplicate: bool = Field(
+        ..., description="The same content was uploaded before and is not ingested again"
+    )
+    job: Optional[IngestionJobModel] = Field(
+        None, description="Ingestion job for this content, if one is still tracked"
+    )
+
+
+class UploadResponse(BaseModel):
+    document_ids: List[str]
+    documents: List[UploadedDocumentModel]
+
+
+class IngestionJobList(BaseModel):
+    jobs: List[IngestionJobModel]
@@ -2,14 +2,60 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Annotated, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
+MAX_BATCH_QUERIES = 1000
 
-class SearchRequest(BaseModel):
-    query: str = Field(..., min_length=1, description="Free text query")
+
+class SearchParameters(BaseModel):
     top_k: int = Field(5, ge=1, le=50, description="Number of results to return")
+    exact: bool = Field(False, description="Skip the ANN index and run an exact scan")
+    ef_search: Optional[int] = Field(
+        None, ge=1, le=1000, description="HNSW search beam width for this request"
+    )
+    probes: Optional[int] = Field(
+        None, ge=1, le=1000, description="IVFFlat lists probed for this request"
+    )
+    sources: Optional[List[str]] = Field(
+        None, description="Only return chunks from these sources, e.g. NCCN"
+    )
+    cancer_types: Optional[List[str]] = Field(
+        None, description="Only return chunks for these cancer types"
+    )
+    document_ids: Optional[List[int]] = Field(
+        None, description="Only return chunks from these documents"
+    )
+    mode: Literal["vector", "hybrid"] = Field(
+        "vector", description="hybrid fuses vector and full-text matches with RRF"
+    )
+    vector_weight: float = Field(
+        1.0, ge=0, le=10, description="Weight of the vector ranking in hybrid mode"
+    )
+    lexical_weight: float = Field(
+        1.0, ge=0, le=10, description="Weight of the full-text ranking in hybrid mode"
+    )
+    quantization: Optional[Literal["halfvec", "bit"]] = Field(
+        None,
+        description=(
+            "Take candidates from a quantized index and re-rank on full vectors; "
+            "400 unless the quantized column has been added"
+        ),
+    )
+
+
+class SearchRequest(SearchParameters):
+    query: str = Field(..., min_length=1, description="Free text query")
+
+
+class BatchSearchRequest(SearchParameters):
+    queries: List[Annotated[str, Field(min_length=1)]] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_QUERIES,
+        description="Free text queries answered with the same options",
+    )
 
 
 class DocumentRefModel(BaseModel):
@@ -30,3 +76,17 @@ class SearchResponse(BaseModel):
     query: str
     top_k: int
     results: List[ChunkMatchModel]
+
+
+class BatchQueryResult(BaseModel):
+    query: str
+    elapsed_ms: float
+    cached: bool
+    results: List[ChunkMatchModel]
+
+
+class BatchSearchResponse(BaseModel):
+    top_k: int
+    embedding_ms: float
+    elapsed_ms: float
+    results: List[BatchQueryResult]
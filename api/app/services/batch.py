@@ -0,0 +1,193 @@
+"""Batched execution of many search queries in one request."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+from ..metrics import observe
+from .cache import SearchCache, normalise_query
+from .embedding import EmbeddingClient
+from .search import (
+    ChunkMatch,
+    SearchOptions,
+    require_quantized_column,
+    text,
+    to_match,
+    vector_literal,
+)
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_QUERIES_PER_STATEMENT = 32
+
+
+@dataclass
+class QueryResult:
+    query: str
+    matches: List[ChunkMatch]
+    elapsed_ms: float
+    cached: bool = False
+
+
+@dataclass
+class BatchSearchResult:
+    results: List[QueryResult]
+    embedding_ms: float
+    elapsed_ms: float
+
+
+class BatchSearchService:
+    """Answer many queries with one embedding pass and few round trips.
+
+    Queries are de-duplicated on their normalised form and served from the
+    result cache where possible.  The rest are embedded together, split into
+    groups of *queries_per_statement* and each group is answered by a single
+    multi-query statement on its own pooled session, with at most
+    *max_concurrency* groups in flight.  A query's ``elapsed_ms`` is the
+    duration of the statement that served it.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        embedder: EmbeddingClient,
+        cache: Optional[SearchCache] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        queries_per_statement: int = DEFAULT_QUERIES_PER_STATEMENT,
+    ) -> None:
+        if max_concurrency <= 0 or queries_per_statement <= 0:
+            raise ValueError("max_concurrency and queries_per_statement must be positive")
+        self._session_factory = session_factory
+        self._embedder = embedder
+        self._cache = cache
+        self._max_concurrency = max_concurrency
+        self._queries_per_statement = queries_per_statement
+
+    async def search_many(
+        self,
+        queries: Sequence[str],
+        top_k: int,
+        *,
+        options: Optional[SearchOptions] = None,
+    ) -> BatchSearchResult:
+        started = time.perf_counter()
+        options = options or SearchOptions()
+        generation = self._cache.generation if self._cache is not None else 0
+
+        answered: Dict[str, QueryResult] = {}
+        pending: List[str] = []
+        for normalised in dict.fromkeys(normalise_query(query) for query in queries):
+            matches = self._cached(normalised, top_k, options)
+            if matches is not None:
+                answered[normalised] = QueryResult(normalised, matches, 0.0, cached=True)
+            else:
+                pending.append(normalised)
+
+        embedding_ms = 0.0
+        if pending:
+            embed_started = time.perf_counter()
+            # The embedder is CPU bound numpy work; keep the event loop free.
+            vectors = await asyncio.to_thread(self._embedder.embed_batch, pending)
+            embedding_ms = (time.perf_counter() - embed_started) * 1000
+            observe("search.batch_embed", embedding_ms / 1000, items=len(pending))
+
+            semaphore = asyncio.Semaphore(self._max_concurrency)
+            step = self._queries_per_statement
+            groups = await asyncio.gather(
+                *(
+                    self._run_group(
+                        semaphore,
+                        pending[start : start + step],
+                        vectors[start : start + step],
+                        top_k,
+                        options,
+                    )
+                    for start in range(0, len(pending), step)
+                )
+            )
+            for group in groups:
+                for result in group:
+                    answered[result.query] = result
+                    self._store(result, top_k, options, generation)
+
+        results = []
+        for query in queries:
+            result = answered[normalise_query(query)]
+            results.append(
+                QueryResult(query, list(result.matches), result.elapsed_ms, result.cached)
+            )
+        return BatchSearchResult(
+            results=results,
+            embedding_ms=embedding_ms,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    async def _run_group(
+        self,
+        semaphore: asyncio.Semaphore,
+        queries: List[str],
+        vectors: Sequence[Sequence[float]],
+        top_k: int,
+        options: SearchOptions,
+    ) -> List[QueryResult]:
+        params: Dict[str, Any] = {
+            "ordinals": list(range(len(queries))),
+            "query_vectors": [vector_literal(vector) for vector in vectors],
+        }
+        params.update(options.vector_params(options.candidates(top_k)))
+        matches: List[List[ChunkMatch]] = [[] for _ in queries]
+        lexical: List[List[ChunkMatch]] = [[] for _ in queries]
+
+        async with semaphore:
+            async with self._session_factory() as session:
+                if options.quantized:
+                    await require_quantized_column(session, options.quantization)
+                settings = options.settings_sql()
+                if settings is not None:
+                    await session.execute(text(settings))
+                started = time.perf_counter()
+                statement = options.statement(batch=True, dimension=self._embedder.dimensions)
+                result = await session.execute(statement, params)
+                for row in result:
+                    matches[row.ordinal].append(to_match(row))
+                if options.hybrid:
+                    lexical_params = {
+                        name: value
+                        for name, value in params.items()
+                        if name not in ("query_vectors", "candidates")
+                    }
+                    lexical_params["query_texts"] = list(queries)
+                    result = await session.execute(
+                        options.statement(batch=True, lexical=True), lexical_params
+                    )
+                    for row in result:
+                        lexical[row.ordinal].append(to_match(row))
+                elapsed_ms = (time.perf_counter() - started) * 1000
+        observe("search.batch_query", elapsed_ms / 1000, items=len(queries))
+
+        if options.hybrid:
+            matches = [
+                options.fuse(vector, text_matches, top_k)
+                for vector, text_matches in zip(matches, lexical)
+            ]
+        return [QueryResult(query, found, elapsed_ms) for query, found in zip(queries, matches)]
+
+    def _cached(
+        self, normalised: str, top_k: int, options: SearchOptions
+    ) -> Optional[List[ChunkMatch]]:
+        if self._cache is None:
+            return None
+        return self._cache.results.get((normalised, top_k, options))
+
+    def _store(
+        self, result: QueryResult, top_k: int, options: SearchOptions, generation: int
+    ) -> None:
+        # Same key and generation guard as CachedSearchService, so single and
+        # batch searches share cached results.
+        if self._cache is not None and generation == self._cache.generation:
+            self._cache.results.set((result.query, top_k, options), result.matches)
@@ -0,0 +1,251 @@
+"""In-process caching for query embeddings and search results.
+
+Each worker process has its own :class:`SearchCache`.  They are kept
+consistent through the database: every write to ``chunks`` bumps the
+``corpus_generation`` counter in the same transaction, and
+:class:`CorpusGeneration` reads it (at most once per interval) and drops the
+cached results of a worker whose cache predates the change.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from .embedding import EmbeddingClient
+from .search import ChunkMatch, SearchOptions, SearchService
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def normalise_query(query: str) -> str:
+    """Collapse case and whitespace so equivalent queries share cache entries.
+
+    The embedder lower-cases and whitespace-tokenises its input, so queries
+    with the same normal form always produce the same embedding.
+    """
+
+    return " ".join(query.lower().split())
+
+
+def result_key(query: str, top_k: int, options: Optional[SearchOptions] = None) -> Hashable:
+    """Key of the cached matches for one search request."""
+
+    return (normalise_query(query), top_k, options or SearchOptions())
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "size": self.size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class TTLCache(Generic[K, V]):
+    """Size bounded LRU cache whose entries expire *ttl* seconds after insertion."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("Cache size must be positive")
+        if ttl <= 0:
+            raise ValueError("Cache TTL must be positive")
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+            del self._entries[key]
+        self._misses += 1
+        return None
+
+    def peek(self, key: K) -> Optional[V]:
+        """Return a live entry without counting a lookup or refreshing its recency."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > self._clock():
+            return entry[1]
+        return None
+
+    def set(self, key: K, value: V) -> None:
+        self._entries[key] = (self._clock() + self._ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            size=len(self._entries),
+            maxsize=self._maxsize,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+        )
+
+
+class SearchCache:
+    """Two cache levels: normalised query -> embedding and request -> matches."""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.embeddings: TTLCache[str, List[float]] = TTLCache(maxsize, ttl, clock)
+        self.results: TTLCache[Hashable, List[ChunkMatch]] = TTLCache(maxsize, ttl, clock)
+        self._generation = 0
+        self._corpus_generation: Optional[int] = None
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every invalidation, i.e. whenever the corpus changes."""
+
+        return self._generation
+
+    def invalidate(self) -> None:
+        """Drop cached results; call after new chunks are written.
+
+        Query embeddings only depend on the query text so they survive.
+        """
+
+        self.results.clear()
+        self._generation += 1
+
+    def observe(self, corpus_generation: int) -> None:
+        """Invalidate if the database's corpus generation moved since last observed."""
+
+        if corpus_generation != self._corpus_generation:
+            self.invalidate()
+            self._corpus_generation = corpus_generation
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "generation": self._generation,
+            "corpus_generation": self._corpus_generation,
+            "embeddings": self.embeddings.stats().as_dict(),
+            "results": self.results.stats().as_dict(),
+        }
+
+
+class CorpusGeneration:
+    """Feeds the database's corpus generation to a :class:`SearchCache`.
+
+    *load* reads the counter; it is called at most once per *interval*
+    seconds, so results cached by this worker may outlive a write from
+    another process by that long rather than by the cache TTL.
+    """
+
+    def __init__(
+        self,
+        cache: SearchCache,
+        load: Callable[[], Awaitable[int]],
+        interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cache = cache
+        self._load = load
+        self._interval = interval
+        self._clock = clock
+        self._next_check = float("-inf")
+
+    async def refresh(self) -> None:
+        now = self._clock()
+        if now < self._next_check:
+            return
+        # Claimed before awaiting so concurrent requests do not all query.
+        self._next_check = now + self._interval
+        try:
+            generation = await self._load()
+        except BaseException:
+            self._next_check = float("-inf")
+            raise
+        self._cache.observe(generation)
+
+
+class CachingEmbedder:
+    """Embedder wrapper serving repeated queries from :class:`SearchCache`."""
+
+    def __init__(self, embedder: EmbeddingClient, cache: SearchCache) -> None:
+        self._embedder = embedder
+        self._cache = cache
+
+    @property
+    def dimensions(self) -> int:
+        return self._embedder.dimensions
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        return self._embedder.embed_batch(texts)
+
+    async def embed(self, text: str) -> List[float]:
+        key = normalise_query(text)
+        vector = self._cache.embeddings.get(key)
+        if vector is None:
+            vector = await self._embedder.embed(text)
+            self._cache.embeddings.set(key, vector)
+        return vector
+
+
+class CachedSearchService:
+    """:class:`SearchService` decorator caching ranked matches per request."""
+
+    def __init__(self, service: SearchService, cache: SearchCache) -> None:
+        self._service = service
+        self._cache = cache
+
+    async def search(
+        self, query: str, top_k: int, *, options: Optional[SearchOptions] = None
+    ) -> List[ChunkMatch]:
+        key = result_key(query, top_k, options)
+        matches = self._cache.results.get(key)
+        if matches is None:
+            generation = self._cache.generation
+            matches = list(await self._service.search(query, top_k, options=options))
+            # Do not repopulate the cache with results computed against a
+            # corpus that was invalidated while the query was running.
+            if generation == self._cache.generation:
+                self._cache.results.set(key, matches)
+        return list(matches)
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
-import hashlib
 import math
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .token_cache import TokenHashCache, shared_token_cache
 
 
 class EmbeddingClient:
@@ -17,15 +20,24 @@ class EmbeddingClient:
     the behaviour of a production grade embedder.
     """
 
-    def __init__(self, dimensions: int = 1536) -> None:
+    def __init__(
+        self,
+        dimensions: int = 1536,
+        token_cache: Optional[TokenHashCache] = None,
+    ) -> None:
         if dimensions <= 0:
             raise ValueError("Embedding dimensionality must be positive")
         self._dimensions = dimensions
+        self._token_cache = token_cache if token_cache is not None else shared_token_cache()
 
     @property
     def dimensions(self) -> int:
         return self._dimensions
 
+    @property
+    def token_cache(self) -> TokenHashCache:
+        return self._token_cache
+
     async def embed(self, text: str) -> List[float]:
         """Generate a pseudo-embedding for *text*.
 
@@ -41,12 +53,7 @@ class EmbeddingClient:
             return buckets
 
         for token in tokens:
-            digest = hashlib.sha256(token.encode("utf-8")).digest()
-            # Use the first four bytes of the digest to pick a bucket.  This
-            # keeps the behaviour deterministic without requiring any heavy
-            # dependencies.
-            bucket_index = int.from_bytes(digest[:4], "big") % self._dimensions
-            buckets[bucket_index] += 1.0
+            buckets[self._bucket(token)] += 1.0
 
         # Normalise to unit length so that cosine distance works as expected.
         norm = math.sqrt(sum(component * component for component in buckets))
@@ -55,6 +62,43 @@ class EmbeddingClient:
 
         return buckets
 
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed *texts* into a contiguous ``float32`` matrix, one row per text.
+
+        Each distinct token is hashed once for the whole batch and the rows
+        are normalised in vectorised form.  Bucket counts are integers, so the
+        float64 norms and divisions match :meth:`embed` exactly and every row
+        is bit-identical to ``np.float32(await embed(text))``.  The work is
+        CPU bound; async callers with large batches may offload it to a
+        thread.
+        """
+
+        rows = len(texts)
+        bucket_of: Dict[str, int] = {}
+        flat_indices: List[int] = []
+        for row, text in enumerate(texts):
+            offset = row * self._dimensions
+            for token in self._tokenise(text):
+                bucket = bucket_of.get(token)
+                if bucket is None:
+                    bucket = bucket_of[token] = self._bucket(token)
+                flat_indices.append(offset + bucket)
+
+        counts = np.bincount(
+            np.asarray(flat_indices, dtype=np.int64),
+            minlength=rows * self._dimensions,
+        )
+        matrix = counts.reshape(rows, self._dimensions).astype(np.float64)
+        norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+        np.divide(matrix, norms[:, None], out=matrix, where=norms[:, None] > 0)
+        return np.ascontiguousarray(matrix, dtype=np.float32)
+
+    def _bucket(self, token: str) -> int:
+        # The cached value is the first four bytes of the token's SHA-256
+        # digest, which keeps the behaviour deterministic without requiring
+        # any heavy dependencies.
+        return self._token_cache.lookup(token) % self._dimensions
+
     def _tokenise(self, text: str) -> Iterable[str]:
         for token in text.lower().split():
             stripped = token.strip()
@@ -0,0 +1,366 @@
+"""Management of the pgvector ANN index backing the search service.
+
+Usage::
+
+    python -m api.app.services.index create --method hnsw --m 16 --ef-construction 64
+    python -m api.app.services.index rebuild
+    python -m api.app.services.index drop
+    python -m api.app.services.index filters
+    python -m api.app.services.index lexical
+    python -m api.app.services.index quantize --quantization halfvec
+    python -m api.app.services.index create --quantization halfvec
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional
+
+from ..storage import CHUNKS_TABLE, EMBEDDING_DIMENSION, LEXICAL_COLUMN, LEXICAL_CONFIG
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+IndexMethod = Literal["hnsw", "ivfflat"]
+
+DEFAULT_TABLE = CHUNKS_TABLE
+DEFAULT_COLUMN = "embedding"
+# The search query orders by ``<->`` (L2 distance), so the index must use the
+# matching operator class for the planner to pick it.
+DEFAULT_OPCLASS = "vector_l2_ops"
+DEFAULT_DIMENSION = EMBEDDING_DIMENSION
+# Filtered searches rely on ``hnsw.iterative_scan``, which older pgvector
+# releases silently ignore, returning fewer than top_k rows.
+MIN_PGVECTOR_VERSION = (0, 8, 0)
+PGVECTOR_VERSION_SQL = "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+
+
+@dataclass(frozen=True)
+class Quantization:
+    """A reduced-precision copy of the embedding searched for candidates.
+
+    The copy is a stored generated column, so every writer fills it and it
+    always matches ``embedding``.  ``halfvec`` halves the index size and
+    keeps near-identical ordering; ``bit`` (one sign bit per dimension,
+    compared by Hamming distance) is 32x smaller but needs a wider re-rank.
+    """
+
+    name: str
+    column: str
+    column_type: str
+    expression: str
+    opclass: str
+    operator: str
+    query_expression: str
+
+    def column_sql(self, table: str = DEFAULT_TABLE, dimension: int = DEFAULT_DIMENSION) -> str:
+        column_type = self.column_type.format(dimension=dimension)
+        expression = self.expression.format(vector=DEFAULT_COLUMN, dimension=dimension)
+        return (
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {self.column} {column_type} "
+            f"GENERATED ALWAYS AS ({expression}) STORED"
+        )
+
+    def order_by(self, query_vector: str, dimension: int) -> str:
+        """ORDER BY expression for *query_vector* that can use the column's index."""
+        query = self.query_expression.format(vector=query_vector, dimension=dimension)
+        return f"c.{self.column} {self.operator} {query}"
+
+
+QUANTIZATIONS: Dict[str, Quantization] = {
+    "halfvec": Quantization(
+        name="halfvec",
+        column="embedding_halfvec",
+        column_type="halfvec({dimension})",
+        expression="{vector}::halfvec({dimension})",
+        opclass="halfvec_l2_ops",
+        operator="<->",
+        query_expression="CAST({vector} AS halfvec({dimension}))",
+    ),
+    "bit": Quantization(
+        name="bit",
+        column="embedding_bit",
+        column_type="bit({dimension})",
+        expression="binary_quantize({vector})::bit({dimension})",
+        opclass="bit_hamming_ops",
+        operator="<~>",
+        query_expression="binary_quantize(CAST({vector} AS vector))::bit({dimension})",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class AnnIndexSpec:
+    """Definition of an HNSW or IVFFlat index over an embedding column."""
+
+    method: IndexMethod = "hnsw"
+    table: str = DEFAULT_TABLE
+    column: str = DEFAULT_COLUMN
+    opclass: str = DEFAULT_OPCLASS
+    m: int = 16
+    ef_construction: int = 64
+    lists: int = 100
+
+    @property
+    def name(self) -> str:
+        return f"{self.table}_{self.column}_{self.method}_idx"
+
+    def create_sql(self, concurrently: bool = True) -> str:
+        if self.method == "hnsw":
+            params = f"m = {int(self.m)}, ef_construction = {int(self.ef_construction)}"
+        elif self.method == "ivfflat":
+            params = f"lists = {int(self.lists)}"
+        else:
+            raise ValueError(f"Unsupported index method: {self.method}")
+        return (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {self.name} "
+            f"ON {self.table} USING {self.method} ({self.column} {self.opclass}) "
+            f"WITH ({params})"
+        )
+
+    def drop_sql(self, concurrently: bool = True) -> str:
+        return f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {self.name}"
+
+    def reindex_sql(self, concurrently: bool = True) -> str:
+        return f"REINDEX INDEX {'CONCURRENTLY ' if concurrently else ''}{self.name}"
+
+
+# B-tree indexes behind the search filters, as created by the storage
+# migrations: (name, table, key column, covered columns).
+FILTER_INDEXES = (
+    ("chunks_source_idx", CHUNKS_TABLE, "source", ()),
+    ("chunks_cancer_type_idx", CHUNKS_TABLE, "cancer_type", ()),
+    (
+        "chunks_document_id_idx",
+        CHUNKS_TABLE,
+        "document_id",
+        ("chunk_key", "chunk_index", "document_sha256"),
+    ),
+)
+
+
+def filter_index_sql(concurrently: bool = True) -> List[str]:
+    statements = []
+    for name, table, column, covered in FILTER_INDEXES:
+        statement = (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+            f"ON {table} ({column})"
+        )
+        if covered:
+            statement += f" INCLUDE ({', '.join(covered)})"
+        statements.append(statement)
+    return statements
+
+
+def lexical_index_sql(table: str = DEFAULT_TABLE, concurrently: bool = True) -> List[str]:
+    """Statements adding the full-text column and its GIN index to *table*.
+
+    Adding the stored generated column rewrites the table once; after that
+    Postgres keeps it in sync with ``body`` on every write.
+    """
+
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {LEXICAL_COLUMN} tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('{LEXICAL_CONFIG}', coalesce(body, ''))) STORED",
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+        f"{table}_{LEXICAL_COLUMN}_idx ON {table} USING gin ({LEXICAL_COLUMN})",
+    ]
+
+
+def search_settings_sql(
+    exact: bool = False,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    iterative_scan: bool = False,
+) -> Optional[str]:
+    """Return a statement applying per-query ANN settings to the current transaction.
+
+    ``exact`` disables index scans so pgvector falls back to an exact
+    sequential scan; ``ef_search`` and ``probes`` trade latency for recall on
+    HNSW and IVFFlat indexes respectively.  ``iterative_scan`` (pgvector
+    0.8+) keeps scanning the index until enough rows pass the query's
+    filters.  Returns ``None`` when nothing needs to change so the caller can
+    skip the round trip.
+    """
+
+    settings = []
+    if exact:
+        settings.append("set_config('enable_indexscan', 'off', true)")
+    if ef_search is not None:
+        settings.append(f"set_config('hnsw.ef_search', '{int(ef_search)}', true)")
+    if probes is not None:
+        settings.append(f"set_config('ivfflat.probes', '{int(probes)}', true)")
+    if iterative_scan:
+        settings.append("set_config('hnsw.iterative_scan', 'relaxed_order', true)")
+        settings.append("set_config('ivfflat.iterative_scan', 'relaxed_order', true)")
+    if not settings:
+        return None
+    return "SELECT " + ", ".join(settings)
+
+
+def check_pgvector_version(version: Optional[str]) -> None:
+    """Raise ``RuntimeError`` unless *version* is at least :data:`MIN_PGVECTOR_VERSION`."""
+
+    required = ".".join(map(str, MIN_PGVECTOR_VERSION))
+    if version is None:
+        raise RuntimeError("the pgvector extension is not installed")
+    parts = tuple(int(part) for part in version.split(".") if part.isdigit())
+    if parts < MIN_PGVECTOR_VERSION:
+        raise RuntimeError(
+            f"pgvector {version} is installed but filtered searches need {required} or "
+            "later for hnsw.iterative_scan; upgrade it with ALTER EXTENSION vector UPDATE"
+        )
+
+
+class AnnIndexManager:
+    """Create, rebuild and drop ANN indexes.
+
+    Index builds run ``CONCURRENTLY`` by default so searches keep working
+    while the index is (re)built, which requires an autocommit connection.
+    """
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+
+    async def check_pgvector(self) -> None:
+        """Fail unless the database's pgvector supports iterative index scans."""
+
+        from sqlalchemy import text
+
+        async with self._engine.connect() as conn:
+            version = (await conn.execute(text(PGVECTOR_VERSION_SQL))).scalar()
+        check_pgvector_version(version)
+
+    async def create(self, spec: AnnIndexSpec, concurrently: bool = True) -> None:
+        await self._execute(spec.create_sql(concurrently))
+
+    async def drop(self, spec: AnnIndexSpec, concurrently: bool = True) -> None:
+        await self._execute(spec.drop_sql(concurrently))
+
+    async def rebuild(self, spec: AnnIndexSpec, concurrently: bool = True) -> None:
+        """Rebuild the index, e.g. after a bulk load skewed IVFFlat centroids."""
+
+        await self._execute(spec.reindex_sql(concurrently))
+
+    async def ensure_filter_indexes(self, concurrently: bool = True) -> None:
+        """Create the b-tree indexes used by filtered searches."""
+
+        for statement in filter_index_sql(concurrently):
+            await self._execute(statement)
+
+    async def ensure_lexical_index(
+        self, table: str = DEFAULT_TABLE, concurrently: bool = True
+    ) -> None:
+        """Create the ``tsvector`` column and GIN index used by hybrid search."""
+
+        for statement in lexical_index_sql(table, concurrently):
+            await self._execute(statement)
+
+    async def ensure_quantized_column(
+        self,
+        quantization: Quantization,
+        table: str = DEFAULT_TABLE,
+        dimension: int = DEFAULT_DIMENSION,
+    ) -> None:
+        """Add the generated quantized column; rewrites *table* once."""
+
+        await self._execute(quantization.column_sql(table, dimension))
+
+    async def replace(self, spec: AnnIndexSpec) -> None:
+        """Drop and recreate the index with new build parameters."""
+
+        await self.drop(spec)
+        await self.create(spec)
+
+    async def _execute(self, statement: str) -> None:
+        from sqlalchemy import text
+
+        async with self._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(statement))
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Manage the pgvector ANN index")
+    parser.add_argument(
+        "action",
+        choices=("create", "rebuild", "replace", "drop", "filters", "lexical", "quantize"),
+    )
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--method", choices=("hnsw", "ivfflat"), default="hnsw")
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    parser.add_argument("--column", default=DEFAULT_COLUMN)
+    parser.add_argument("--opclass", default=DEFAULT_OPCLASS)
+    parser.add_argument(
+        "--quantization",
+        choices=sorted(QUANTIZATIONS),
+        help="Target the quantized embedding column (overrides --column and --opclass)",
+    )
+    parser.add_argument("--dimension", type=int, default=DEFAULT_DIMENSION)
+    parser.add_argument("--m", type=int, default=16, help="HNSW graph degree")
+    parser.add_argument("--ef-construction", type=int, default=64, help="HNSW build beam width")
+    parser.add_argument("--lists", type=int, default=100, help="IVFFlat list count")
+    parser.add_argument(
+        "--blocking",
+        action="store_true",
+        help="Build without CONCURRENTLY (faster, but blocks writes)",
+    )
+    return parser.parse_args()
+
+
+async def _run(args: argparse.Namespace) -> None:
+    quantization = QUANTIZATIONS[args.quantization] if args.quantization else None
+    spec = AnnIndexSpec(
+        method=args.method,
+        table=args.table,
+        column=quantization.column if quantization else args.column,
+        opclass=quantization.opclass if quantization else args.opclass,
+        m=args.m,
+        ef_construction=args.ef_construction,
+        lists=args.lists,
+    )
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(args.db_url)
+    manager = AnnIndexManager(engine)
+    concurrently = not args.blocking
+    try:
+        await manager.check_pgvector()
+        if args.action == "create":
+            await manager.create(spec, concurrently)
+        elif args.action == "rebuild":
+            await manager.rebuild(spec, concurrently)
+        elif args.action == "replace":
+            await manager.replace(spec)
+        elif args.action == "filters":
+            await manager.ensure_filter_indexes(concurrently)
+        elif args.action == "lexical":
+            await manager.ensure_lexical_index(args.table, concurrently)
+        elif args.action == "quantize":
+            if quantization is None:
+                raise SystemExit("quantize requires --quantization")
+            await manager.ensure_quantized_column(quantization, args.table, args.dimension)
+        else:
+            await manager.drop(spec, concurrently)
+    finally:
+        await engine.dispose()
+    labels = {
+        "filters": "filter indexes",
+        "lexical": f"{args.table}.{LEXICAL_COLUMN} GIN index",
+        "quantize": f"{args.table}.{spec.column} column",
+    }
+    print(f"{args.action}: {labels.get(args.action, spec.name)}")
+
+
+def main() -> None:
+    args = _parse_args()
+    if not args.db_url:
+        raise SystemExit("--db-url or DATABASE_URL is required")
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
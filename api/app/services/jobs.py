@@ -0,0 +1,203 @@
+"""Background ingestion of uploaded documents."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from uuid import uuid4
+
+DEFAULT_CONCURRENCY = 1
+DEFAULT_MAX_PENDING = 100
+DEFAULT_HISTORY = 1000
+
+
+class QueueFull(RuntimeError):
+    """Raised when more documents are waiting than the queue accepts."""
+
+
+@dataclass
+class IngestionJob:
+    """One uploaded document moving through chunk -> embed -> upsert."""
+
+    id: str
+    document_id: str
+    filename: str
+    path: Path
+    sha256: str
+    status: str = "queued"
+    chunks_prepared: int = 0
+    chunks_written: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+
+# Runs in a worker thread, updates the job's progress counters and returns
+# the number of chunks written.
+IngestRunner = Callable[[IngestionJob], int]
+
+
+class IngestionQueue:
+    """In-process job queue that ingests uploaded documents in the background.
+
+    At most *concurrency* documents are ingested at once, each on a worker
+    thread so chunking and embedding never block the event loop, and at
+    most *max_pending* wait.  Jobs are indexed by content hash, and a
+    document is never queued while an earlier job for it is still pending.
+    The last *history* finished jobs are kept for status queries.
+    """
+
+    def __init__(
+        self,
+        runner: IngestRunner,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        history: int = DEFAULT_HISTORY,
+        on_complete: Optional[Callable[[IngestionJob], None]] = None,
+    ) -> None:
+        if concurrency <= 0 or max_pending <= 0:
+            raise ValueError("concurrency and max_pending must be positive")
+        self._runner = runner
+        self._concurrency = concurrency
+        self._max_pending = max_pending
+        self._history = history
+        self._on_complete = on_complete
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._by_hash: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue[IngestionJob]] = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the worker tasks on the running loop; safe to call repeatedly."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_pending)
+        loop = asyncio.get_running_loop()
+        self._workers = [
+            loop.create_task(self._work(), name=f"ingestion-worker-{number}")
+            for number in range(self._concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued jobs are left as they are."""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def join(self) -> None:
+        """Wait until every submitted job has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def submit(self, document_id: str, filename: str, path: Path, sha256: str) -> IngestionJob:
+        """Queue a job, or return the queued or running job for the same content.
+
+        The check and the insert run without yielding to the event loop, so
+        concurrent uploads of one document never queue it twice.
+        """
+        if self._queue is None:
+            raise RuntimeError("start() must be called before submitting jobs")
+        live = self.find(sha256)
+        if live is not None and not live.done:
+            return live
+        job = IngestionJob(
+            id=str(uuid4()), document_id=document_id, filename=filename, path=path, sha256=sha256
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"{self._max_pending} documents are already waiting") from None
+        self._jobs[job.id] = job
+        self._by_hash[sha256] = job.id
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def find(self, sha256: str) -> Optional[IngestionJob]:
+        """Return the latest job for a document with this content hash."""
+        job_id = self._by_hash.get(sha256)
+        return self._jobs.get(job_id) if job_id is not None else None
+
+    def jobs(self) -> List[IngestionJob]:
+        return list(reversed(self._jobs.values()))
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            try:
+                job.status = "running"
+                job.started_at = time.time()
+                job.chunks_written = await asyncio.to_thread(self._runner, job)
+                job.status = "succeeded"
+            except Exception as exc:
+                job.status = "failed"
+                job.error = str(exc) or type(exc).__name__
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+            if self._on_complete is not None:
+                self._on_complete(job)
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.done]
+        for job in finished[: max(len(finished) - self._history, 0)]:
+            del self._jobs[job.id]
+            if self._by_hash.get(job.sha256) == job.id:
+                del self._by_hash[job.sha256]
+
+
+def ingest_document(
+    job: IngestionJob,
+    db_url: Optional[str],
+    chunk_size: int = 1000,
+    overlap: int = 200,
+    extract_cache: Optional[Path] = None,
+) -> int:
+    """Chunk, embed and upsert one uploaded document; an :data:`IngestRunner`.
+
+    The ingestion package is imported on first use so the API starts
+    without loading it.  Chunks are embedded with the token-hash embedder so
+    they share the query embedding space.
+    """
+    from ingestion.extract import ExtractionCache, Extractor
+    from ingestion.ingest import DocumentInfo, embed_chunks, read_chunks, upsert_embeddings
+
+    def counted(records: Iterable) -> Iterator:
+        for record in records:
+            job.chunks_prepared += 1
+            yield record
+
+    extractor = Extractor(cache=ExtractionCache(extract_cache) if extract_cache else None)
+    records = read_chunks(
+        [job.path],
+        chunk_size,
+        overlap,
+        extractor=extractor,
+        describe=lambda _path: DocumentInfo(title=job.filename),
+    )
+    if db_url:
+        written = upsert_embeddings(
+            embed_chunks(counted(records), embedder="token-hash"), db_url=db_url, bulk=True
+        )
+    else:
+        # Nothing would be stored, so only chunk the document.
+        for _ in counted(records):
+            pass
+        written = 0
+    if not job.chunks_prepared:
+        raise ValueError(f"No text could be extracted from {job.filename}")
+    return written
+
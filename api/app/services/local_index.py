@@ -0,0 +1,773 @@
+"""In-process vector index, a Postgres-free alternative to pgvector search.
+
+A snapshot is a directory holding::
+
+    manifest.json           dimension, row count, metric, labels and optional parts
+    vectors.npy             float32 matrix, memory-mapped when loaded
+    chunks.jsonl            chunk text and document metadata, one row per line
+    chunk_offsets.npy       byte offset of every line in chunks.jsonl
+    document_ids.npy        filter columns; sources and cancer types are
+    sources.npy             int32 codes into the manifest's label lists
+    cancer_types.npy
+    codes.npy, scales.npy   optional int8 quantised copy of the vectors
+    graph.npy               optional nearest-neighbour graph for ANN search
+
+Every file is memory-mapped read-only and chunk rows are decoded on demand,
+so loading a snapshot parses nothing and the API's workers share one copy of
+it in the page cache instead of each holding its own Python objects.
+
+Usage::
+
+    python -m api.app.services.local_index export snapshot/ --quantize --graph-degree 16
+    python -m api.app.services.local_index build snapshot/ --graph-degree 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import json
+import mmap
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from ..metrics import span
+from .batch import BatchSearchResult, QueryResult
+from .embedding import EmbeddingClient
+from .search import DEFAULT_SEARCH_OPTIONS, ChunkMatch, DocumentRef, SearchOptions, text
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+Metric = Literal["cosine", "ip"]
+Hit = Tuple[int, float]
+
+MANIFEST = "manifest.json"
+VECTORS = "vectors.npy"
+CHUNKS = "chunks.jsonl"
+CODES = "codes.npy"
+SCALES = "scales.npy"
+GRAPH = "graph.npy"
+CHUNK_OFFSETS = "chunk_offsets.npy"
+DOCUMENT_IDS = "document_ids.npy"
+SOURCE_CODES = "sources.npy"
+CANCER_TYPE_CODES = "cancer_types.npy"
+
+# Version 1 snapshots lack the offsets and filter columns; they still load,
+# parsing every chunk, and the ``build`` action upgrades them in place.
+SNAPSHOT_VERSION = 2
+SUPPORTED_VERSIONS = (1, SNAPSHOT_VERSION)
+# Quantised scans keep this many candidates per result for the exact re-rank.
+RERANK_FACTOR = 4
+DEFAULT_EF_SEARCH = 64
+MIN_ENTRY_POINTS = 8
+# Rows scored per matrix product, bounding temporaries on large snapshots.
+# int8 blocks are widened to float32 for the product, so they are smaller.
+BLOCK_ROWS = 65536
+QUANTISED_BLOCK_ROWS = 8192
+
+EXPORT_SQL = """
+    SELECT
+        c.id AS chunk_id,
+        c.body AS chunk_text,
+        c.document_id AS document_id,
+        c.document_title AS document_title,
+        c.source AS document_source,
+        c.cancer_type AS cancer_type,
+        c.embedding::text AS embedding
+    FROM chunks c
+    WHERE c.embedding IS NOT NULL
+    ORDER BY c.id
+"""
+
+
+@dataclass(frozen=True)
+class LocalChunk:
+    chunk_id: int
+    text: str
+    document_id: int
+    title: str
+    source: str
+    cancer_type: Optional[str]
+
+    def to_match(self, score: float) -> ChunkMatch:
+        return ChunkMatch(
+            chunk_id=self.chunk_id,
+            text=self.text,
+            score=score,
+            document=DocumentRef(
+                id=self.document_id,
+                title=self.title,
+                source=self.source,
+                cancer_type=self.cancer_type,
+            ),
+        )
+
+
+class ChunkTable(Sequence[LocalChunk]):
+    """Read-only view of ``chunks.jsonl`` that decodes a row per lookup.
+
+    Search only ever materialises its top-k hits, so the text and metadata of
+    the other rows stay in the shared mapping.
+    """
+
+    def __init__(self, data: Union[bytes, mmap.mmap], offsets: np.ndarray) -> None:
+        self._data = data
+        self._offsets = offsets
+
+    @classmethod
+    def open(cls, path: Path, offsets: np.ndarray, mmap_file: bool = True) -> "ChunkTable":
+        if not mmap_file or not path.stat().st_size:
+            return cls(path.read_bytes(), offsets)
+        with path.open("rb") as fp:
+            return cls(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ), offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: Any) -> Any:
+        rows = range(len(self))[row]
+        if isinstance(rows, range):
+            return [self._decode(row) for row in rows]
+        return self._decode(rows)
+
+    def _decode(self, row: int) -> LocalChunk:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return LocalChunk(**json.loads(self._data[start:end]))
+
+
+class _Labels:
+    """Dictionary encoding of a string column; ``None`` becomes ``-1``."""
+
+    def __init__(self, labels: Iterable[str] = ()) -> None:
+        self.codes: Dict[str, int] = {label: code for code, label in enumerate(labels)}
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        return self.codes.setdefault(value, len(self.codes))
+
+    def lookup(self, values: Iterable[str]) -> List[int]:
+        return [self.codes[value] for value in values if value in self.codes]
+
+
+@dataclass
+class ChunkColumns:
+    """The filterable chunk fields as flat integer arrays."""
+
+    document_ids: np.ndarray
+    sources: np.ndarray
+    source_labels: List[str]
+    cancer_types: np.ndarray
+    cancer_type_labels: List[str]
+
+    @classmethod
+    def from_chunks(cls, chunks: Sequence[LocalChunk]) -> "ChunkColumns":
+        sources, cancer_types = _Labels(), _Labels()
+        return cls(
+            document_ids=np.array([chunk.document_id for chunk in chunks], dtype=np.int64),
+            sources=np.array([sources.encode(chunk.source) for chunk in chunks], dtype=np.int32),
+            source_labels=list(sources.codes),
+            cancer_types=np.array(
+                [cancer_types.encode(chunk.cancer_type) for chunk in chunks], dtype=np.int32
+            ),
+            cancer_type_labels=list(cancer_types.codes),
+        )
+
+    @classmethod
+    def load(
+        cls, path: Path, manifest: Dict[str, Any], mode: Optional[str] = "r"
+    ) -> "ChunkColumns":
+        return cls(
+            document_ids=np.load(path / DOCUMENT_IDS, mmap_mode=mode),
+            sources=np.load(path / SOURCE_CODES, mmap_mode=mode),
+            source_labels=manifest["source_labels"],
+            cancer_types=np.load(path / CANCER_TYPE_CODES, mmap_mode=mode),
+            cancer_type_labels=manifest["cancer_type_labels"],
+        )
+
+    def labels(self) -> Dict[str, List[str]]:
+        return {
+            "source_labels": self.source_labels,
+            "cancer_type_labels": self.cancer_type_labels,
+        }
+
+    def mask(
+        self,
+        sources: Iterable[str] = (),
+        cancer_types: Iterable[str] = (),
+        document_ids: Iterable[int] = (),
+    ) -> Optional[np.ndarray]:
+        """Boolean row mask for the search filters, or ``None`` if unfiltered."""
+        mask = None
+        for values, wanted in (
+            (self.sources, _codes(self.source_labels, sources)),
+            (self.cancer_types, _codes(self.cancer_type_labels, cancer_types)),
+            (self.document_ids, list(document_ids) or None),
+        ):
+            if wanted is not None:
+                # Unknown labels have no code, so they match no rows.
+                selected = np.isin(values, wanted)
+                mask = selected if mask is None else mask & selected
+        return mask
+
+
+def _codes(labels: Sequence[str], values: Iterable[str]) -> Optional[List[int]]:
+    values = tuple(values)
+    return _Labels(labels).lookup(values) if values else None
+
+
+class _ChunkWriter:
+    """Write ``chunks.jsonl`` with its offsets and filter columns, row by row.
+
+    The arrays are memory-mapped ``.npy`` files sized up front, so writing
+    runs in constant memory however many rows are exported.
+    """
+
+    def __init__(self, path: Path, rows: int) -> None:
+        def column(name: str, dtype: Any, length: int = rows) -> np.ndarray:
+            return np.lib.format.open_memmap(path / name, mode="w+", dtype=dtype, shape=(length,))
+
+        self._fp = (path / CHUNKS).open("wb")
+        self._offsets = column(CHUNK_OFFSETS, np.int64, rows + 1)
+        self._document_ids = column(DOCUMENT_IDS, np.int64)
+        self._sources = column(SOURCE_CODES, np.int32)
+        self._cancer_types = column(CANCER_TYPE_CODES, np.int32)
+        self._source_labels = _Labels()
+        self._cancer_type_labels = _Labels()
+        self._row = 0
+        self._offsets[0] = 0
+
+    def write(self, chunk: LocalChunk) -> None:
+        line = (json.dumps(asdict(chunk)) + "\n").encode("utf-8")
+        self._fp.write(line)
+        row = self._row
+        self._offsets[row + 1] = self._offsets[row] + len(line)
+        self._document_ids[row] = chunk.document_id
+        self._sources[row] = self._source_labels.encode(chunk.source)
+        self._cancer_types[row] = self._cancer_type_labels.encode(chunk.cancer_type)
+        self._row += 1
+
+    def close(self) -> ChunkColumns:
+        self._fp.close()
+        for array in (self._offsets, self._document_ids, self._sources, self._cancer_types):
+            array.flush()
+        return ChunkColumns(
+            document_ids=self._document_ids,
+            sources=self._sources,
+            source_labels=list(self._source_labels.codes),
+            cancer_types=self._cancer_types,
+            cancer_type_labels=list(self._cancer_type_labels.codes),
+        )
+
+
+def _normalise_rows(vectors: np.ndarray) -> None:
+    """Scale rows of *vectors* to unit length in place, a block at a time."""
+    for start in range(0, len(vectors), BLOCK_ROWS):
+        block = vectors[start : start + BLOCK_ROWS]
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        np.divide(block, norms, out=block, where=norms > 0)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the *k* highest *scores*, best first, in O(n + k log k)."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class LocalVectorIndex:
+    """A float32 embedding matrix with brute-force, quantised and graph search.
+
+    With the ``cosine`` metric rows are stored normalised, so every search is
+    an inner product.  Exact search scores all rows with one matrix-vector
+    product and selects the top-k with ``argpartition``.  An int8 copy of the
+    matrix (:meth:`quantize`) cuts the bytes scanned by 4x and its candidates
+    are re-ranked against the float32 rows.  A nearest-neighbour graph
+    (:meth:`build_graph`) answers queries with HNSW's best-first beam search
+    over a single layer, touching a small fraction of the rows.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        chunks: Sequence[LocalChunk],
+        metric: Metric = "cosine",
+        codes: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None,
+        graph: Optional[np.ndarray] = None,
+        entry_points: Sequence[int] = (),
+        columns: Optional[ChunkColumns] = None,
+    ) -> None:
+        if vectors.ndim != 2 or len(vectors) != len(chunks):
+            raise ValueError("vectors must be a (rows, dimension) matrix with one row per chunk")
+        self.vectors = vectors
+        self.chunks = chunks if isinstance(chunks, ChunkTable) else list(chunks)
+        self.metric = metric
+        self.codes = codes
+        self.scales = scales
+        self.graph = graph
+        self.entry_points = np.asarray(entry_points, dtype=np.int64)
+        self.columns = columns if columns is not None else ChunkColumns.from_chunks(self.chunks)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        chunks: Sequence[LocalChunk],
+        metric: Metric = "cosine",
+        quantize: bool = False,
+        graph_degree: int = 0,
+    ) -> "LocalVectorIndex":
+        vectors = np.array(vectors, dtype=np.float32, order="C")
+        if metric == "cosine":
+            _normalise_rows(vectors)
+        index = cls(vectors, chunks, metric)
+        if quantize:
+            index.quantize()
+        if graph_degree:
+            index.build_graph(graph_degree)
+        return index
+
+    def quantize(self) -> None:
+        """Store a per-row scaled int8 copy of the vectors."""
+        scales = np.abs(self.vectors).max(axis=1).astype(np.float32) / 127
+        safe = np.where(scales > 0, scales, 1)[:, None]
+        self.codes = np.rint(self.vectors / safe).astype(np.int8)
+        self.scales = scales
+
+    def build_graph(self, degree: int = 16) -> None:
+        """Link every row to its *degree* nearest neighbours.
+
+        The exact k-NN graph costs O(rows^2) inner products to build (a block
+        at a time), which suits the edge- and CI-sized corpora this backend is
+        meant for.  About sqrt(rows) spread-out entry points play the role of
+        HNSW's sparse upper layer: all of them are scored first, so the beam
+        starts inside the query's cluster even when clusters are not linked.
+        """
+        rows = len(self)
+        degree = min(degree, rows - 1)
+        if degree <= 0:
+            raise ValueError("a graph needs at least two rows and a positive degree")
+        graph = np.empty((rows, degree), dtype=np.int32)
+        # Bound each block's (block_rows, rows) score matrix to ~16 MiB.
+        block_rows = max(1, (1 << 22) // rows)
+        for start in range(0, rows, block_rows):
+            block = self.vectors[start : start + block_rows]
+            scores = block @ self.vectors.T
+            scores[np.arange(len(block)), np.arange(start, start + len(block))] = -np.inf
+            graph[start : start + len(block)] = np.argpartition(-scores, degree - 1, axis=1)[
+                :, :degree
+            ]
+        self.graph = graph
+        entry_points = min(rows, max(MIN_ENTRY_POINTS, int(np.sqrt(rows))))
+        self.entry_points = np.linspace(0, rows - 1, num=entry_points, dtype=np.int64)
+
+    def filter_mask(
+        self,
+        sources: Iterable[str] = (),
+        cancer_types: Iterable[str] = (),
+        document_ids: Iterable[int] = (),
+    ) -> Optional[np.ndarray]:
+        """Boolean row mask for the search filters, or ``None`` if unfiltered."""
+        return self.columns.mask(sources, cancer_types, document_ids)
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        *,
+        mask: Optional[np.ndarray] = None,
+        exact: bool = False,
+        ef: Optional[int] = None,
+    ) -> List[Hit]:
+        """Return ``(row, score)`` pairs for the *top_k* best rows."""
+        query = self._prepare_query(query)
+        if self.graph is not None and len(self.entry_points) and mask is None and not exact:
+            return self._graph_search(query, top_k, ef or DEFAULT_EF_SEARCH)
+        if self.codes is not None and not exact:
+            return self._quantised_search(query, top_k, mask)
+        scores = self._exact_scores(query)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        return self._hits(scores, top_k)
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        *,
+        mask: Optional[np.ndarray] = None,
+        exact: bool = False,
+        ef: Optional[int] = None,
+    ) -> List[List[Hit]]:
+        """Search many queries; exact scans share one matrix-matrix product."""
+        if not exact and (self.graph is not None or self.codes is not None):
+            # Graph and quantised searches are per query by nature.
+            return [self.search(query, top_k, mask=mask, ef=ef) for query in queries]
+        queries = np.stack([self._prepare_query(query) for query in queries])
+        scores = np.concatenate(
+            [
+                self.vectors[start : start + BLOCK_ROWS] @ queries.T
+                for start in range(0, len(self), BLOCK_ROWS)
+            ]
+        ).T
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        return [self._hits(row_scores, top_k) for row_scores in scores]
+
+    def _prepare_query(self, query: np.ndarray) -> np.ndarray:
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape != (self.dimension,):
+            raise ValueError(f"query has shape {query.shape}, index expects ({self.dimension},)")
+        if self.metric == "cosine":
+            norm = float(np.linalg.norm(query))
+            if norm > 0:
+                query = query / norm
+        return query
+
+    def _exact_scores(self, query: np.ndarray) -> np.ndarray:
+        return np.concatenate(
+            [
+                self.vectors[start : start + BLOCK_ROWS] @ query
+                for start in range(0, len(self), BLOCK_ROWS)
+            ]
+        )
+
+    def _quantised_search(
+        self, query: np.ndarray, top_k: int, mask: Optional[np.ndarray]
+    ) -> List[Hit]:
+        step = QUANTISED_BLOCK_ROWS
+        approximate = np.concatenate(
+            [
+                (self.codes[start : start + step] @ query) * self.scales[start : start + step]
+                for start in range(0, len(self), step)
+            ]
+        )
+        if mask is not None:
+            approximate = np.where(mask, approximate, -np.inf)
+        candidates = _top_k(approximate, top_k * RERANK_FACTOR)
+        # Sorted row order keeps the re-rank reads sequential in the mmap.
+        candidates = np.sort(candidates[np.isfinite(approximate[candidates])])
+        exact = self.vectors[candidates] @ query
+        order = _top_k(exact, top_k)
+        return [(int(row), float(score)) for row, score in zip(candidates[order], exact[order])]
+
+    def _graph_search(self, query: np.ndarray, top_k: int, ef: int) -> List[Hit]:
+        ef = max(ef, top_k)
+        visited = np.zeros(len(self), dtype=bool)
+        entry = self.entry_points
+        visited[entry] = True
+        entry_scores = self.vectors[entry] @ query
+        # Max-heap of frontier nodes and min-heap of the best *ef* found so far.
+        frontier = [(-score, int(row)) for row, score in zip(entry, entry_scores)]
+        heapq.heapify(frontier)
+        best = [(score, int(row)) for row, score in zip(entry, entry_scores)]
+        heapq.heapify(best)
+        while len(best) > ef:
+            heapq.heappop(best)
+
+        while frontier:
+            negative, row = heapq.heappop(frontier)
+            if len(best) >= ef and -negative < best[0][0]:
+                break
+            neighbours = self.graph[row]
+            neighbours = neighbours[~visited[neighbours]]
+            if not len(neighbours):
+                continue
+            visited[neighbours] = True
+            for neighbour, score in zip(neighbours, self.vectors[neighbours] @ query):
+                if len(best) < ef or score > best[0][0]:
+                    heapq.heappush(frontier, (-score, int(neighbour)))
+                    heapq.heappush(best, (score, int(neighbour)))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+
+        ranked = sorted(best, reverse=True)[:top_k]
+        return [(row, float(score)) for score, row in ranked]
+
+    def _hits(self, scores: np.ndarray, top_k: int) -> List[Hit]:
+        rows = _top_k(scores, top_k)
+        return [(int(row), float(scores[row])) for row in rows if np.isfinite(scores[row])]
+
+    def save(self, path: Path | str) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / VECTORS, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        self._save_chunks(path)
+        self.save_parts(path, quantized=True, graph=True)
+
+    def _save_chunks(self, path: Path) -> None:
+        writer = _ChunkWriter(path, len(self.chunks))
+        for chunk in self.chunks:
+            writer.write(chunk)
+        writer.close()
+
+    def save_parts(self, path: Path | str, quantized: bool = False, graph: bool = False) -> None:
+        """Write the quantised copy and/or graph next to the vectors.
+
+        Only the named parts are rewritten, so parts memory-mapped from the
+        same snapshot are never truncated underneath the index.
+        """
+        path = Path(path)
+        if not (path / CHUNK_OFFSETS).exists():
+            # A version 1 snapshot: its chunks were parsed into memory on load.
+            self._save_chunks(path)
+        if quantized and self.codes is not None:
+            np.save(path / CODES, self.codes)
+            np.save(path / SCALES, self.scales)
+        if graph and self.graph is not None:
+            np.save(path / GRAPH, self.graph)
+        _write_manifest(
+            path,
+            rows=len(self),
+            dimension=self.dimension,
+            metric=self.metric,
+            quantized=self.codes is not None,
+            graph=self.graph is not None,
+            entry_points=self.entry_points.tolist(),
+            **self.columns.labels(),
+        )
+
+    @classmethod
+    def load(cls, path: Path | str, mmap: bool = True) -> "LocalVectorIndex":
+        """Open a snapshot; files are memory-mapped read-only by default."""
+        path = Path(path)
+        manifest = json.loads((path / MANIFEST).read_text(encoding="utf-8"))
+        if manifest.get("version") not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported local index snapshot version in {path}")
+        mode = "r" if mmap else None
+
+        def array(name: str, present: bool = True) -> Optional[np.ndarray]:
+            return np.load(path / name, mmap_mode=mode) if present else None
+
+        if manifest["version"] == 1:
+            with (path / CHUNKS).open(encoding="utf-8") as fp:
+                chunks: Sequence[LocalChunk] = [LocalChunk(**json.loads(line)) for line in fp]
+            columns = None
+        else:
+            chunks = ChunkTable.open(path / CHUNKS, array(CHUNK_OFFSETS), mmap_file=mmap)
+            columns = ChunkColumns.load(path, manifest, mode)
+        return cls(
+            vectors=array(VECTORS),
+            chunks=chunks,
+            metric=manifest["metric"],
+            codes=array(CODES, manifest["quantized"]),
+            scales=array(SCALES, manifest["quantized"]),
+            graph=array(GRAPH, manifest["graph"]),
+            entry_points=manifest.get("entry_points", ()),
+            columns=columns,
+        )
+
+
+def _write_manifest(path: Path, **fields: object) -> None:
+    manifest = {"version": SNAPSHOT_VERSION, **fields}
+    (path / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+async def export_snapshot(engine: AsyncEngine, path: Path | str, metric: Metric = "cosine") -> int:
+    """Stream ``chunks`` into a snapshot directory at *path*.
+
+    Vectors are written straight into a memory-mapped ``.npy`` file, so the
+    export runs in constant memory.  Returns the number of rows exported.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    async with engine.connect() as conn:
+        # One snapshot for the count and the rows, even under concurrent ingestion.
+        conn = await conn.execution_options(isolation_level="REPEATABLE READ")
+        async with conn.begin():
+            rows = (
+                await conn.execute(
+                    text("SELECT count(*) FROM chunks WHERE embedding IS NOT NULL")
+                )
+            ).scalar_one()
+            dimension = (
+                await conn.execute(
+                    text(
+                        "SELECT vector_dims(embedding) FROM chunks "
+                        "WHERE embedding IS NOT NULL LIMIT 1"
+                    )
+                )
+            ).scalar()
+            if not rows or dimension is None:
+                raise RuntimeError("the chunks table has no embedded rows to export")
+
+            vectors = np.lib.format.open_memmap(
+                path / VECTORS, mode="w+", dtype=np.float32, shape=(rows, dimension)
+            )
+            result = await conn.stream(text(EXPORT_SQL))
+            writer = _ChunkWriter(path, rows)
+            row_index = 0
+            async for row in result:
+                vectors[row_index] = np.array(row.embedding[1:-1].split(","), dtype=np.float32)
+                writer.write(
+                    LocalChunk(
+                        chunk_id=row.chunk_id,
+                        text=row.chunk_text,
+                        document_id=row.document_id,
+                        title=row.document_title,
+                        source=row.document_source,
+                        cancer_type=row.cancer_type,
+                    )
+                )
+                row_index += 1
+            columns = writer.close()
+
+    if metric == "cosine":
+        _normalise_rows(vectors)
+    vectors.flush()
+    _write_manifest(
+        path,
+        rows=rows,
+        dimension=dimension,
+        metric=metric,
+        quantized=False,
+        graph=False,
+        entry_points=[],
+        **columns.labels(),
+    )
+    return rows
+
+
+class LocalSearchService:
+    """:class:`SearchService` answering queries from a :class:`LocalVectorIndex`.
+
+    ``exact`` forces a full scan, ``ef_search`` widens the graph search and
+    the filters mask rows before ranking.  There is no full-text index, so
+    hybrid requests are answered by vector ranking alone.  ``quantization``
+    names pgvector columns and is ignored here.
+    """
+
+    def __init__(self, index: LocalVectorIndex, embedder: EmbeddingClient) -> None:
+        if index.dimension != embedder.dimensions:
+            raise ValueError(
+                f"Local index has dimension {index.dimension}, "
+                f"embedder produces {embedder.dimensions}"
+            )
+        self._index = index
+        self._embedder = embedder
+
+    async def search(
+        self, query: str, top_k: int, *, options: Optional[SearchOptions] = None
+    ) -> List[ChunkMatch]:
+        options = options or DEFAULT_SEARCH_OPTIONS
+        with span("search.embed"):
+            query_vector = np.asarray(await self._embedder.embed(query), dtype=np.float32)
+        with span("search.query"):
+            # numpy releases the GIL, so other requests run while this scans.
+            hits = await asyncio.to_thread(self._search, query_vector, top_k, options)
+        with span("search.rows"):
+            return self._matches(hits)
+
+    async def search_many(
+        self, queries: Sequence[str], top_k: int, *, options: Optional[SearchOptions] = None
+    ) -> BatchSearchResult:
+        options = options or DEFAULT_SEARCH_OPTIONS
+        started = time.perf_counter()
+        vectors = await asyncio.to_thread(self._embedder.embed_batch, list(queries))
+        embedding_ms = (time.perf_counter() - started) * 1000
+
+        search_started = time.perf_counter()
+        hits = await asyncio.to_thread(self._search_batch, vectors, top_k, options)
+        elapsed_ms = (time.perf_counter() - search_started) * 1000
+        return BatchSearchResult(
+            results=[
+                QueryResult(query, self._matches(query_hits), elapsed_ms)
+                for query, query_hits in zip(queries, hits)
+            ],
+            embedding_ms=embedding_ms,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def _search(self, query: np.ndarray, top_k: int, options: SearchOptions) -> List[Hit]:
+        return self._index.search(
+            query, top_k, mask=self._mask(options), exact=options.exact, ef=options.ef_search
+        )
+
+    def _search_batch(
+        self, queries: np.ndarray, top_k: int, options: SearchOptions
+    ) -> List[List[Hit]]:
+        return self._index.search_batch(
+            queries, top_k, mask=self._mask(options), exact=options.exact, ef=options.ef_search
+        )
+
+    def _mask(self, options: SearchOptions) -> Optional[np.ndarray]:
+        if not options.filtered:
+            return None
+        return self._index.filter_mask(options.sources, options.cancer_types, options.document_ids)
+
+    def _matches(self, hits: Iterable[Hit]) -> List[ChunkMatch]:
+        return [self._index.chunks[row].to_match(score) for row, score in hits]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build local vector index snapshots")
+    parser.add_argument("action", choices=("export", "build"))
+    parser.add_argument("path", help="Snapshot directory")
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--metric", choices=("cosine", "ip"), default="cosine")
+    parser.add_argument("--quantize", action="store_true", help="Add an int8 copy of the vectors")
+    parser.add_argument(
+        "--graph-degree", type=int, default=0, help="Neighbours per row in the ANN graph (0: none)"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    if args.action == "export":
+        if not args.db_url:
+            raise SystemExit("--db-url or DATABASE_URL is required to export")
+
+        async def run() -> int:
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            engine = create_async_engine(args.db_url)
+            try:
+                return await export_snapshot(engine, args.path, args.metric)
+            finally:
+                await engine.dispose()
+
+        print(f"exported {asyncio.run(run())} chunk(s) to {args.path}")
+
+    index = LocalVectorIndex.load(args.path)
+    if args.quantize:
+        index.quantize()
+    if args.graph_degree:
+        index.build_graph(args.graph_degree)
+    index.save_parts(args.path, quantized=args.quantize, graph=bool(args.graph_degree))
+    print(
+        f"{args.path}: {len(index)} rows, quantized={index.codes is not None}, "
+        f"graph={index.graph is not None}"
+    )
+
+
+if __name__ == "__main__":
+    main()
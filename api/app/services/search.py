@@ -2,16 +2,340 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable, List, Protocol
-
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+from dataclasses import dataclass, replace
+from functools import lru_cache, partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+)
 
+from ..metrics import span
 from .embedding import EmbeddingClient
+from .index import (
+    DEFAULT_DIMENSION,
+    LEXICAL_COLUMN,
+    LEXICAL_CONFIG,
+    QUANTIZATIONS,
+    search_settings_sql,
+)
+
+if TYPE_CHECKING:
+    from sqlalchemy import TextClause
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+SearchMode = Literal["vector", "hybrid"]
+
+# Rank offset of reciprocal rank fusion; 60 is the value from the original
+# RRF paper and keeps a single list from dominating the fused ranking.
+RRF_K = 60
+# Each hybrid leg fetches this many candidates per requested result.
+HYBRID_CANDIDATE_FACTOR = 4
+MIN_HYBRID_CANDIDATES = 20
+# Quantized searches re-rank this many candidates per result on the
+# full-precision vectors.
+QUANTIZED_RERANK_FACTOR = 4
+
+_VECTOR_SIMILARITY = "1 - (c.embedding <#> :query_vector)"
+_TSQUERY = f"websearch_to_tsquery('{LEXICAL_CONFIG}', :query_text)"
+# Quantized columns are only added on request (``index quantize``), so a
+# search checks that its column exists before referencing it.
+_QUANTIZED_COLUMNS_SQL = """
+    SELECT column_name
+    FROM information_schema.columns
+    WHERE table_schema = current_schema()
+        AND table_name = 'chunks'
+        AND column_name = ANY(CAST(:columns AS text[]))
+"""
+_created_quantized_columns: Set[str] = set()
+
+
+def text(statement: str) -> TextClause:
+    """``sqlalchemy.text``, imported on first use to keep it off the import path.
+
+    Statements are built once per variant (and during start-up warm-up), so
+    the local search backend never loads SQLAlchemy at all.
+    """
+    from sqlalchemy import text as sql_text
+
+    return sql_text(statement)
+
+
+class QuantizationUnavailable(ValueError):
+    """A search asked for a quantized column that has not been created."""
+
+
+async def require_quantized_column(session: AsyncSession, quantization: str) -> None:
+    """Raise :class:`QuantizationUnavailable` unless *quantization*'s column exists.
+
+    Columns found once are remembered for the life of the process; missing
+    ones are looked up again, so a column added while the API runs is used
+    without a restart.
+    """
+    column = QUANTIZATIONS[quantization].column
+    if column in _created_quantized_columns:
+        return
+    result = await session.execute(
+        text(_QUANTIZED_COLUMNS_SQL),
+        {"columns": [candidate.column for candidate in QUANTIZATIONS.values()]},
+    )
+    _created_quantized_columns.update(row[0] for row in result)
+    if column not in _created_quantized_columns:
+        raise QuantizationUnavailable(
+            f"{quantization} search needs the {column} column; add it with "
+            f"`python -m api.app.services.index quantize --quantization {quantization}`"
+        )
+
+
+# Document fields come from their copies on each chunk (see api.app.storage),
+# so no statement joins documents.
+def _search_columns(similarity: str = _VECTOR_SIMILARITY) -> str:
+    return f"""
+        c.id AS chunk_id,
+        c.body AS chunk_text,
+        c.document_id AS document_id,
+        c.document_title AS document_title,
+        c.source AS document_source,
+        c.cancer_type AS cancer_type,
+        {similarity} AS similarity"""
+
+
+_SEARCH_COLUMNS = _search_columns()
+
+
+def _filter_conditions(sources: bool, cancer_types: bool, document_ids: bool) -> List[str]:
+    conditions = []
+    if sources:
+        conditions.append("c.source = ANY(:sources)")
+    if cancer_types:
+        conditions.append("c.cancer_type = ANY(:cancer_types)")
+    if document_ids:
+        conditions.append("c.document_id = ANY(:document_ids)")
+    return conditions
+
+
+@lru_cache(maxsize=None)
+def _search_statement(
+    sources: bool = False,
+    cancer_types: bool = False,
+    document_ids: bool = False,
+) -> TextClause:
+    """Return the search statement for one combination of filters.
+
+    Each variant is built once so SQLAlchemy's compiled cache and the driver's
+    per-connection prepared statement cache see the same statement every
+    time.  Filters are pushed into the query (backed by b-tree indexes on the
+    filter columns) instead of trimming an unfiltered top-k afterwards.
+    """
+
+    conditions = _filter_conditions(sources, cancer_types, document_ids)
+    if not conditions:
+        return text(
+            f"""
+            SELECT {_SEARCH_COLUMNS}
+            FROM chunks c
+            ORDER BY c.embedding <-> :query_vector
+            LIMIT :top_k
+            """
+        )
+
+    # Filtered ANN scans run with iterative index scans in relaxed order, so
+    # the outer query restores exact distance ordering of the candidates.
+    return text(
+        f"""
+        WITH candidates AS MATERIALIZED (
+            SELECT {_SEARCH_COLUMNS},
+                c.embedding <-> :query_vector AS distance
+            FROM chunks c
+            WHERE {" AND ".join(conditions)}
+            ORDER BY c.embedding <-> :query_vector
+            LIMIT :top_k
+        )
+        SELECT * FROM candidates ORDER BY distance
+        """
+    )
+
+
+def _quantized_leg(
+    query_vector: str, quantization: str, dimension: int, conditions: List[str]
+) -> str:
+    candidates_from = "FROM chunks c"
+    if conditions:
+        candidates_from += f"""
+                WHERE {" AND ".join(conditions)}"""
+    order_by = QUANTIZATIONS[quantization].order_by(query_vector, dimension)
+    # Re-ranking orders the derived table rather than chunks, so the
+    # planner cannot answer it from the full-precision index instead.
+    return f"""
+            SELECT {_search_columns(f"1 - (c.embedding <#> {query_vector})")},
+                c.embedding <-> {query_vector} AS distance
+            FROM (
+                SELECT c.*
+                {candidates_from}
+                ORDER BY {order_by}
+                LIMIT :candidates
+            ) AS c
+            ORDER BY distance
+            LIMIT :top_k"""
+
+
+@lru_cache(maxsize=None)
+def _quantized_statement(
+    quantization: str,
+    dimension: int = DEFAULT_DIMENSION,
+    sources: bool = False,
+    cancer_types: bool = False,
+    document_ids: bool = False,
+) -> TextClause:
+    """Return a statement searching a quantized column, then re-ranking exactly.
+
+    The inner query walks the small quantized index for ``:candidates`` rows;
+    only those rows have their full-precision vectors read to produce the
+    final, exactly ordered ``:top_k``.
+    """
+
+    conditions = _filter_conditions(sources, cancer_types, document_ids)
+    return text(_quantized_leg(":query_vector", quantization, dimension, conditions))
+
+
+_BATCH_QUERIES = """
+        WITH queries AS (
+            SELECT q.ordinal, CAST(q.vector AS vector) AS query_vector
+            FROM unnest(CAST(:ordinals AS integer[]), CAST(:query_vectors AS text[]))
+                AS q(ordinal, vector)
+        )"""
+
+
+@lru_cache(maxsize=None)
+def _batch_quantized_statement(
+    quantization: str,
+    dimension: int = DEFAULT_DIMENSION,
+    sources: bool = False,
+    cancer_types: bool = False,
+    document_ids: bool = False,
+) -> TextClause:
+    """Multi-query variant of :func:`_quantized_statement`."""
+
+    conditions = _filter_conditions(sources, cancer_types, document_ids)
+    leg = _quantized_leg("q.query_vector", quantization, dimension, conditions)
+    return text(
+        f"""{_BATCH_QUERIES}
+        SELECT q.ordinal, m.*
+        FROM queries q
+        CROSS JOIN LATERAL ({leg}
+        ) m
+        ORDER BY q.ordinal, m.distance
+        """
+    )
+
+
+@lru_cache(maxsize=None)
+def _batch_search_statement(
+    sources: bool = False,
+    cancer_types: bool = False,
+    document_ids: bool = False,
+) -> TextClause:
+    """Return a statement answering many queries in one round trip.
+
+    Query vectors arrive as parallel ``ordinals``/``query_vectors`` arrays and
+    each one drives its own index-ordered scan through ``LATERAL``, so the
+    per-query plan is the same as :func:`_search_statement`.
+    """
+
+    conditions = _filter_conditions(sources, cancer_types, document_ids)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return text(
+        f"""{_BATCH_QUERIES}
+        SELECT q.ordinal, m.*
+        FROM queries q
+        CROSS JOIN LATERAL (
+            SELECT {_search_columns("1 - (c.embedding <#> q.query_vector)")},
+                c.embedding <-> q.query_vector AS distance
+            FROM chunks c
+            {where}
+            ORDER BY c.embedding <-> q.query_vector
+            LIMIT :top_k
+        ) m
+        ORDER BY q.ordinal, m.distance
+        """
+    )
+
 
+@lru_cache(maxsize=None)
+def _lexical_statement(
+    sources: bool = False,
+    cancer_types: bool = False,
+    document_ids: bool = False,
+) -> TextClause:
+    """Return the full-text candidate statement for one combination of filters.
 
-@dataclass
+    Matches go through the GIN index on the chunk ``tsvector`` column and are
+    ranked with ``ts_rank_cd``, which rewards query terms appearing close
+    together.
+    """
+
+    conditions = [f"c.{LEXICAL_COLUMN} @@ query"]
+    conditions += _filter_conditions(sources, cancer_types, document_ids)
+    return text(
+        f"""
+        SELECT {_search_columns(f"ts_rank_cd(c.{LEXICAL_COLUMN}, query)")}
+        FROM chunks c
+        CROSS JOIN {_TSQUERY} AS query
+        WHERE {" AND ".join(conditions)}
+        ORDER BY similarity DESC
+        LIMIT :top_k
+        """
+    )
+
+
+@lru_cache(maxsize=None)
+def _batch_lexical_statement(
+    sources: bool = False,
+    cancer_types: bool = False,
+    document_ids: bool = False,
+) -> TextClause:
+    """Multi-query variant of :func:`_lexical_statement`."""
+
+    conditions = [f"c.{LEXICAL_COLUMN} @@ q.query"]
+    conditions += _filter_conditions(sources, cancer_types, document_ids)
+    return text(
+        f"""
+        WITH queries AS (
+            SELECT q.ordinal, websearch_to_tsquery('{LEXICAL_CONFIG}', q.query_text) AS query
+            FROM unnest(CAST(:ordinals AS integer[]), CAST(:query_texts AS text[]))
+                AS q(ordinal, query_text)
+        )
+        SELECT q.ordinal, m.*
+        FROM queries q
+        CROSS JOIN LATERAL (
+            SELECT {_search_columns(f"ts_rank_cd(c.{LEXICAL_COLUMN}, q.query)")}
+            FROM chunks c
+            WHERE {" AND ".join(conditions)}
+            ORDER BY similarity DESC
+            LIMIT :top_k
+        ) m
+        ORDER BY q.ordinal, m.similarity DESC
+        """
+    )
+
+
+def vector_literal(values: Sequence[float]) -> str:
+    """Format a vector as pgvector text, exact for float32 components."""
+
+    return "[" + ",".join(format(float(value), ".9g") for value in values) + "]"
+
+
+@dataclass(slots=True)
 class DocumentRef:
     id: int
     title: str
@@ -19,7 +343,7 @@ class DocumentRef:
     cancer_type: str | None
 
 
-@dataclass
+@dataclass(slots=True)
 class ChunkMatch:
     chunk_id: int
     text: str
@@ -27,57 +351,224 @@ class ChunkMatch:
     document: DocumentRef
 
 
+@dataclass(frozen=True)
+class SearchOptions:
+    """Per-request knobs trading recall against latency.
+
+    ``exact`` bypasses the ANN index entirely; ``ef_search`` (HNSW) and
+    ``probes`` (IVFFlat) widen the index search when set.  ``sources``,
+    ``cancer_types`` and ``document_ids`` restrict the candidates in SQL so a
+    filtered search still returns a full ``top_k``.  ``mode="hybrid"`` adds a
+    full-text candidate list and fuses both rankings with reciprocal rank
+    fusion, weighting each list by ``vector_weight`` and ``lexical_weight``.
+    ``quantization`` (``halfvec`` or ``bit``) takes candidates from the
+    quantized column's index and re-ranks them on the full vectors; ``exact``
+    overrides it.
+    """
+
+    exact: bool = False
+    ef_search: Optional[int] = None
+    probes: Optional[int] = None
+    sources: Tuple[str, ...] = ()
+    cancer_types: Tuple[str, ...] = ()
+    document_ids: Tuple[int, ...] = ()
+    mode: SearchMode = "vector"
+    vector_weight: float = 1.0
+    lexical_weight: float = 1.0
+    quantization: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.quantization is not None and self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {self.quantization}")
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.sources or self.cancer_types or self.document_ids)
+
+    @property
+    def hybrid(self) -> bool:
+        return self.mode == "hybrid"
+
+    @property
+    def quantized(self) -> bool:
+        return self.quantization is not None and not self.exact
+
+    def candidates(self, top_k: int) -> int:
+        """Number of results each leg of a hybrid search should return."""
+
+        if not self.hybrid:
+            return top_k
+        return max(top_k * HYBRID_CANDIDATE_FACTOR, MIN_HYBRID_CANDIDATES)
+
+    def fuse(
+        self, vector: List[ChunkMatch], lexical: List[ChunkMatch], top_k: int
+    ) -> List[ChunkMatch]:
+        return reciprocal_rank_fusion(
+            [vector, lexical], [self.vector_weight, self.lexical_weight]
+        )[:top_k]
+
+    def settings_sql(self) -> Optional[str]:
+        return search_settings_sql(
+            exact=self.exact,
+            ef_search=self.ef_search,
+            probes=self.probes,
+            iterative_scan=self.filtered and not self.exact,
+        )
+
+    def vector_params(self, top_k: int) -> Dict[str, Any]:
+        """Row limits and filter values for the vector statement."""
+
+        params: Dict[str, Any] = {"top_k": top_k}
+        if self.quantized:
+            params["candidates"] = top_k * QUANTIZED_RERANK_FACTOR
+        params.update(self.filter_params())
+        return params
+
+    def filter_params(self) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        if self.sources:
+            params["sources"] = list(self.sources)
+        if self.cancer_types:
+            params["cancer_types"] = list(self.cancer_types)
+        if self.document_ids:
+            params["document_ids"] = list(self.document_ids)
+        return params
+
+    def statement(
+        self, batch: bool = False, lexical: bool = False, dimension: int = DEFAULT_DIMENSION
+    ) -> TextClause:
+        if lexical:
+            build = _batch_lexical_statement if batch else _lexical_statement
+        elif self.quantized:
+            build = partial(
+                _batch_quantized_statement if batch else _quantized_statement,
+                self.quantization,
+                dimension,
+            )
+        else:
+            build = _batch_search_statement if batch else _search_statement
+        return build(
+            sources=bool(self.sources),
+            cancer_types=bool(self.cancer_types),
+            document_ids=bool(self.document_ids),
+        )
+
+
+DEFAULT_SEARCH_OPTIONS = SearchOptions()
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[ChunkMatch]],
+    weights: Sequence[float],
+    k: int = RRF_K,
+) -> List[ChunkMatch]:
+    """Merge ranked lists, scoring each chunk by ``sum(weight / (k + rank))``.
+
+    Only ranks are used, so cosine similarities and ``ts_rank_cd`` scores,
+    which live on unrelated scales, never need to be normalised against each
+    other.  Returned matches carry their fused score.
+    """
+
+    scores: Dict[int, float] = {}
+    matches: Dict[int, ChunkMatch] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, match in enumerate(ranking, start=1):
+            scores[match.chunk_id] = scores.get(match.chunk_id, 0.0) + weight / (k + rank)
+            matches.setdefault(match.chunk_id, match)
+    ordered = sorted(scores, key=lambda chunk_id: scores[chunk_id], reverse=True)
+    return [replace(matches[chunk_id], score=scores[chunk_id]) for chunk_id in ordered]
+
+
 class SearchService(Protocol):
-    async def search(self, query: str, top_k: int) -> Iterable[ChunkMatch]:
+    async def search(
+        self, query: str, top_k: int, *, options: Optional[SearchOptions] = None
+    ) -> Iterable[ChunkMatch]:
         """Search for the top matching knowledge chunks."""
 
 
 class PgVectorSearchService:
-    """Execute approximate nearest neighbour queries using pgvector."""
+    """Execute approximate nearest neighbour queries using pgvector.
+
+    Hybrid searches run the full-text leg on a second session from
+    *session_factory* while the query is embedded and the ANN leg runs, so
+    they cost roughly the slower of the two queries rather than their sum.
+    Without a factory both legs share the request session in turn.
+    """
 
-    def __init__(self, session: AsyncSession, embedder: EmbeddingClient) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        embedder: EmbeddingClient,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+    ) -> None:
         self._session = session
         self._embedder = embedder
+        self._session_factory = session_factory
 
-    async def search(self, query: str, top_k: int) -> List[ChunkMatch]:
-        query_vector = await self._embedder.embed(query)
-        statement = text(
-            """
-            SELECT
-                c.id AS chunk_id,
-                c.body AS chunk_text,
-                c.source AS chunk_source,
-                c.document_id AS document_id,
-                d.title AS document_title,
-                d.source AS document_source,
-                d.cancer_type AS cancer_type,
-                1 - (c.embedding <#> :query_vector) AS similarity
-            FROM knowledge_chunks c
-            JOIN documents d ON d.id = c.document_id
-            ORDER BY c.embedding <-> :query_vector
-            LIMIT :top_k
-            """
-        )
-
-        result = await self._session.execute(
-            statement,
-            {"query_vector": query_vector, "top_k": top_k},
-        )
+    async def search(
+        self, query: str, top_k: int, *, options: Optional[SearchOptions] = None
+    ) -> List[ChunkMatch]:
+        options = options or DEFAULT_SEARCH_OPTIONS
+        if not options.hybrid:
+            return await self._vector_search(query, top_k, options)
 
-        matches: List[ChunkMatch] = []
-        for row in result:
-            matches.append(
-                ChunkMatch(
-                    chunk_id=row.chunk_id,
-                    text=row.chunk_text,
-                    score=float(row.similarity),
-                    document=DocumentRef(
-                        id=row.document_id,
-                        title=row.document_title,
-                        source=row.document_source,
-                        cancer_type=row.cancer_type,
-                    ),
+        candidates = options.candidates(top_k)
+        if self._session_factory is None:
+            vector = await self._vector_search(query, candidates, options)
+            lexical = await self._lexical_search(self._session, query, candidates, options)
+        else:
+            async with self._session_factory() as lexical_session:
+                vector, lexical = await asyncio.gather(
+                    self._vector_search(query, candidates, options),
+                    self._lexical_search(lexical_session, query, candidates, options),
                 )
-            )
+        with span("search.fuse"):
+            return options.fuse(vector, lexical, top_k)
+
+    async def _vector_search(
+        self, query: str, top_k: int, options: SearchOptions
+    ) -> List[ChunkMatch]:
+        with span("search.embed"):
+            query_vector = await self._embedder.embed(query)
+        with span("search.connect"):
+            # Checking out the pooled connection is timed apart from the query.
+            await self._session.connection()
+
+        with span("search.query"):
+            if options.quantized:
+                await require_quantized_column(self._session, options.quantization)
+            settings = options.settings_sql()
+            if settings is not None:
+                # Transaction-local, so pooled connections are not affected.
+                await self._session.execute(text(settings))
+
+            params: Dict[str, Any] = {"query_vector": query_vector}
+            params.update(options.vector_params(top_k))
+            statement = options.statement(dimension=self._embedder.dimensions)
+            result = await self._session.execute(statement, params)
+        with span("search.rows"):
+            return [to_match(row) for row in result]
+
+    async def _lexical_search(
+        self, session: AsyncSession, query: str, top_k: int, options: SearchOptions
+    ) -> List[ChunkMatch]:
+        params: Dict[str, Any] = {"query_text": query, "top_k": top_k}
+        params.update(options.filter_params())
+        with span("search.lexical_query"):
+            result = await session.execute(options.statement(lexical=True), params)
+        with span("search.rows"):
+            return [to_match(row) for row in result]
+
 
-        return matches
+def to_match(row: Any) -> ChunkMatch:
+    return ChunkMatch(
+        chunk_id=row.chunk_id,
+        text=row.chunk_text,
+        score=float(row.similarity),
+        document=DocumentRef(
+            id=row.document_id,
+            title=row.document_title,
+            source=row.document_source,
+            cancer_type=row.cancer_type,
+        ),
+    )
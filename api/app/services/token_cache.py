@@ -0,0 +1,135 @@
+"""Bounded memoisation of token hashes shared by the embedders."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Union
+
+TOKEN_CACHE_SIZE_ENV = "EMBEDDING_TOKEN_CACHE_SIZE"
+DEFAULT_TOKEN_CACHE_SIZE = 100_000
+
+
+def token_hash(token: str) -> int:
+    """Return the 32-bit hash used to place *token* in an embedding bucket.
+
+    The value is independent of the embedding dimensionality so a single
+    cache can serve embedders of different sizes; callers reduce it modulo
+    their dimension.
+    """
+
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big")
+
+
+@dataclass(frozen=True)
+class TokenCacheStats:
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TokenHashCache:
+    """Thread-safe LRU cache mapping tokens to their :func:`token_hash`.
+
+    Clinical text reuses a small vocabulary (drug names, biomarkers, staging
+    terms), so most lookups hit and skip SHA-256 entirely.  Once *maxsize*
+    tokens are cached the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_TOKEN_CACHE_SIZE) -> None:
+        if maxsize <= 0:
+            raise ValueError("Token cache size must be positive")
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, token: object) -> bool:
+        return token in self._entries
+
+    def lookup(self, token: str) -> int:
+        """Return the hash for *token*, computing and caching it on a miss."""
+
+        with self._lock:
+            value = self._entries.get(token)
+            if value is not None:
+                self._entries.move_to_end(token)
+                self._hits += 1
+                return value
+            self._misses += 1
+
+        value = token_hash(token)
+        self._store(token, value)
+        return value
+
+    def warm(self, tokens: Iterable[str]) -> int:
+        """Preload *tokens* without touching the hit/miss counters.
+
+        Returns the number of tokens added to the cache.
+        """
+
+        added = 0
+        for token in tokens:
+            if token not in self._entries:
+                self._store(token, token_hash(token))
+                added += 1
+        return added
+
+    def load_vocabulary(self, path: Union[str, Path]) -> int:
+        """Warm the cache from a whitespace separated vocabulary file.
+
+        Tokens are lower-cased the same way :class:`EmbeddingClient` tokenises
+        text, so the preloaded entries are the ones queries will look up.
+        """
+
+        with Path(path).open(encoding="utf-8") as fp:
+            return self.warm(token for line in fp for token in line.lower().split())
+
+    def stats(self) -> TokenCacheStats:
+        with self._lock:
+            return TokenCacheStats(
+                size=len(self._entries),
+                maxsize=self._maxsize,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def _store(self, token: str, value: int) -> None:
+        with self._lock:
+            self._entries[token] = value
+            self._entries.move_to_end(token)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+
+@lru_cache
+def shared_token_cache() -> TokenHashCache:
+    """Process wide cache used by every embedder unless one is injected."""
+
+    size = int(os.getenv(TOKEN_CACHE_SIZE_ENV, DEFAULT_TOKEN_CACHE_SIZE))
+    return TokenHashCache(maxsize=size)
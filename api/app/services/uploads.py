@@ -0,0 +1,83 @@
+"""Streaming storage of uploaded files."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+DEFAULT_MAX_UPLOAD_BYTES = 200 * 2**20
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the per-file size limit."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"File exceeds the {limit:,} byte upload limit")
+        self.limit = limit
+
+
+@dataclass
+class StoredUpload:
+    """An upload written to a temporary file next to its final location."""
+
+    path: Path
+    sha256: str
+    size: int
+
+    def keep(self, target: Path) -> Path:
+        os.replace(self.path, target)
+        self.path = target
+        return target
+
+    def discard(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            self.path.unlink()
+
+
+async def store_upload(
+    source: BinaryIO,
+    directory: Path,
+    max_bytes: int = DEFAULT_MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> StoredUpload:
+    """Copy *source* into *directory*, hashing it on the way.
+
+    The copy runs on a worker thread, one *chunk_size* block at a time, so
+    memory per upload stays constant and the event loop keeps serving
+    other requests however large the file is.  The file is kept under a
+    temporary name because its final name depends on the content hash; see
+    :meth:`StoredUpload.keep`.  Raises :class:`UploadTooLarge` once more
+    than *max_bytes* have been read, leaving nothing behind.
+    """
+    return await asyncio.to_thread(_copy, source, directory, max_bytes, chunk_size)
+
+
+def _copy(source: BinaryIO, directory: Path, max_bytes: int, chunk_size: int) -> StoredUpload:
+    digest = hashlib.sha256()
+    size = 0
+    fd, name = tempfile.mkstemp(dir=directory, suffix=".upload")
+    stored = StoredUpload(Path(name), "", 0)
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            while True:
+                block = source.read(chunk_size)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(block)
+                fp.write(block)
+    except BaseException:
+        stored.discard()
+        raise
+    stored.sha256 = digest.hexdigest()
+    stored.size = size
+    return stored
@@ -0,0 +1,299 @@
+"""Storage layout shared by ingestion and search, and its migrations.
+
+Ingestion writes and the search service reads the same two tables:
+
+``documents``
+    One row per ingested file, keyed by ``path``, with the title, source
+    and cancer type it is catalogued under.
+``chunks``
+    Embedded chunks.  ``chunk_key`` is ingestion's stable uuid5 chunk id;
+    ``document_title``, ``source`` and ``cancer_type`` are copies of the
+    document's fields, kept in step by a trigger, so ranking and filtering
+    read ``chunks`` alone.
+``corpus_generation``
+    A single counter every transaction that writes ``chunks`` bumps right
+    before committing, so every API worker can tell when its cached search
+    results are stale.
+
+The schema is created and evolved by the numbered scripts in
+``db/migrations``.  Each script records its own version in
+``schema_migrations``, so the Postgres image's initdb hook can run them as
+well.  Apply pending ones with::
+
+    python -m api.app.storage migrate
+    python -m api.app.storage status
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Set
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "db" / "migrations"
+MIGRATIONS_TABLE = "schema_migrations"
+# Key of the transaction-level advisory lock that serialises migrators.
+MIGRATION_LOCK_KEY = 7_210_540_117
+
+DOCUMENTS_TABLE = "documents"
+CHUNKS_TABLE = "chunks"
+EMBEDDING_DIMENSION = 1536
+# Generated tsvector column and text search configuration used by hybrid
+# search; queries must use the same configuration to hit the GIN index.
+LEXICAL_COLUMN = "body_tsv"
+LEXICAL_CONFIG = "english"
+DEFAULT_SOURCE = "internal"
+CORPUS_GENERATION_TABLE = "corpus_generation"
+CORPUS_GENERATION_SQL = f"SELECT generation FROM {CORPUS_GENERATION_TABLE}"
+# Run once per writing transaction, last before commit, to keep the row lock short.
+BUMP_CORPUS_GENERATION_SQL = (
+    f"UPDATE {CORPUS_GENERATION_TABLE} SET generation = generation + 1"
+)
+
+# Row-at-a-time write: upsert the document, then the chunk with the
+# document's catalogue fields copied onto it.
+UPSERT_CHUNK_SQL = f"""
+    WITH document AS (
+        INSERT INTO {DOCUMENTS_TABLE} (path, title, source, cancer_type, sha256)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (path) DO UPDATE SET
+            title = EXCLUDED.title,
+            source = EXCLUDED.source,
+            cancer_type = EXCLUDED.cancer_type,
+            sha256 = EXCLUDED.sha256,
+            updated_at = now()
+        RETURNING id, title, source, cancer_type
+    )
+    INSERT INTO {CHUNKS_TABLE} (
+        chunk_key, document_id, chunk_index, body, embedding, content_sha256, document_sha256,
+        document_title, source, cancer_type
+    )
+    SELECT %s, document.id, %s, %s, %b, %s, %s,
+        document.title, document.source, document.cancer_type
+    FROM document
+    ON CONFLICT (chunk_key) DO UPDATE SET
+        document_id = EXCLUDED.document_id,
+        chunk_index = EXCLUDED.chunk_index,
+        body = EXCLUDED.body,
+        embedding = EXCLUDED.embedding,
+        content_sha256 = EXCLUDED.content_sha256,
+        document_sha256 = EXCLUDED.document_sha256,
+        document_title = EXCLUDED.document_title,
+        source = EXCLUDED.source,
+        cancer_type = EXCLUDED.cancer_type
+"""
+
+# Bulk writes COPY into this session-local table, then merge documents and
+# chunks with one statement each.  Columns mirror ``ingestion.ChunkRecord``.
+STAGING_TABLE = "chunks_staging"
+STAGING_COLUMNS = (
+    "id",
+    "document_path",
+    "chunk_index",
+    "content",
+    "embedding",
+    "content_sha256",
+    "document_sha256",
+    "document_title",
+    "source",
+    "cancer_type",
+)
+CREATE_STAGING_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        id UUID NOT NULL,
+        document_path TEXT NOT NULL,
+        chunk_index INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        embedding vector,
+        content_sha256 TEXT,
+        document_sha256 TEXT,
+        document_title TEXT,
+        source TEXT,
+        cancer_type TEXT
+    ) ON COMMIT DROP
+"""
+MERGE_DOCUMENTS_SQL = f"""
+    INSERT INTO {DOCUMENTS_TABLE} (path, title, source, cancer_type, sha256)
+    SELECT DISTINCT ON (document_path)
+        document_path,
+        coalesce(document_title, document_path),
+        coalesce(source, '{DEFAULT_SOURCE}'),
+        cancer_type,
+        document_sha256
+    FROM {STAGING_TABLE}
+    ORDER BY document_path
+    ON CONFLICT (path) DO UPDATE SET
+        title = EXCLUDED.title,
+        source = EXCLUDED.source,
+        cancer_type = EXCLUDED.cancer_type,
+        sha256 = EXCLUDED.sha256,
+        updated_at = now()
+"""
+MERGE_CHUNKS_SQL = f"""
+    INSERT INTO {CHUNKS_TABLE} (
+        chunk_key, document_id, chunk_index, body, embedding, content_sha256, document_sha256,
+        document_title, source, cancer_type
+    )
+    SELECT DISTINCT ON (s.id)
+        s.id, d.id, s.chunk_index, s.content, s.embedding, s.content_sha256, s.document_sha256,
+        d.title, d.source, d.cancer_type
+    FROM {STAGING_TABLE} s
+    JOIN {DOCUMENTS_TABLE} d ON d.path = s.document_path
+    ORDER BY s.id
+    ON CONFLICT (chunk_key) DO UPDATE SET
+        document_id = EXCLUDED.document_id,
+        chunk_index = EXCLUDED.chunk_index,
+        body = EXCLUDED.body,
+        embedding = EXCLUDED.embedding,
+        content_sha256 = EXCLUDED.content_sha256,
+        document_sha256 = EXCLUDED.document_sha256,
+        document_title = EXCLUDED.document_title,
+        source = EXCLUDED.source,
+        cancer_type = EXCLUDED.cancer_type
+"""
+
+# Incremental re-ingestion.  The chunk lookup is answered from the
+# ``chunks_document_id_idx`` covering index without visiting the table.
+CHUNK_STATE_SQL = f"""
+    SELECT c.chunk_key::text, c.chunk_index, c.document_sha256
+    FROM {DOCUMENTS_TABLE} d
+    JOIN {CHUNKS_TABLE} c ON c.document_id = d.id
+    WHERE d.path = %s
+"""
+REINDEX_CHUNK_SQL = f"""
+    UPDATE {CHUNKS_TABLE}
+    SET chunk_index = %s, document_sha256 = %s
+    WHERE chunk_key = %s
+"""
+STAMP_DOCUMENT_SQL = f"""
+    UPDATE {DOCUMENTS_TABLE}
+    SET sha256 = %s, updated_at = now()
+    WHERE path = %s
+"""
+DELETE_CHUNKS_SQL = f"DELETE FROM {CHUNKS_TABLE} WHERE chunk_key = ANY(%s::uuid[])"
+
+# Whether a file with this content hash has been ingested (documents_sha256_idx).
+DOCUMENT_BY_SHA256_SQL = f"SELECT 1 FROM {DOCUMENTS_TABLE} WHERE sha256 = :sha256 LIMIT 1"
+
+CREATE_MIGRATIONS_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+RECORD_MIGRATION_SQL = (
+    f"INSERT INTO {MIGRATIONS_TABLE} (version, name) VALUES (%s, %s) "
+    "ON CONFLICT (version) DO NOTHING"
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One ``NNNN_name.sql`` script from the migrations directory."""
+
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def label(self) -> str:
+        return f"{self.version:04d}_{self.name}"
+
+    def sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Return the migrations in *directory*, ordered and numbered from 1 without gaps."""
+
+    migrations = []
+    for path in sorted(Path(directory).glob("*.sql")):
+        version, _, name = path.stem.partition("_")
+        if not version.isdigit() or not name:
+            raise ValueError(f"Migration names look like 0001_name.sql, not {path.name}")
+        migrations.append(Migration(int(version), name, path))
+    versions = [migration.version for migration in migrations]
+    if versions != list(range(1, len(migrations) + 1)):
+        raise ValueError(f"Migration versions must run 1..n without gaps, got {versions}")
+    return migrations
+
+
+def applied_versions(conn: Any) -> Set[int]:
+    """Versions recorded in ``schema_migrations`` on a psycopg connection."""
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (MIGRATIONS_TABLE,))
+        if not cur.fetchone()[0]:
+            return set()
+        cur.execute(f"SELECT version FROM {MIGRATIONS_TABLE}")
+        return {version for (version,) in cur.fetchall()}
+
+
+def migrate(conn: Any, directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Apply pending migrations on a psycopg connection and return them.
+
+    Everything runs in one transaction holding an advisory lock, so
+    concurrent ingestion runs wait for each other and a failing script
+    leaves the database as it was.
+    """
+
+    migrations = discover_migrations(directory)
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+        cur.execute(CREATE_MIGRATIONS_TABLE_SQL)
+        cur.execute(f"SELECT version FROM {MIGRATIONS_TABLE}")
+        applied = {version for (version,) in cur.fetchall()}
+        pending = [migration for migration in migrations if migration.version not in applied]
+        for migration in pending:
+            cur.execute(migration.sql())
+            # Scripts record themselves for initdb; this covers any that do not.
+            cur.execute(RECORD_MIGRATION_SQL, (migration.version, migration.name))
+    conn.commit()
+    return pending
+
+
+def psycopg_url(database_url: str) -> str:
+    """Rewrite a SQLAlchemy ``DATABASE_URL`` for the synchronous psycopg driver.
+
+    Only the ``+driver`` suffix of the scheme is dropped, so ingestion does
+    not need SQLAlchemy; libpq keyword strings are returned unchanged.
+    """
+
+    scheme, separator, rest = database_url.partition("://")
+    if not separator:
+        return database_url
+    return f"{scheme.partition('+')[0]}{separator}{rest}"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Apply or list storage migrations")
+    parser.add_argument("action", choices=("migrate", "status"))
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"))
+    return parser.parse_args()
+
+
+def main() -> None:  # pragma: no cover - requires database
+    args = _parse_args()
+    if not args.db_url:
+        raise SystemExit("--db-url or DATABASE_URL is required")
+    import psycopg
+
+    with psycopg.connect(psycopg_url(args.db_url)) as conn:
+        if args.action == "migrate":
+            applied = migrate(conn)
+            for migration in applied:
+                print(f"applied: {migration.label}")
+            if not applied:
+                print("up to date")
+            return
+        versions = applied_versions(conn)
+    for migration in discover_migrations():
+        state = "applied" if migration.version in versions else "pending"
+        print(f"{state}: {migration.label}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from api.app import dependencies
+from api.app.main import create_app
+from api.app.services.batch import BatchSearchService
+from api.app.services.cache import SearchCache
+from api.app.services.embedding import EmbeddingClient
+from api.app.services.search import SearchOptions
+
+
+class FakeSession:
+    """Answers multi-query statements with one row per query ordinal."""
+
+    def __init__(self, tracker: "SessionTracker") -> None:
+        self._tracker = tracker
+
+    async def __aenter__(self) -> "FakeSession":
+        self._tracker.active += 1
+        self._tracker.peak = max(self._tracker.peak, self._tracker.active)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._tracker.active -= 1
+
+    async def execute(self, statement, params=None):
+        self._tracker.statements.append((" ".join(str(statement).split()), params))
+        await asyncio.sleep(0.01)
+        if not params:
+            return []
+        return [
+            SimpleNamespace(
+                ordinal=ordinal,
+                chunk_id=100 * len(self._tracker.statements) + ordinal,
+                chunk_text=f"chunk for {vector[:12]}",
+                similarity=0.5,
+                document_id=1,
+                document_title="NCCN Breast",
+                document_source="NCCN",
+                cancer_type="Breast",
+            )
+            for ordinal, vector in zip(
+                params["ordinals"], params.get("query_vectors") or params["query_texts"]
+            )
+        ]
+
+
+class SessionTracker:
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self.statements: list[tuple[str, dict | None]] = []
+
+    def __call__(self) -> FakeSession:
+        return FakeSession(self)
+
+
+@pytest.mark.asyncio
+async def test_batch_search_groups_queries_and_bounds_concurrency() -> None:
+    sessions = SessionTracker()
+    service = BatchSearchService(
+        sessions, EmbeddingClient(dimensions=8), max_concurrency=2, queries_per_statement=3
+    )
+    queries = [f"EGFR exon {index}" for index in range(10)]
+
+    batch = await service.search_many(queries, 5)
+
+    assert [result.query for result in batch.results] == queries
+    assert all(len(result.matches) == 1 and result.elapsed_ms > 0 for result in batch.results)
+    assert len(sessions.statements) == 4
+    assert sessions.peak == 2
+    statement, params = sessions.statements[0]
+    assert "CROSS JOIN LATERAL" in statement
+    assert params["ordinals"] == [0, 1, 2]
+    assert params["top_k"] == 5
+
+
+@pytest.mark.asyncio
+async def test_batch_search_dedupes_and_shares_the_result_cache() -> None:
+    sessions = SessionTracker()
+    cache = SearchCache()
+    service = BatchSearchService(sessions, EmbeddingClient(dimensions=8), cache)
+    options = SearchOptions(sources=("NCCN",))
+
+    first = await service.search_many(["HER2 positive", "her2  POSITIVE"], 3, options=options)
+    assert len(sessions.statements) == 2
+    settings, (query, params) = sessions.statements
+    assert "hnsw.iterative_scan" in settings[0]
+    assert "c.source = ANY(:sources)" in query
+    assert params["ordinals"] == [0] and params["sources"] == ["NCCN"]
+    assert first.results[0].matches == first.results[1].matches
+
+    second = await service.search_many(["Her2 positive"], 3, options=options)
+    assert len(sessions.statements) == 2
+    assert second.results[0].cached and second.embedding_ms == 0
+    assert cache.results.get(("her2 positive", 3, options)) == first.results[0].matches
+
+
+@pytest.mark.asyncio
+async def test_hybrid_batch_adds_a_lexical_statement_per_group() -> None:
+    sessions = SessionTracker()
+    service = BatchSearchService(sessions, EmbeddingClient(dimensions=8))
+
+    batch = await service.search_many(
+        ["T790M", "NCT01234567"], 5, options=SearchOptions(mode="hybrid")
+    )
+
+    (_, vector_params), (lexical_sql, lexical_params) = sessions.statements
+    assert vector_params["top_k"] == lexical_params["top_k"] == 20
+    assert "c.body_tsv @@ q.query" in lexical_sql
+    assert lexical_params["query_texts"] == ["t790m", "nct01234567"]
+    # Each query fuses its vector and full-text candidates.
+    assert [len(result.matches) for result in batch.results] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_returns_results_in_order() -> None:
+    app = create_app()
+    sessions = SessionTracker()
+    service = BatchSearchService(sessions, EmbeddingClient(dimensions=8), queries_per_statement=2)
+    app.dependency_overrides[dependencies.get_batch_search_service] = lambda: service
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.post(
+            "/search/batch", json={"queries": ["BRAF V600E", "KRAS G12C", "ALK fusion"], "top_k": 2}
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert [result["query"] for result in body["results"]] == ["BRAF V600E", "KRAS G12C", "ALK fusion"]
+        assert body["results"][2]["results"][0]["document"]["source"] == "NCCN"
+        assert body["embedding_ms"] >= 0
+
+        invalid = await client.post("/search/batch", json={"queries": []})
+        assert invalid.status_code == 422
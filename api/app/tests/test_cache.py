@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import pytest
+from httpx import AsyncClient
+
+from api.app import dependencies
+from api.app.main import create_app
+from api.app.services.cache import (
+    CachedSearchService,
+    CachingEmbedder,
+    CorpusGeneration,
+    SearchCache,
+    TTLCache,
+)
+from api.app.services.search import ChunkMatch, DocumentRef
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingSearchService:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def search(self, query: str, top_k: int, *, options=None):
+        self.calls += 1
+        return [
+            ChunkMatch(
+                chunk_id=self.calls,
+                text="Osimertinib is preferred for EGFR exon 19 deletions.",
+                score=0.9,
+                document=DocumentRef(id=1, title="NSCLC", source="NCCN", cancer_type="Lung"),
+            )
+        ][:top_k]
+
+
+class CountingEmbedder:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def embed(self, text: str):
+        self.calls += 1
+        return [float(len(text))]
+
+
+def test_ttl_cache_expires_and_evicts() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10, clock=clock)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    clock.now = 11
+    assert cache.get("c") is None
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (1, 2, 1)
+
+
+def test_ttl_cache_peek_does_not_count_lookups() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+
+    assert cache.peek("a") == 1
+    assert cache.peek("b") is None
+    clock.now = 11
+    assert cache.peek("a") is None
+    assert (cache.stats().hits, cache.stats().misses) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_cached_search_service_normalises_queries_and_invalidates() -> None:
+    cache = SearchCache()
+    inner = CountingSearchService()
+    service = CachedSearchService(inner, cache)
+
+    first = await service.search("EGFR exon 19  Osimertinib", 5)
+    second = await service.search("egfr exon 19 osimertinib", 5)
+    assert first == second
+    assert inner.calls == 1
+
+    await service.search("egfr exon 19 osimertinib", 3)
+    assert inner.calls == 2
+
+    cache.invalidate()
+    refreshed = await service.search("egfr exon 19 osimertinib", 5)
+    assert inner.calls == 3
+    assert refreshed[0].chunk_id == 3
+    assert cache.stats()["results"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_caching_embedder_reuses_query_embeddings() -> None:
+    cache = SearchCache()
+    inner = CountingEmbedder()
+    embedder = CachingEmbedder(inner, cache)
+
+    await embedder.embed("PD-L1 NSCLC first line")
+    await embedder.embed("pd-l1   nsclc FIRST line")
+    cache.invalidate()
+    await embedder.embed("pd-l1 nsclc first line")
+
+    assert inner.calls == 1
+    assert cache.embeddings.stats().hit_rate == pytest.approx(2 / 3)
+
+
+@pytest.mark.asyncio
+async def test_corpus_generation_invalidates_when_another_process_writes() -> None:
+    clock = FakeClock()
+    cache = SearchCache()
+    database = {"generation": 7, "reads": 0}
+
+    async def load() -> int:
+        database["reads"] += 1
+        return database["generation"]
+
+    corpus = CorpusGeneration(cache, load, interval=1.0, clock=clock)
+    service = CachedSearchService(CountingSearchService(), cache)
+
+    await corpus.refresh()
+    await service.search("EGFR", 1)
+    database["generation"] = 8
+    await corpus.refresh()
+    assert len(cache.results) == 1 and database["reads"] == 1
+
+    clock.now = 1.5
+    await corpus.refresh()
+    assert len(cache.results) == 0
+    assert cache.stats()["corpus_generation"] == 8
+
+    await service.search("EGFR", 1)
+    clock.now = 3
+    await corpus.refresh()
+    assert len(cache.results) == 1 and database["reads"] == 3
+
+
+@pytest.mark.asyncio
+async def test_cache_endpoints_report_and_invalidate() -> None:
+    app = create_app()
+    cache = SearchCache()
+    cache.results.set(("her2", 5), [])
+    app.dependency_overrides[dependencies.get_search_cache] = lambda: cache
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        stats = await client.get("/search/cache")
+        assert stats.status_code == 200
+        assert stats.json()["results"]["size"] == 1
+
+        invalidated = await client.delete("/search/cache")
+        assert invalidated.json()["generation"] == 1
+        assert invalidated.json()["results"]["size"] == 0
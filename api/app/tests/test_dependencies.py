@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from sqlalchemy.pool import NullPool
+
+from api.app.dependencies import PoolSettings
+
+
+def test_pool_settings_read_environment(monkeypatch) -> None:
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "5")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "600")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+
+    settings = PoolSettings.from_env()
+    kwargs = settings.engine_kwargs("postgresql+asyncpg://karkinos@localhost/karkinos")
+
+    assert kwargs["pool_size"] == 20
+    assert kwargs["max_overflow"] == 5
+    assert kwargs["pool_recycle"] == 600
+    assert kwargs["pool_pre_ping"] is False
+    assert kwargs["connect_args"] == {"prepared_statement_cache_size": 100}
+
+
+def test_null_pool_can_be_selected(monkeypatch) -> None:
+    monkeypatch.setenv("DB_POOL", "null")
+    monkeypatch.setenv("DB_STATEMENT_CACHE_SIZE", "0")
+
+    kwargs = PoolSettings.from_env().engine_kwargs("postgresql+psycopg://localhost/karkinos")
+
+    assert kwargs["poolclass"] is NullPool
+    assert "pool_size" not in kwargs
+    assert kwargs["connect_args"] == {"prepare_threshold": None}
+
+
+def test_psycopg_connections_keep_the_configured_number_of_statements(monkeypatch) -> None:
+    class Connection:
+        prepared_max = 100
+
+    monkeypatch.setenv("DB_STATEMENT_CACHE_SIZE", "250")
+    adapted = SimpleNamespace(driver_connection=Connection())
+
+    PoolSettings.from_env().size_statement_cache(adapted, None)
+
+    assert adapted.driver_connection.prepared_max == 250
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import threading
+from pathlib import Path
+from uuid import uuid5
+
+import pytest
+from httpx import AsyncClient
+
+from api.app import dependencies
+from api.app.main import create_app
+from api.app.routers.documents import DOCUMENT_ID_NAMESPACE
+from api.app.services.jobs import IngestionJob, IngestionQueue, QueueFull, ingest_document
+from api.app.services.uploads import UploadTooLarge, store_upload
+
+
+class RecordingRunner:
+    """Stands in for ingestion: records which documents ran and how many at once."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.paths: list[Path] = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, job: IngestionJob) -> int:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            threading.Event().wait(0.02)
+            self.paths.append(job.path)
+            if self.fail:
+                raise RuntimeError("embedding service unavailable")
+            job.chunks_prepared = 3
+            return 3
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.mark.asyncio
+async def test_queue_bounds_concurrency_and_reports_progress(tmp_path) -> None:
+    runner = RecordingRunner()
+    completed = []
+    queue = IngestionQueue(runner, concurrency=2, on_complete=completed.append)
+    queue.start()
+
+    jobs = [
+        queue.submit(f"doc-{n}", f"{n}.txt", tmp_path / f"{n}.txt", f"sha-{n}") for n in range(6)
+    ]
+    await queue.join()
+    await queue.stop()
+
+    assert runner.peak == 2
+    assert [job.status for job in jobs] == ["succeeded"] * 6
+    assert all(job.chunks_written == 3 and job.finished_at for job in jobs)
+    assert len(completed) == 6
+    assert queue.find("sha-4") is jobs[4]
+    assert queue.jobs()[0] is jobs[-1]
+
+
+@pytest.mark.asyncio
+async def test_queue_records_failures_and_rejects_overflow(tmp_path) -> None:
+    queue = IngestionQueue(RecordingRunner(fail=True), max_pending=1)
+    queue.start()
+
+    job = queue.submit("doc", "a.pdf", tmp_path / "a.pdf", "sha")
+    with pytest.raises(QueueFull):
+        queue.submit("other", "b.pdf", tmp_path / "b.pdf", "sha-b")
+    await queue.join()
+    await queue.stop()
+
+    assert job.status == "failed"
+    assert job.error == "embedding service unavailable"
+
+
+def test_ingest_document_runs_the_ingestion_pipeline(tmp_path) -> None:
+    document = tmp_path / "guideline.txt"
+    document.write_text("# Lung\n\nOsimertinib is preferred for EGFR exon 19. " * 40)
+    job = IngestionJob(id="1", document_id="d", filename="guideline.txt", path=document, sha256="x")
+
+    written = ingest_document(job, db_url=None, chunk_size=200, overlap=0)
+
+    assert written == 0
+    assert job.chunks_prepared > 1
+
+    job.path = tmp_path / "empty.txt"
+    job.path.write_text("   ", encoding="utf-8")
+    job.chunks_prepared = 0
+    with pytest.raises(ValueError):
+        ingest_document(job, db_url=None)
+
+
+@pytest.mark.asyncio
+async def test_upload_queues_each_document_once(tmp_path) -> None:
+    runner = RecordingRunner()
+    queue = IngestionQueue(runner)
+    app = create_app()
+    app.dependency_overrides[dependencies.get_raw_data_dir] = lambda: tmp_path
+
+    async def started_queue() -> IngestionQueue:
+        queue.start()
+        return queue
+
+    app.dependency_overrides[dependencies.get_ingestion_queue] = started_queue
+
+    files = [
+        ("files", ("nccn.pdf", b"%PDF-1.7 breast guideline", "application/pdf")),
+        ("files", ("copy.pdf", b"%PDF-1.7 breast guideline", "application/pdf")),
+    ]
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.post("/documents", files=files)
+        assert response.status_code == 200
+        first, second = response.json()["documents"]
+        assert first["document_id"] == second["document_id"]
+        assert (first["duplicate"], second["duplicate"]) == (False, True)
+        assert second["job"]["job_id"] == first["job"]["job_id"]
+
+        await queue.join()
+        job = await client.get(f"/documents/jobs/{first['job']['job_id']}")
+        assert job.json()["status"] == "succeeded"
+        assert job.json()["chunks_written"] == 3
+
+        again = await client.post("/documents", files=files[:1])
+        assert again.json()["documents"][0]["duplicate"] is True
+
+        listing = await client.get("/documents/jobs")
+        assert len(listing.json()["jobs"]) == 1
+        assert (await client.get("/documents/jobs/unknown")).status_code == 404
+
+    await queue.stop()
+    assert len(runner.paths) == 1
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_reingests_stored_copies_missing_from_the_database(tmp_path) -> None:
+    # A copy kept by an earlier process whose job was lost on restart.
+    content = b"%PDF-1.7 lung guideline"
+    document_id = str(uuid5(DOCUMENT_ID_NAMESPACE, hashlib.sha256(content).hexdigest()))
+    stored = tmp_path / f"{document_id}_nccn.pdf"
+    stored.write_bytes(content)
+
+    runner = RecordingRunner()
+    queue = IngestionQueue(runner)
+    ingested: set = set()
+    app = create_app()
+    app.dependency_overrides[dependencies.get_raw_data_dir] = lambda: tmp_path
+
+    async def started_queue() -> IngestionQueue:
+        queue.start()
+        return queue
+
+    async def lookup(sha256: str) -> bool:
+        return sha256 in ingested
+
+    app.dependency_overrides[dependencies.get_ingestion_queue] = started_queue
+    app.dependency_overrides[dependencies.get_document_lookup] = lambda: lookup
+
+    files = [("files", ("renamed.pdf", content, "application/pdf"))]
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        first = (await client.post("/documents", files=files)).json()["documents"][0]
+        await queue.join()
+        ingested.add(first["sha256"])
+        second = (await client.post("/documents", files=files)).json()["documents"][0]
+
+    await queue.stop()
+    assert first["duplicate"] is False and first["job"] is not None
+    assert runner.paths == [stored]
+    assert second["duplicate"] is True
+    assert list(tmp_path.iterdir()) == [stored]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_uploads_of_one_document_queue_one_job(tmp_path) -> None:
+    runner = RecordingRunner()
+    queue = IngestionQueue(runner)
+    app = create_app()
+    app.dependency_overrides[dependencies.get_raw_data_dir] = lambda: tmp_path
+
+    async def started_queue() -> IngestionQueue:
+        queue.start()
+        return queue
+
+    async def slow_lookup(sha256: str) -> bool:
+        await asyncio.sleep(0.05)
+        return False
+
+    app.dependency_overrides[dependencies.get_ingestion_queue] = started_queue
+    app.dependency_overrides[dependencies.get_document_lookup] = lambda: slow_lookup
+
+    content = b"%PDF-1.7 melanoma guideline"
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        responses = await asyncio.gather(
+            client.post("/documents", files=[("files", ("a.pdf", content, "application/pdf"))]),
+            client.post("/documents", files=[("files", ("b.pdf", content, "application/pdf"))]),
+        )
+        await queue.join()
+
+    await queue.stop()
+    first, second = (response.json()["documents"][0] for response in responses)
+    assert first["job"]["job_id"] == second["job"]["job_id"]
+    assert sorted((first["duplicate"], second["duplicate"])) == [False, True]
+    assert len(runner.paths) == 1
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+class ChunkedSource(io.BytesIO):
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.reads: list[int] = []
+
+    def read(self, size: int = -1) -> bytes:
+        self.reads.append(size)
+        return super().read(size)
+
+
+@pytest.mark.asyncio
+async def test_store_upload_streams_in_blocks_and_hashes(tmp_path) -> None:
+    data = bytes(range(256)) * 1000
+    source = ChunkedSource(data)
+
+    stored = await store_upload(source, tmp_path, max_bytes=len(data), chunk_size=4096)
+
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.size == len(data)
+    assert set(source.reads) == {4096}
+    assert stored.keep(tmp_path / "kept.bin").read_bytes() == data
+
+    with pytest.raises(UploadTooLarge):
+        await store_upload(io.BytesIO(data), tmp_path, max_bytes=len(data) - 1, chunk_size=4096)
+    assert [path.name for path in tmp_path.iterdir()] == ["kept.bin"]
+
+
+@pytest.mark.asyncio
+async def test_oversized_uploads_are_rejected(tmp_path) -> None:
+    queue = IngestionQueue(RecordingRunner())
+    app = create_app()
+    app.dependency_overrides[dependencies.get_raw_data_dir] = lambda: tmp_path
+    app.dependency_overrides[dependencies.get_max_upload_bytes] = lambda: 16
+
+    async def started_queue() -> IngestionQueue:
+        queue.start()
+        return queue
+
+    app.dependency_overrides[dependencies.get_ingestion_queue] = started_queue
+
+    files = [
+        ("files", ("small.txt", b"EGFR exon 19", "text/plain")),
+        ("files", ("large.txt", b"x" * 17, "text/plain")),
+    ]
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.post("/documents", files=files)
+
+    await queue.stop()
+    assert response.status_code == 413
+    assert queue.jobs() == []
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from api.app.services.embedding import EmbeddingClient
+
+
+@pytest.mark.asyncio
+async def test_embed_batch_is_bit_compatible_with_single_text_path() -> None:
+    embedder = EmbeddingClient()
+    texts = [
+        "EGFR exon 19 deletion osimertinib",
+        "PD-L1 NSCLC first line pembrolizumab pembrolizumab",
+        "   ",
+        "EGFR T790M",
+    ]
+
+    matrix = embedder.embed_batch(texts)
+
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (len(texts), embedder.dimensions)
+    assert matrix.flags["C_CONTIGUOUS"]
+    for row, text in zip(matrix, texts):
+        expected = np.asarray(await embedder.embed(text), dtype=np.float32)
+        assert np.array_equal(row, expected)
+    assert not matrix[2].any()
+
+
+def test_embed_batch_hashes_each_distinct_token_once(monkeypatch) -> None:
+    embedder = EmbeddingClient(dimensions=64)
+    hashed: list[str] = []
+    original = embedder._bucket
+
+    def counting_bucket(token: str) -> int:
+        hashed.append(token)
+        return original(token)
+
+    monkeypatch.setattr(embedder, "_bucket", counting_bucket)
+
+    embedder.embed_batch(["HER2 her2 trastuzumab", "her2 positive", "trastuzumab"])
+
+    assert sorted(hashed) == ["her2", "positive", "trastuzumab"]
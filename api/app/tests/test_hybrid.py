@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from api.app.services.embedding import EmbeddingClient
+from api.app.services.index import lexical_index_sql
+from api.app.services.search import (
+    ChunkMatch,
+    DocumentRef,
+    PgVectorSearchService,
+    SearchOptions,
+    reciprocal_rank_fusion,
+)
+
+
+def match(chunk_id: int, score: float = 0.5) -> ChunkMatch:
+    return ChunkMatch(
+        chunk_id=chunk_id,
+        text=f"chunk {chunk_id}",
+        score=score,
+        document=DocumentRef(id=1, title="NCCN NSCLC", source="NCCN", cancer_type="Lung"),
+    )
+
+
+def row(chunk_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        chunk_id=chunk_id,
+        chunk_text=f"chunk {chunk_id}",
+        similarity=0.5,
+        document_id=1,
+        document_title="NCCN NSCLC",
+        document_source="NCCN",
+        cancer_type="Lung",
+    )
+
+
+class CandidateSession:
+    """Returns fixed vector or full-text candidates and tracks overlap."""
+
+    active = 0
+    peak = 0
+
+    def __init__(self, vector_ids: list[int], lexical_ids: list[int]) -> None:
+        self.vector_ids = vector_ids
+        self.lexical_ids = lexical_ids
+        self.statements: list[tuple[str, dict | None]] = []
+
+    async def __aenter__(self) -> "CandidateSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+    async def connection(self) -> None:
+        return None
+
+    async def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append((sql, params))
+        CandidateSession.active += 1
+        CandidateSession.peak = max(CandidateSession.peak, CandidateSession.active)
+        await asyncio.sleep(0.01)
+        CandidateSession.active -= 1
+        ids = self.lexical_ids if "websearch_to_tsquery" in sql else self.vector_ids
+        return [row(chunk_id) for chunk_id in ids]
+
+
+def test_reciprocal_rank_fusion_weights_rankings() -> None:
+    vector = [match(1), match(2), match(3)]
+    lexical = [match(3), match(4)]
+
+    fused = reciprocal_rank_fusion([vector, lexical], [1.0, 1.0], k=60)
+    assert [m.chunk_id for m in fused] == [3, 1, 2, 4]
+    assert fused[0].score == pytest.approx(1 / 63 + 1 / 61)
+
+    lexical_heavy = reciprocal_rank_fusion([vector, lexical], [0.2, 1.0], k=60)
+    assert [m.chunk_id for m in lexical_heavy][:2] == [3, 4]
+
+
+def test_lexical_index_sql_adds_generated_column_and_gin_index() -> None:
+    column, index = lexical_index_sql(concurrently=False)
+    assert "GENERATED ALWAYS AS (to_tsvector('english', coalesce(body, ''))) STORED" in column
+    assert index == (
+        "CREATE INDEX IF NOT EXISTS chunks_body_tsv_idx "
+        "ON chunks USING gin (body_tsv)"
+    )
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_runs_both_legs_concurrently_and_fuses() -> None:
+    CandidateSession.peak = 0
+    request_session = CandidateSession(vector_ids=[1, 2, 3], lexical_ids=[])
+    lexical_session = CandidateSession(vector_ids=[], lexical_ids=[7, 3])
+    service = PgVectorSearchService(
+        session=request_session,
+        embedder=EmbeddingClient(dimensions=8),
+        session_factory=lambda: lexical_session,
+    )
+
+    options = SearchOptions(mode="hybrid", cancer_types=("Lung",))
+    results = await service.search("T790M osimertinib", 3, options=options)
+
+    assert [m.chunk_id for m in results] == [3, 1, 7]
+    assert CandidateSession.peak == 2
+    (lexical_sql, lexical_params), = lexical_session.statements
+    assert "c.body_tsv @@ query" in lexical_sql
+    assert "c.cancer_type = ANY(:cancer_types)" in lexical_sql
+    assert lexical_params["query_text"] == "T790M osimertinib"
+    assert lexical_params["top_k"] == 20
+    assert request_session.statements[-1][1]["top_k"] == 20
+
+
+@pytest.mark.asyncio
+async def test_vector_mode_skips_the_lexical_leg() -> None:
+    session = CandidateSession(vector_ids=[1, 2], lexical_ids=[9])
+    service = PgVectorSearchService(session=session, embedder=EmbeddingClient(dimensions=8))
+
+    results = await service.search("EGFR", 2)
+
+    assert [m.chunk_id for m in results] == [1, 2]
+    assert not any("websearch_to_tsquery" in sql for sql, _ in session.statements)
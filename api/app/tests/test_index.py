@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import pytest
+
+from api.app.services import search
+from api.app.services.embedding import EmbeddingClient
+from api.app.services.index import (
+    QUANTIZATIONS,
+    AnnIndexSpec,
+    check_pgvector_version,
+    search_settings_sql,
+)
+from api.app.services.search import (
+    QUANTIZED_RERANK_FACTOR,
+    PgVectorSearchService,
+    QuantizationUnavailable,
+    SearchOptions,
+)
+
+
+class RecordingSession:
+    def __init__(self, columns=()) -> None:
+        self.statements: list[str] = []
+        self.columns = columns
+
+    async def execute(self, statement, params=None):
+        self.statements.append(" ".join(str(statement).split()))
+        if "information_schema.columns" in self.statements[-1]:
+            return [(column,) for column in self.columns]
+        return []
+
+    async def connection(self) -> None:
+        return None
+
+
+def test_index_spec_renders_hnsw_and_ivfflat_ddl() -> None:
+    hnsw = AnnIndexSpec(m=32, ef_construction=128)
+    ivfflat = AnnIndexSpec(method="ivfflat", lists=400)
+
+    assert hnsw.create_sql() == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS chunks_embedding_hnsw_idx "
+        "ON chunks USING hnsw (embedding vector_l2_ops) "
+        "WITH (m = 32, ef_construction = 128)"
+    )
+    assert ivfflat.create_sql(concurrently=False).endswith("WITH (lists = 400)")
+    assert ivfflat.reindex_sql() == "REINDEX INDEX CONCURRENTLY chunks_embedding_ivfflat_idx"
+
+
+def test_search_settings_sql_only_when_needed() -> None:
+    assert search_settings_sql() is None
+    assert search_settings_sql(exact=True, ef_search=80, probes=10) == (
+        "SELECT set_config('enable_indexscan', 'off', true), "
+        "set_config('hnsw.ef_search', '80', true), "
+        "set_config('ivfflat.probes', '10', true)"
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_applies_options_before_the_ann_query() -> None:
+    session = RecordingSession()
+    service = PgVectorSearchService(session=session, embedder=EmbeddingClient(dimensions=8))
+
+    await service.search("BRAF V600E", 5)
+    assert len(session.statements) == 1
+
+    await service.search("BRAF V600E", 5, options=SearchOptions(ef_search=200))
+    assert session.statements[1] == "SELECT set_config('hnsw.ef_search', '200', true)"
+    assert session.statements[2].startswith("SELECT c.id AS chunk_id")
+
+
+@pytest.mark.asyncio
+async def test_filters_are_pushed_into_sql_with_iterative_scan() -> None:
+    session = RecordingSession()
+    service = PgVectorSearchService(session=session, embedder=EmbeddingClient(dimensions=8))
+
+    options = SearchOptions(sources=("NCCN",), cancer_types=("Breast",))
+    await service.search("HER2 positive", 5, options=options)
+
+    settings, query = session.statements
+    assert "hnsw.iterative_scan" in settings
+    assert "c.source = ANY(:sources)" in query
+    assert "c.cancer_type = ANY(:cancer_types)" in query
+    assert "JOIN" not in query
+    assert "document_ids" not in query
+    assert query.endswith("SELECT * FROM candidates ORDER BY distance")
+
+
+@pytest.mark.asyncio
+async def test_exact_filtered_search_skips_iterative_scan() -> None:
+    session = RecordingSession()
+    service = PgVectorSearchService(session=session, embedder=EmbeddingClient(dimensions=8))
+
+    await service.search("HER2", 5, options=SearchOptions(exact=True, document_ids=(3, 4)))
+
+    assert session.statements[0] == "SELECT set_config('enable_indexscan', 'off', true)"
+    assert "c.document_id = ANY(:document_ids)" in session.statements[1]
+
+
+def test_quantized_columns_are_generated_from_the_embedding() -> None:
+    assert QUANTIZATIONS["halfvec"].column_sql("chunks", 8) == (
+        "ALTER TABLE chunks ADD COLUMN IF NOT EXISTS embedding_halfvec halfvec(8) "
+        "GENERATED ALWAYS AS (embedding::halfvec(8)) STORED"
+    )
+    assert "binary_quantize(embedding)::bit(8)" in QUANTIZATIONS["bit"].column_sql(dimension=8)
+
+
+@pytest.mark.asyncio
+async def test_quantized_search_reranks_candidates_on_full_vectors() -> None:
+    session = RecordingSession(columns=["embedding_bit"])
+    service = PgVectorSearchService(session=session, embedder=EmbeddingClient(dimensions=8))
+
+    statement = SearchOptions(quantization="bit").statement(dimension=8)
+    params = SearchOptions(quantization="bit").vector_params(5)
+    await service.search("HER2", 5, options=SearchOptions(quantization="bit"))
+
+    query = session.statements[-1]
+    assert "ORDER BY c.embedding_bit <~> binary_quantize(CAST(:query_vector AS vector))::bit(8)" in query
+    assert "LIMIT :candidates ) AS c ORDER BY distance" in query
+    assert "c.embedding <-> :query_vector AS distance" in query
+    assert query.endswith("ORDER BY distance LIMIT :top_k")
+    assert params == {"top_k": 5, "candidates": 5 * QUANTIZED_RERANK_FACTOR}
+    assert set(statement.compile().params) == {"query_vector", "candidates", "top_k"}
+
+
+@pytest.mark.asyncio
+async def test_quantized_search_needs_its_column(monkeypatch) -> None:
+    monkeypatch.setattr(search, "_created_quantized_columns", set())
+    session = RecordingSession()
+    service = PgVectorSearchService(session=session, embedder=EmbeddingClient(dimensions=8))
+
+    with pytest.raises(QuantizationUnavailable, match="index quantize --quantization halfvec"):
+        await service.search("HER2", 5, options=SearchOptions(quantization="halfvec"))
+    assert not any("embedding_halfvec <->" in statement for statement in session.statements)
+
+    session.columns = ["embedding_halfvec"]
+    await service.search("HER2", 5, options=SearchOptions(quantization="halfvec"))
+    await service.search("HER2", 5, options=SearchOptions(quantization="halfvec"))
+    lookups = [s for s in session.statements if "information_schema.columns" in s]
+    assert len(lookups) == 2
+
+
+def test_exact_search_ignores_quantization() -> None:
+    options = SearchOptions(exact=True, quantization="halfvec")
+
+    assert "candidates" not in options.vector_params(5)
+    assert "embedding_halfvec" not in str(options.statement())
+    assert "embedding_halfvec" in str(SearchOptions(quantization="halfvec").statement(batch=True))
+    with pytest.raises(ValueError):
+        SearchOptions(quantization="int4")
+
+
+def test_pgvector_older_than_0_8_is_rejected() -> None:
+    check_pgvector_version("0.8.0")
+    check_pgvector_version("0.10.1")
+    with pytest.raises(RuntimeError, match="0.7.4"):
+        check_pgvector_version("0.7.4")
+    with pytest.raises(RuntimeError, match="not installed"):
+        check_pgvector_version(None)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from api.app import dependencies
+from api.app.main import create_app
+from api.app.services.embedding import EmbeddingClient
+from api.app.services.local_index import (
+    CANCER_TYPE_CODES,
+    CHUNK_OFFSETS,
+    DOCUMENT_IDS,
+    MANIFEST,
+    SOURCE_CODES,
+    ChunkTable,
+    LocalChunk,
+    LocalSearchService,
+    LocalVectorIndex,
+)
+from api.app.services.search import SearchOptions
+
+SOURCES = ("NCCN", "ASCO", "ESMO")
+
+
+def corpus(rows: int = 600, dimension: int = 32, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    centroids = rng.normal(size=(12, dimension))
+    vectors = centroids[rng.integers(0, 12, size=rows)] + rng.normal(scale=0.5, size=(rows, dimension))
+    chunks = [
+        LocalChunk(
+            chunk_id=row,
+            text=f"chunk {row}",
+            document_id=row // 10,
+            title=f"Document {row // 10}",
+            source=SOURCES[row % 3],
+            cancer_type="Lung" if row % 2 else "Breast",
+        )
+        for row in range(rows)
+    ]
+    return vectors.astype(np.float32), chunks
+
+
+def brute_force(vectors: np.ndarray, query: np.ndarray, k: int) -> list[int]:
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = unit @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+def test_exact_search_matches_brute_force_and_filters() -> None:
+    vectors, chunks = corpus()
+    index = LocalVectorIndex.build(vectors, chunks)
+    query = vectors[17] + 0.1
+
+    hits = index.search(query, 10)
+    assert [row for row, _ in hits] == brute_force(vectors, query, 10)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+    mask = index.filter_mask(sources=["ASCO"], cancer_types=["Lung"])
+    filtered = index.search(query, 10, mask=mask)
+    assert len(filtered) == 10
+    assert all(chunks[row].source == "ASCO" and chunks[row].cancer_type == "Lung" for row, _ in filtered)
+
+
+def test_quantised_and_graph_search_keep_recall() -> None:
+    vectors, chunks = corpus()
+    index = LocalVectorIndex.build(vectors, chunks, quantize=True, graph_degree=16)
+    queries = vectors[:50] + np.random.default_rng(5).normal(scale=0.2, size=(50, vectors.shape[1]))
+
+    def recall(search) -> float:
+        found = 0
+        for query in queries:
+            expected = set(brute_force(vectors, query, 10))
+            found += len(expected.intersection(row for row, _ in search(query)))
+        return found / (10 * len(queries))
+
+    assert index.codes.dtype == np.int8
+    assert recall(lambda query: index.search(query, 10)) >= 0.9
+    index.graph = None
+    assert recall(lambda query: index.search(query, 10)) >= 0.95
+    assert recall(lambda query: index.search(query, 10, exact=True)) == 1.0
+
+
+def test_snapshot_round_trip_is_memory_mapped(tmp_path) -> None:
+    vectors, chunks = corpus(rows=120)
+    LocalVectorIndex.build(vectors, chunks, quantize=True, graph_degree=8).save(tmp_path)
+
+    loaded = LocalVectorIndex.load(tmp_path)
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert isinstance(loaded.chunks, ChunkTable)
+    assert isinstance(loaded.columns.sources, np.memmap)
+    assert list(loaded.chunks) == chunks
+    assert loaded.chunks[-1] == chunks[-1] and loaded.chunks[3:5] == chunks[3:5]
+    assert loaded.graph.shape == (120, 8)
+    batch = loaded.search_batch(vectors[:3], 5, exact=True)
+    assert [hits[0][0] for hits in batch] == [0, 1, 2]
+
+    expected = LocalVectorIndex.build(vectors, chunks)
+    for filters in ({"sources": ["ESMO"], "cancer_types": ["Lung"]}, {"document_ids": [2, 7]}):
+        assert np.array_equal(loaded.filter_mask(**filters), expected.filter_mask(**filters))
+    assert not loaded.filter_mask(sources=["unknown"]).any()
+
+
+def test_version_1_snapshots_load_and_upgrade_in_place(tmp_path) -> None:
+    vectors, chunks = corpus(rows=40)
+    LocalVectorIndex.build(vectors, chunks).save(tmp_path)
+    for name in (CHUNK_OFFSETS, DOCUMENT_IDS, SOURCE_CODES, CANCER_TYPE_CODES):
+        (tmp_path / name).unlink()
+    manifest = json.loads((tmp_path / MANIFEST).read_text())
+    manifest["version"] = 1
+    (tmp_path / MANIFEST).write_text(json.dumps(manifest))
+
+    legacy = LocalVectorIndex.load(tmp_path)
+    assert legacy.chunks == chunks
+    legacy.save_parts(tmp_path)
+
+    upgraded = LocalVectorIndex.load(tmp_path)
+    assert isinstance(upgraded.chunks, ChunkTable)
+    assert list(upgraded.chunks) == chunks
+
+
+@pytest.mark.asyncio
+async def test_local_backend_serves_the_search_endpoint(tmp_path, monkeypatch) -> None:
+    embedder = EmbeddingClient(dimensions=1536)
+    texts = ["EGFR exon 19 deletion osimertinib", "HER2 positive trastuzumab", "BRAF V600E melanoma"]
+    chunks = [
+        LocalChunk(row, text, row, f"Guideline {row}", "NCCN", "Lung" if row == 0 else None)
+        for row, text in enumerate(texts)
+    ]
+    LocalVectorIndex.build(embedder.embed_batch(texts), chunks).save(tmp_path)
+
+    monkeypatch.setenv(dependencies.SEARCH_BACKEND_ENV, "local")
+    monkeypatch.setenv(dependencies.LOCAL_INDEX_PATH_ENV, str(tmp_path))
+    dependencies._get_local_index.cache_clear()
+    dependencies._get_search_cache.cache_clear()
+    try:
+        async with AsyncClient(app=create_app(), base_url="http://testserver") as client:
+            response = await client.post("/search", json={"query": "HER2 trastuzumab", "top_k": 2})
+            assert response.status_code == 200
+            assert response.json()["results"][0]["text"] == texts[1]
+
+            batch = await client.post(
+                "/search/batch", json={"queries": ["BRAF melanoma", "EGFR osimertinib"], "top_k": 1}
+            )
+            assert [r["results"][0]["chunk_id"] for r in batch.json()["results"]] == [2, 0]
+    finally:
+        dependencies._get_local_index.cache_clear()
+        dependencies._get_search_cache.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_local_service_rejects_mismatched_dimensions() -> None:
+    vectors, chunks = corpus(rows=20)
+    index = LocalVectorIndex.build(vectors, chunks)
+    with pytest.raises(ValueError, match="dimension"):
+        LocalSearchService(index, EmbeddingClient(dimensions=64))
+
+    service = LocalSearchService(index, EmbeddingClient(dimensions=32))
+    results = await service.search("KRAS G12C", 3, options=SearchOptions(document_ids=(1,)))
+    assert {match.document.id for match in results} == {1}
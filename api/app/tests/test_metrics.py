@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+from httpx import AsyncClient
+
+from api.app import dependencies, metrics
+from api.app.main import create_app
+from api.app.services.search import ChunkMatch, DocumentRef
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = metrics.Registry()
+    histogram = registry.histogram("test_seconds", "Test latency.", ("stage",), buckets=(0.1, 1.0))
+    counter = registry.counter("test_rows", "Test rows.", ("stage",))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value, stage="embed")
+    counter.inc(3, stage="embed")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{stage="embed",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="embed",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="embed",le="+Inf"} 3' in lines
+    assert 'test_seconds_sum{stage="embed"} 2.55' in lines
+    assert 'test_seconds_count{stage="embed"} 3' in lines
+    assert 'test_rows_total{stage="embed"} 3' in lines
+    assert registry.histogram("test_seconds", "Test latency.", ("stage",)) is histogram
+    with pytest.raises(ValueError):
+        histogram.observe(1.0)
+    with pytest.raises(ValueError):
+        registry.counter("test_seconds", "Clash.", ("stage",))
+
+
+def test_timed_counts_only_producer_time() -> None:
+    metrics.REGISTRY.reset()
+    consumed = list(metrics.timed(iter(range(5)), "test.timed"))
+
+    assert consumed == list(range(5))
+    assert metrics.STAGE_SECONDS.count(stage="test.timed") == 1
+    assert metrics.STAGE_ITEMS.value(stage="test.timed") == 5
+    assert metrics.stage_throughput("test.")[0][::2] == ("test.timed", 5)
+
+
+class StaticSearchService:
+    async def search(self, query: str, top_k: int, *, options=None):
+        with metrics.span("search.query"):
+            document = DocumentRef(id=1, title="NCCN Breast", source="NCCN", cancer_type="Breast")
+            return [ChunkMatch(chunk_id=1, text="Trastuzumab.", score=0.9, document=document)]
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_search_stages_and_routes() -> None:
+    metrics.REGISTRY.reset()
+    app = create_app()
+    app.dependency_overrides[dependencies.get_search_service] = StaticSearchService
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        assert (await client.post("/search", json={"query": "HER2"})).status_code == 200
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'karkinos_stage_seconds_count{stage="search.query"} 1' in body
+    assert 'karkinos_stage_seconds_count{stage="search.serialize"} 1' in body
+    assert (
+        'karkinos_http_request_seconds_count{method="POST",route="/search",status="200"} 1'
+        in body
+    )
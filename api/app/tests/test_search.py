@@ -1,19 +1,26 @@
 from __future__ import annotations
 
+import json
+from dataclasses import asdict
+
 import pytest
 from httpx import AsyncClient
 
+from api.app import metrics, responses
 from api.app.main import create_app
-from api.app.services.search import ChunkMatch, DocumentRef
+from api.app.schemas.search import SearchResponse
+from api.app.services.search import ChunkMatch, DocumentRef, QuantizationUnavailable
 
 
 class InMemorySearchService:
     def __init__(self, matches: list[ChunkMatch]) -> None:
         self._matches = matches
 
-    async def search(self, query: str, top_k: int):
+    async def search(self, query: str, top_k: int, *, options=None):
         # Basic guard to show the request was passed through correctly.
         assert query
+        if options is not None and options.quantized:
+            raise QuantizationUnavailable("embedding_halfvec has not been added")
         return self._matches[:top_k]
 
 
@@ -90,3 +97,51 @@ async def test_search_endpoint_validates_payload(api_client: AsyncClient) -> Non
     )
 
     assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_rejects_missing_quantized_columns(api_client: AsyncClient) -> None:
+    response = await api_client.post(
+        "/search",
+        json={"query": "lung cancer", "quantization": "halfvec"},
+    )
+
+    assert response.status_code == 400
+    assert "embedding_halfvec" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_streams_ndjson(api_client: AsyncClient) -> None:
+    metrics.REGISTRY.reset()
+    response = await api_client.post(
+        "/search",
+        json={"query": "lung cancer", "top_k": 2},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["chunk_id"] for line in lines] == [1, 2]
+    assert lines[1]["document"]["title"] == "Targeted therapies in lung cancer"
+    assert metrics.STAGE_SECONDS.count(stage="search.serialize") == 1
+    assert metrics.STAGE_ITEMS.value(stage="search.serialize") == 2
+
+
+def test_fast_encoding_matches_the_response_model(monkeypatch) -> None:
+    matches = [
+        ChunkMatch(
+            chunk_id=7,
+            text="Für HER2-positive Patientinnen: trastuzumab.",
+            score=0.5,
+            document=DocumentRef(id=3, title="ESMO", source="ESMO", cancer_type=None),
+        )
+    ]
+    content = responses.search_content("her2", 1, matches)
+    expected = SearchResponse.model_validate(
+        {"query": "her2", "top_k": 1, "results": [asdict(match) for match in matches]}
+    ).model_dump()
+
+    assert json.loads(responses.dumps(content)) == expected
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(responses.dumps(content)) == expected
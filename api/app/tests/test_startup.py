@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from api.app import dependencies, metrics
+from api.app.main import create_app
+from api.app.services.embedding import EmbeddingClient
+from api.app.services.local_index import LocalChunk, LocalVectorIndex
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+DATABASE_MODULES = ("sqlalchemy", "psycopg")
+
+
+def test_importing_the_app_does_not_load_the_database_stack() -> None:
+    code = "import sys, api.app.main; print(' '.join(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+
+    loaded = {name.split(".")[0] for name in output.split()}
+    assert not loaded.intersection(DATABASE_MODULES)
+
+
+def test_lifespan_warms_the_local_index_before_serving(tmp_path, monkeypatch) -> None:
+    texts = ["EGFR exon 19 deletion osimertinib", "HER2 positive trastuzumab"]
+    chunks = [
+        LocalChunk(row, text, row, "Guideline", "NCCN", None) for row, text in enumerate(texts)
+    ]
+    LocalVectorIndex.build(EmbeddingClient().embed_batch(texts), chunks).save(tmp_path)
+
+    monkeypatch.setenv(dependencies.SEARCH_BACKEND_ENV, "local")
+    monkeypatch.setenv(dependencies.LOCAL_INDEX_PATH_ENV, str(tmp_path))
+    dependencies._get_local_index.cache_clear()
+    metrics.REGISTRY.reset()
+    try:
+        with TestClient(create_app()) as client:
+            assert dependencies._get_local_index.cache_info().currsize == 1
+            assert metrics.STAGE_SECONDS.count(stage="startup.local_index") == 1
+            assert metrics.STAGE_SECONDS.count(stage="startup.embedder") == 1
+
+            response = client.get("/health")
+            assert response.status_code == 200
+            assert response.json() == {"status": "ok"}
+    finally:
+        dependencies._get_local_index.cache_clear()
+
+
+def test_failed_warm_up_starts_the_app_but_reports_unhealthy(monkeypatch, capsys) -> None:
+    monkeypatch.setenv(dependencies.SEARCH_BACKEND_ENV, "local")
+    monkeypatch.delenv(dependencies.LOCAL_INDEX_PATH_ENV, raising=False)
+    dependencies._get_local_index.cache_clear()
+
+    with TestClient(create_app()) as client:
+        response = client.get("/health")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warm-up failed"
+        assert dependencies.LOCAL_INDEX_PATH_ENV in response.json()["error"]
+
+    captured = capsys.readouterr()
+    assert "warm-up failed" in captured.out
+    assert "Traceback (most recent call last)" in captured.err
+
+
+def test_warm_up_can_be_disabled(monkeypatch) -> None:
+    monkeypatch.setenv(dependencies.WARMUP_ENV, "0")
+    metrics.REGISTRY.reset()
+
+    with TestClient(create_app()) as client:
+        assert client.get("/health").status_code == 200
+
+    assert metrics.STAGE_SECONDS.count(stage="startup.embedder") == 0
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from api.app.services.index import FILTER_INDEXES, AnnIndexSpec, lexical_index_sql
+from api.app.storage import MIGRATION_LOCK_KEY, discover_migrations, migrate, psycopg_url
+
+
+RECORD_PATTERN = re.compile(
+    r"INSERT INTO schema_migrations \(version, name\) VALUES \((\d+), '(\w+)'\)"
+)
+
+
+class FakeCursor:
+    def __init__(self, conn: "FakeConnection") -> None:
+        self._conn = conn
+        self._rows: list = []
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def execute(self, statement: str, params=None) -> None:
+        self._conn.executed.append((" ".join(statement.split()), params))
+        self._rows = [(version,) for version in self._conn.applied]
+
+    def fetchall(self) -> list:
+        return self._rows
+
+
+class FakeConnection:
+    def __init__(self, applied=()) -> None:
+        self.applied = set(applied)
+        self.executed: list = []
+        self.commits = 0
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+def test_migrations_are_numbered_and_record_themselves() -> None:
+    migrations = discover_migrations()
+
+    assert [migration.version for migration in migrations] == list(
+        range(1, len(migrations) + 1)
+    )
+    for migration in migrations:
+        recorded = RECORD_PATTERN.search(migration.sql())
+        assert recorded is not None, migration.label
+        assert (int(recorded.group(1)), recorded.group(2)) == (migration.version, migration.name)
+
+
+def test_migrate_applies_only_pending_scripts_in_one_transaction() -> None:
+    conn = FakeConnection(applied={1})
+
+    applied = migrate(conn)
+
+    assert [migration.version for migration in applied] == [
+        migration.version for migration in discover_migrations()[1:]
+    ]
+    statements = [statement for statement, _ in conn.executed]
+    assert conn.executed[0] == ("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+    assert not any("CREATE TABLE IF NOT EXISTS documents" in s for s in statements)
+    assert conn.commits == 1
+
+    assert migrate(FakeConnection(applied={m.version for m in discover_migrations()})) == []
+
+
+def test_discover_migrations_rejects_gaps(tmp_path) -> None:
+    (tmp_path / "0001_first.sql").write_text("SELECT 1;")
+    (tmp_path / "0003_third.sql").write_text("SELECT 3;")
+
+    with pytest.raises(ValueError):
+        discover_migrations(tmp_path)
+
+
+def test_migrations_create_the_indexes_search_expects() -> None:
+    schema = " ".join(" ".join(m.sql() for m in discover_migrations()).split())
+
+    assert f"CREATE INDEX IF NOT EXISTS {AnnIndexSpec().name}" in schema
+    assert lexical_index_sql(concurrently=False)[1] in schema
+    for name, table, column, covered in FILTER_INDEXES:
+        assert f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})" in schema
+        if covered:
+            assert f"INCLUDE ({', '.join(covered)})" in schema
+    # Search reads the catalogue fields copied onto chunks, never documents.
+    assert "document_title TEXT NOT NULL" in schema
+    assert "CREATE TRIGGER documents_copy_to_chunks" in schema
+
+
+def test_psycopg_url_drops_the_sqlalchemy_driver() -> None:
+    assert psycopg_url("postgresql+asyncpg://app:s3cret@db:5432/karkinos") == (
+        "postgresql://app:s3cret@db:5432/karkinos"
+    )
+    assert psycopg_url("postgresql://db/karkinos") == "postgresql://db/karkinos"
+    assert psycopg_url("host=db dbname=karkinos") == "host=db dbname=karkinos"
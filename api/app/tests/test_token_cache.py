@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import pytest
+
+from api.app.services.embedding import EmbeddingClient
+from api.app.services.token_cache import TokenHashCache, token_hash
+
+
+def test_token_cache_counts_hits_and_evicts_least_recently_used() -> None:
+    cache = TokenHashCache(maxsize=2)
+
+    assert cache.lookup("egfr") == token_hash("egfr")
+    cache.lookup("alk")
+    cache.lookup("egfr")
+    cache.lookup("ros1")
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (1, 3, 1)
+    assert "egfr" in cache and "ros1" in cache and "alk" not in cache
+    assert stats.hit_rate == pytest.approx(0.25)
+
+
+def test_load_vocabulary_warms_cache_without_counting_lookups(tmp_path) -> None:
+    vocab = tmp_path / "oncology.vocab"
+    vocab.write_text("Osimertinib\nPD-L1 HER2\n\nher2\n", encoding="utf-8")
+    cache = TokenHashCache()
+
+    assert cache.load_vocabulary(vocab) == 3
+    assert cache.stats().misses == 0
+
+    cache.lookup("pd-l1")
+    assert cache.stats().hits == 1
+
+
+@pytest.mark.asyncio
+async def test_embedders_share_an_injected_cache() -> None:
+    cache = TokenHashCache()
+    small = EmbeddingClient(dimensions=32, token_cache=cache)
+    large = EmbeddingClient(dimensions=1536, token_cache=cache)
+
+    await small.embed("trastuzumab deruxtecan")
+    large.embed_batch(["trastuzumab deruxtecan"])
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (2, 2)
@@ -0,0 +1,152 @@
+"""Recall-vs-latency sweep for pgvector ANN indexes on a synthetic corpus.
+
+Run with ``DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.ann_recall``.
+A clustered synthetic corpus is loaded into a scratch table, exact top-k
+neighbours are computed with index scans disabled, and then each
+``ef_search`` (HNSW) or ``probes`` (IVFFlat) value is timed and scored with
+recall@k against the exact results.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from api.app.services.index import AnnIndexManager, AnnIndexSpec, search_settings_sql
+
+TABLE = "ann_benchmark_chunks"
+
+
+def vector_literal(values: np.ndarray) -> str:
+    return "[" + ",".join(f"{value:.6f}" for value in values) + "]"
+
+
+def synthetic_corpus(rows: int, dimension: int, clusters: int, seed: int) -> np.ndarray:
+    """Unit vectors drawn around a few centroids, mimicking topical chunks."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.normal(size=(clusters, dimension))
+    assignments = rng.integers(0, clusters, size=rows)
+    vectors = centroids[assignments] + rng.normal(scale=0.6, size=(rows, dimension))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+async def load_corpus(engine: AsyncEngine, vectors: np.ndarray) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        await conn.execute(
+            text(f"CREATE TABLE {TABLE} (id BIGINT PRIMARY KEY, embedding vector({vectors.shape[1]}))")
+        )
+        insert = text(f"INSERT INTO {TABLE} (id, embedding) VALUES (:id, CAST(:embedding AS vector))")
+        for start in range(0, len(vectors), 1000):
+            await conn.execute(
+                insert,
+                [
+                    {"id": start + offset, "embedding": vector_literal(vector)}
+                    for offset, vector in enumerate(vectors[start : start + 1000])
+                ],
+            )
+
+
+async def top_k(
+    engine: AsyncEngine, query: np.ndarray, k: int, settings: str | None
+) -> tuple[list[int], float]:
+    statement = text(
+        f"SELECT id FROM {TABLE} ORDER BY embedding <-> CAST(:query AS vector) LIMIT :k"
+    )
+    async with engine.begin() as conn:
+        if settings:
+            await conn.execute(text(settings))
+        started = time.perf_counter()
+        result = await conn.execute(statement, {"query": vector_literal(query), "k": k})
+        ids = [row.id for row in result]
+        elapsed = (time.perf_counter() - started) * 1000
+    return ids, elapsed
+
+
+async def sweep(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.db_url)
+    try:
+        corpus = synthetic_corpus(args.rows, args.dimension, args.clusters, seed=7)
+        queries = synthetic_corpus(args.queries, args.dimension, args.clusters, seed=11)
+        await load_corpus(engine, corpus)
+
+        exact_settings = search_settings_sql(exact=True)
+        truth = []
+        exact_latencies = []
+        for query in queries:
+            ids, elapsed = await top_k(engine, query, args.k, exact_settings)
+            truth.append(set(ids))
+            exact_latencies.append(elapsed)
+        print(f"exact              p50={statistics.median(exact_latencies):8.2f}ms recall@{args.k}=1.000")
+
+        spec = AnnIndexSpec(
+            method=args.method,
+            table=TABLE,
+            m=args.m,
+            ef_construction=args.ef_construction,
+            lists=args.lists,
+        )
+        manager = AnnIndexManager(engine)
+        started = time.perf_counter()
+        await manager.create(spec, concurrently=False)
+        print(f"built {spec.name} in {time.perf_counter() - started:.1f}s")
+
+        for value in args.sweep:
+            settings = (
+                search_settings_sql(ef_search=value)
+                if args.method == "hnsw"
+                else search_settings_sql(probes=value)
+            )
+            latencies = []
+            recalls = []
+            for query, expected in zip(queries, truth):
+                ids, elapsed = await top_k(engine, query, args.k, settings)
+                latencies.append(elapsed)
+                recalls.append(len(expected.intersection(ids)) / args.k)
+            knob = "ef_search" if args.method == "hnsw" else "probes"
+            print(
+                f"{knob}={value:<8} p50={statistics.median(latencies):8.2f}ms "
+                f"recall@{args.k}={statistics.fmean(recalls):.3f}"
+            )
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--method", choices=("hnsw", "ivfflat"), default="hnsw")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--lists", type=int, default=100)
+    parser.add_argument(
+        "--sweep",
+        type=int,
+        nargs="+",
+        default=[10, 20, 40, 80, 160, 320],
+        help="ef_search (hnsw) or probes (ivfflat) values to test",
+    )
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch table")
+    args = parser.parse_args()
+    if not args.db_url:
+        parser.error("--db-url or DATABASE_URL is required")
+    asyncio.run(sweep(args))
+
+
+if __name__ == "__main__":
+    main()
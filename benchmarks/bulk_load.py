@@ -0,0 +1,103 @@
+"""Compare row-by-row upserts with the binary COPY bulk loader.
+
+Run with ``python -m benchmarks.bulk_load --rows 20000``.  When ``--db-url``
+(or ``DATABASE_URL``) is set both strategies are timed against PostgreSQL;
+otherwise only the bulk loader is exercised against an in-memory sink, which
+measures the client side encoding cost.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import List
+from uuid import uuid4
+
+from ingestion.bulk import BulkLoader
+from ingestion.ingest import VECTOR_DIMENSION, ChunkRecord, generate_embedding, upsert_embeddings
+
+
+class _NullCopy:
+    def __init__(self) -> None:
+        self.bytes_written = 0
+
+    def __enter__(self) -> "_NullCopy":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def write(self, data: bytes) -> None:
+        self.bytes_written += len(data)
+
+
+class _NullCursor:
+    def __enter__(self) -> "_NullCursor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def execute(self, statement: str, params=None) -> None:
+        return None
+
+    def copy(self, statement: str) -> _NullCopy:
+        return _NullCopy()
+
+
+class NullConnection:
+    """Connection stand-in that discards everything written to it."""
+
+    def cursor(self) -> _NullCursor:
+        return _NullCursor()
+
+    def commit(self) -> None:
+        return None
+
+
+def synthetic_records(rows: int, dimension: int = VECTOR_DIMENSION) -> List[ChunkRecord]:
+    return [
+        ChunkRecord(
+            id=str(uuid4()),
+            document_path="benchmarks/synthetic.txt",
+            chunk_index=index,
+            content=f"Synthetic oncology chunk {index}",
+            embedding=generate_embedding(f"chunk-{index}", dimension),
+        )
+        for index in range(rows)
+    ]
+
+
+def _time(label: str, rows: int, func) -> None:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"))
+    args = parser.parse_args()
+
+    records = synthetic_records(args.rows)
+
+    if not args.db_url:
+        loader = BulkLoader(NullConnection(), batch_size=args.batch_size, progress=None)
+        _time("bulk (null)", args.rows, lambda: loader.load(records))
+        return
+
+    _time("row-by-row", args.rows, lambda: upsert_embeddings(records, db_url=args.db_url))
+    _time(
+        "bulk",
+        args.rows,
+        lambda: upsert_embeddings(
+            records, db_url=args.db_url, bulk=True, batch_size=args.batch_size
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Throughput and memory of the offset-based chunker on large documents.
+
+Run with ``python -m benchmarks.chunker --megabytes 300``.  A synthetic
+guideline with headings and paragraphs is written to a temporary file and
+chunked twice: by the previous approach (read the whole file, collapse
+whitespace with ``" ".join(text.split())`` and slice characters) and by
+:func:`ingestion.text.chunk_file`, which memory-maps the file and decodes
+only the chunks.  Peak Python heap is measured with ``tracemalloc``; the
+mapped file itself is page cache, not heap.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterator
+
+from ingestion.text import chunk_file
+
+WORDS = (
+    "EGFR exon 19 deletion osimertinib PD-L1 expression pembrolizumab HER2 positive "
+    "trastuzumab adjuvant neoadjuvant chemotherapy radiotherapy metastatic stage node "
+    "recommended preferred regimen patients disease progression survival response"
+).split()
+
+
+def write_guideline(path: Path, megabytes: int, seed: int = 7) -> int:
+    """Write numbered sections of sentence paragraphs until *megabytes* is reached."""
+    rng = random.Random(seed)
+    target = megabytes * 2**20
+    written = 0
+    with path.open("w", encoding="utf-8") as fp:
+        section = 0
+        while written < target:
+            section += 1
+            parts = [f"{section}.1 Treatment Of Stage {section % 4 + 1} Disease\n\n"]
+            for _ in range(rng.randint(3, 12)):
+                sentences = (
+                    " ".join(rng.choices(WORDS, k=rng.randint(8, 30))).capitalize() + "."
+                    for _ in range(rng.randint(2, 8))
+                )
+                parts.append(" ".join(sentences) + "\n\n")
+            block = "".join(parts)
+            fp.write(block)
+            written += len(block)
+    return written
+
+
+def legacy_chunks(path: Path, chunk_size: int, overlap: int) -> Iterator[str]:
+    normalised = " ".join(path.read_text(encoding="utf-8", errors="ignore").split())
+    start = 0
+    while start < len(normalised):
+        end = start + chunk_size
+        yield normalised[start:end]
+        if end >= len(normalised):
+            break
+        start = end - overlap
+
+
+def offset_chunks(path: Path, chunk_size: int, overlap: int) -> Iterator[str]:
+    for chunk in chunk_file(path, chunk_size, overlap):
+        yield chunk.text
+
+
+def measure(chunker: Callable[[Path, int, int], Iterator[str]], path: Path, args) -> tuple:
+    started = time.perf_counter()
+    count = sum(1 for _ in chunker(path, args.chunk_size, args.overlap))
+    elapsed = time.perf_counter() - started
+    # A second pass under tracemalloc, which would distort the timing.
+    tracemalloc.start()
+    for _ in chunker(path, args.chunk_size, args.overlap):
+        pass
+    _size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=int, default=300)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=200)
+    parser.add_argument(
+        "--skip-legacy", action="store_true", help="Only run the offset-based chunker"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "guideline.txt"
+        size = write_guideline(path, args.megabytes)
+        print(f"document: {size / 2**20:,.0f} MiB")
+
+        chunkers = [("offset + mmap", offset_chunks)]
+        if not args.skip_legacy:
+            chunkers.insert(0, ("read + split + slice", legacy_chunks))
+        for name, chunker in chunkers:
+            count, elapsed, peak = measure(chunker, path, args)
+            print(
+                f"{name:<22} {count:>9,} chunks {elapsed:>7.2f}s "
+                f"{size / 2**20 / elapsed:>7.1f} MiB/s  peak heap {peak / 2**20:>8.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+"""Generate a synthetic oncology corpus, from 10k to 10M chunks.
+
+Run with ``python -m benchmarks.corpus --chunks 100000 --local-index data/bench/index``.
+Chunks read like guideline and trial text: drugs, biomarkers, stages and
+outcomes drawn per cancer type, grouped into documents with a title,
+source and cancer type.  Every chunk is derived from ``(seed, chunk id)``
+alone, so any slice can be regenerated independently and two runs with the
+same arguments produce the same corpus.  Generation streams, so memory does
+not grow with ``--chunks``, except for ``--local-index``, which holds the
+float32 matrix (about 6 KiB per chunk, 61 GB at 10M) in memory.
+
+Outputs, any combination of:
+
+``--text-dir``
+    One text file per document, for ``python -m ingestion.ingest``.
+``--jsonl``
+    One chunk per line with its document metadata.
+``--local-index``
+    A snapshot for ``SEARCH_BACKEND=local``, embedded with the API's query
+    embedder.
+``--db-url``
+    Documents and embedded chunks copied into the tables ingestion writes
+    and the search service reads, for benchmarks against a local Postgres
+    container.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from . import results
+
+DEFAULT_SEED = 20240601
+DEFAULT_CHUNK_CHARS = 1000
+CHUNKS_PER_DOCUMENT = 24
+EMBED_BATCH = 512
+
+# (cancer type, how the text names it, biomarkers, drugs)
+CANCERS: Tuple[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]], ...] = (
+    (
+        "Breast",
+        "breast cancer",
+        ("HER2", "ER", "PR", "BRCA1", "BRCA2", "PIK3CA", "ESR1"),
+        ("trastuzumab", "pertuzumab", "tamoxifen", "letrozole", "olaparib", "alpelisib"),
+    ),
+    (
+        "NSCLC",
+        "non-small cell lung cancer",
+        ("EGFR exon 19", "ALK", "ROS1", "KRAS G12C", "PD-L1", "MET exon 14"),
+        ("osimertinib", "alectinib", "crizotinib", "sotorasib", "pembrolizumab", "capmatinib"),
+    ),
+    (
+        "Melanoma",
+        "melanoma",
+        ("BRAF V600E", "NRAS", "KIT", "PD-L1"),
+        ("dabrafenib", "trametinib", "nivolumab", "ipilimumab", "vemurafenib"),
+    ),
+    (
+        "Colorectal",
+        "colorectal cancer",
+        ("KRAS", "NRAS", "MSI-H", "BRAF V600E", "HER2"),
+        ("cetuximab", "bevacizumab", "FOLFOX", "FOLFIRI", "encorafenib", "pembrolizumab"),
+    ),
+    (
+        "Prostate",
+        "prostate cancer",
+        ("BRCA2", "AR-V7", "PSMA", "ATM"),
+        ("enzalutamide", "abiraterone", "docetaxel", "olaparib", "lutetium-177 PSMA"),
+    ),
+    (
+        "Ovarian",
+        "ovarian cancer",
+        ("BRCA1", "BRCA2", "HRD", "FRα"),
+        ("olaparib", "niraparib", "carboplatin", "paclitaxel", "mirvetuximab"),
+    ),
+    (
+        "Lymphoma",
+        "diffuse large B-cell lymphoma",
+        ("CD20", "MYC", "BCL2", "CD19"),
+        ("rituximab", "R-CHOP", "polatuzumab", "axicabtagene ciloleucel"),
+    ),
+    (
+        "Pancreatic",
+        "pancreatic cancer",
+        ("KRAS", "BRCA2", "NTRK", "MSI-H"),
+        ("FOLFIRINOX", "gemcitabine", "nab-paclitaxel", "olaparib", "larotrectinib"),
+    ),
+)
+SOURCES = ("NCCN", "ASCO", "ESMO", "PubMed", "FDA label", "ClinicalTrials.gov")
+STAGES = ("early-stage", "locally advanced", "metastatic", "recurrent", "stage III", "stage IV")
+TOXICITIES = (
+    "neutropenia", "diarrhea", "rash", "pneumonitis", "hepatotoxicity", "fatigue",
+    "cardiotoxicity", "peripheral neuropathy",
+)
+SECTIONS = (
+    "Background", "Diagnosis and staging", "Biomarker testing", "First-line therapy",
+    "Subsequent therapy", "Adverse events", "Follow-up", "Evidence summary",
+)
+TITLE_FORMS = (
+    "{source} guidelines: {cancer}",
+    "Management of {stage} {cancer}",
+    "{drug} in {marker}-positive {cancer}",
+    "Phase {phase} trial of {drug} in {cancer}",
+)
+SENTENCES = (
+    "{drug} is recommended for {stage} {cancer} with {marker} alterations.",
+    "In the phase {phase} trial, {drug} improved median progression-free survival to "
+    "{months} months versus {months2} months with {drug2}.",
+    "Patients with {marker}-positive {cancer} should be tested before starting {drug}.",
+    "Grade {grade} {toxicity} occurred in {pct}% of patients receiving {drug}.",
+    "Consider {drug} plus {drug2} after progression on first-line therapy.",
+    "The objective response rate was {pct}% (95% CI, {low}-{high}) in {marker}-altered disease.",
+    "Dose reductions of {drug} are advised for persistent {toxicity}.",
+    "{stage} {cancer} requires multidisciplinary review before {drug} is started.",
+    "Overall survival at {months} months was {pct}% in the {drug} arm.",
+    "Monitor for {toxicity} every {weeks} weeks while on {drug}.",
+)
+
+
+@dataclass(frozen=True)
+class SyntheticDocument:
+    id: int
+    title: str
+    source: str
+    cancer_type: str
+
+
+@dataclass(frozen=True)
+class SyntheticChunk:
+    chunk_id: int
+    chunk_index: int
+    text: str
+    document: SyntheticDocument
+
+
+def _rng(seed: int, kind: int, number: int) -> random.Random:
+    return random.Random((seed * 1_000_003 + kind) * 10_000_019 + number)
+
+
+class _Fields(dict):
+    """Template fields drawn on first use, so a sentence only pays for its own."""
+
+    def __init__(self, rng: random.Random, cancer: int) -> None:
+        super().__init__()
+        self.rng = rng
+        self.cancer = CANCERS[cancer]
+
+    def __missing__(self, name: str) -> object:
+        rng = self.rng
+        _, phrase, markers, drugs = self.cancer
+        if name == "cancer":
+            value: object = phrase
+        elif name == "marker":
+            value = rng.choice(markers)
+        elif name in ("drug", "drug2"):
+            value = rng.choice(drugs)
+            if name == "drug2" and value == self.get("drug"):
+                value = drugs[(drugs.index(value) + 1) % len(drugs)]
+        elif name == "stage":
+            value = rng.choice(STAGES)
+        elif name == "toxicity":
+            value = rng.choice(TOXICITIES)
+        elif name == "source":
+            value = rng.choice(SOURCES)
+        elif name == "phase":
+            value = rng.choice(("II", "III"))
+        elif name in ("months", "pct"):
+            value = rng.randint(6, 40) if name == "months" else rng.randint(5, 85)
+        elif name == "months2":
+            value = max(1, self["months"] - rng.randint(1, 12))
+        elif name == "grade":
+            value = rng.randint(2, 4)
+        elif name == "low":
+            value = max(1, self["pct"] - rng.randint(3, 10))
+        elif name == "high":
+            value = min(99, self["pct"] + rng.randint(3, 10))
+        elif name == "weeks":
+            value = rng.choice((2, 3, 4, 6, 12))
+        else:
+            raise KeyError(name)
+        self[name] = value
+        return value
+
+
+def document(document_id: int, seed: int = DEFAULT_SEED) -> SyntheticDocument:
+    rng = _rng(seed, 1, document_id)
+    cancer = rng.randrange(len(CANCERS))
+    fields = _Fields(rng, cancer)
+    title = rng.choice(TITLE_FORMS).format_map(fields)
+    return SyntheticDocument(
+        document_id,
+        f"{title[0].upper()}{title[1:]} (#{document_id})",
+        fields["source"],
+        CANCERS[cancer][0],
+    )
+
+
+def chunk(
+    chunk_id: int,
+    seed: int = DEFAULT_SEED,
+    chunk_chars: int = DEFAULT_CHUNK_CHARS,
+    chunks_per_document: int = CHUNKS_PER_DOCUMENT,
+    owner: Optional[SyntheticDocument] = None,
+) -> SyntheticChunk:
+    """The *chunk_id*-th chunk, about *chunk_chars* characters of whole sentences."""
+    owner = owner or document(chunk_id // chunks_per_document, seed)
+    rng = _rng(seed, 2, chunk_id)
+    cancer = next(i for i, entry in enumerate(CANCERS) if entry[0] == owner.cancer_type)
+    sentences: List[str] = []
+    size = 0
+    while size < chunk_chars - 60:
+        sentence = rng.choice(SENTENCES).format_map(_Fields(rng, cancer))
+        sentence = sentence[0].upper() + sentence[1:]
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return SyntheticChunk(chunk_id, chunk_id % chunks_per_document, " ".join(sentences), owner)
+
+
+def iter_chunks(
+    count: int,
+    seed: int = DEFAULT_SEED,
+    chunk_chars: int = DEFAULT_CHUNK_CHARS,
+    chunks_per_document: int = CHUNKS_PER_DOCUMENT,
+    start: int = 0,
+) -> Iterator[SyntheticChunk]:
+    owner: Optional[SyntheticDocument] = None
+    for chunk_id in range(start, start + count):
+        document_id = chunk_id // chunks_per_document
+        if owner is None or owner.id != document_id:
+            owner = document(document_id, seed)
+        yield chunk(chunk_id, seed, chunk_chars, chunks_per_document, owner)
+
+
+def iter_document_texts(
+    chunks: int,
+    seed: int = DEFAULT_SEED,
+    chunk_chars: int = DEFAULT_CHUNK_CHARS,
+    chunks_per_document: int = CHUNKS_PER_DOCUMENT,
+) -> Iterator[Tuple[SyntheticDocument, str]]:
+    """Whole documents: a title, section headings and one paragraph per chunk."""
+    parts: List[str] = []
+    current: Optional[SyntheticDocument] = None
+    for item in iter_chunks(chunks, seed, chunk_chars, chunks_per_document):
+        if item.document is not current:
+            if current is not None:
+                yield current, "\n\n".join(parts) + "\n"
+            current = item.document
+            parts = [f"# {current.title}"]
+        if item.chunk_index % 3 == 0:
+            section = SECTIONS[(item.chunk_index // 3) % len(SECTIONS)]
+            parts.append(f"## {section}")
+        parts.append(item.text)
+    if current is not None:
+        yield current, "\n\n".join(parts) + "\n"
+
+
+def sample_queries(count: int, seed: int = DEFAULT_SEED) -> List[str]:
+    """Short clinician-style queries over the corpus vocabulary."""
+    rng = _rng(seed, 3, 0)
+    forms = (
+        "{drug} {marker} {cancer}",
+        "{marker} positive {stage} {cancer}",
+        "{toxicity} with {drug}",
+        "{drug} versus {drug2} progression-free survival",
+        "first line therapy {stage} {cancer}",
+    )
+    return [
+        rng.choice(forms).format_map(_Fields(rng, rng.randrange(len(CANCERS))))
+        for _ in range(count)
+    ]
+
+
+def document_filename(doc: SyntheticDocument) -> str:
+    return f"document-{doc.id:08d}.txt"
+
+
+def write_text_documents(directory: Path, args: argparse.Namespace) -> int:
+    directory.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for doc, text in iter_document_texts(args.chunks, args.seed, args.chunk_chars):
+        (directory / document_filename(doc)).write_text(text, encoding="utf-8")
+        written += 1
+    return written
+
+
+def write_jsonl(path: Path, args: argparse.Namespace) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as fp:
+        for item in iter_chunks(args.chunks, args.seed, args.chunk_chars):
+            fp.write(json.dumps(asdict(item)) + "\n")
+    return args.chunks
+
+
+def iter_embedded(
+    args: argparse.Namespace, batch_size: int = EMBED_BATCH
+) -> Iterator[Tuple[List[SyntheticChunk], np.ndarray]]:
+    from api.app.services.embedding import EmbeddingClient
+
+    embedder = EmbeddingClient()
+    batch: List[SyntheticChunk] = []
+    for item in iter_chunks(args.chunks, args.seed, args.chunk_chars):
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch, embedder.embed_batch([entry.text for entry in batch])
+            batch = []
+    if batch:
+        yield batch, embedder.embed_batch([entry.text for entry in batch])
+
+
+def build_local_index(path: Path, args: argparse.Namespace) -> int:
+    """Write the corpus as a local index snapshot, streaming it to disk.
+
+    As in ``local_index.export_snapshot``, vectors go straight into a
+    memory-mapped ``.npy`` file and chunks through the snapshot's chunk
+    writer, so memory stays flat however many ``--chunks`` are built.
+    """
+    from api.app.services.local_index import (
+        VECTORS,
+        LocalChunk,
+        LocalVectorIndex,
+        _ChunkWriter,
+        _write_manifest,
+    )
+
+    path.mkdir(parents=True, exist_ok=True)
+    vectors: Optional[np.ndarray] = None
+    writer = _ChunkWriter(path, args.chunks)
+    rows = 0
+    for batch, embeddings in iter_embedded(args):
+        if vectors is None:
+            shape = (args.chunks, embeddings.shape[1])
+            vectors = np.lib.format.open_memmap(
+                path / VECTORS, mode="w+", dtype=np.float32, shape=shape
+            )
+        # The embedder's rows are already unit length, as the cosine metric expects.
+        vectors[rows : rows + len(batch)] = embeddings
+        rows += len(batch)
+        for item in batch:
+            writer.write(
+                LocalChunk(
+                    item.chunk_id,
+                    item.text,
+                    item.document.id,
+                    item.document.title,
+                    item.document.source,
+                    item.document.cancer_type,
+                )
+            )
+    columns = writer.close()
+    if vectors is None:
+        return 0
+    vectors.flush()
+    _write_manifest(
+        path,
+        rows=rows,
+        dimension=vectors.shape[1],
+        metric="cosine",
+        quantized=False,
+        graph=False,
+        entry_points=[],
+        **columns.labels(),
+    )
+    if args.graph_degree:
+        index = LocalVectorIndex.load(path)
+        index.build_graph(args.graph_degree)
+        index.save_parts(path, graph=True)
+    return rows
+
+
+DOCUMENTS_COPY = "COPY documents (id, path, title, source, cancer_type) FROM STDIN"
+CHUNKS_COPY = (
+    "COPY chunks (id, chunk_key, document_id, chunk_index, body, embedding, "
+    "document_title, source, cancer_type) FROM STDIN"
+)
+# Rows are copied with the corpus ids, so move the identity sequences past them.
+RESET_SEQUENCES = (
+    "SELECT setval(pg_get_serial_sequence('documents', 'id'), max(id)) FROM documents",
+    "SELECT setval(pg_get_serial_sequence('chunks', 'id'), max(id)) FROM chunks",
+)
+
+
+def load_postgres(db_url: str, args: argparse.Namespace) -> int:  # pragma: no cover
+    """Copy the corpus into the ``documents`` and ``chunks`` tables.
+
+    Pending storage migrations are applied first; the tables should be
+    empty.  For large corpora drop the ANN index before the load and build
+    it afterwards, see ``python -m api.app.services.index``.
+    """
+    import psycopg
+
+    from api.app import storage
+    from api.app.services.search import vector_literal
+
+    loaded = 0
+    with psycopg.connect(storage.psycopg_url(db_url)) as conn:
+        storage.migrate(conn)
+        with conn.cursor() as cur:
+            with cur.copy(DOCUMENTS_COPY) as copy:
+                seen = -1
+                for item in iter_chunks(args.chunks, args.seed, args.chunk_chars):
+                    if item.document.id != seen:
+                        seen = item.document.id
+                        doc = item.document
+                        copy.write_row(
+                            (
+                                doc.id,
+                                f"benchmarks/corpus/{document_filename(doc)}",
+                                doc.title,
+                                doc.source,
+                                doc.cancer_type,
+                            )
+                        )
+            with cur.copy(CHUNKS_COPY) as copy:
+                for batch, embeddings in iter_embedded(args):
+                    for item, embedding in zip(batch, embeddings):
+                        doc = item.document
+                        copy.write_row(
+                            (
+                                item.chunk_id,
+                                str(UUID(int=item.chunk_id)),
+                                doc.id,
+                                item.chunk_index,
+                                item.text,
+                                vector_literal(embedding.tolist()),
+                                doc.title,
+                                doc.source,
+                                doc.cancer_type,
+                            )
+                        )
+                    loaded += len(batch)
+            for statement in RESET_SEQUENCES:
+                cur.execute(statement)
+            cur.execute(storage.BUMP_CORPUS_GENERATION_SQL)
+        conn.commit()
+    return loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=10_000, help="Chunks to generate")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--chunk-chars", type=int, default=DEFAULT_CHUNK_CHARS)
+    parser.add_argument("--text-dir", type=Path, help="Write one text file per document here")
+    parser.add_argument("--jsonl", type=Path, help="Write one chunk per line here")
+    parser.add_argument("--local-index", type=Path, help="Write a local index snapshot here")
+    parser.add_argument(
+        "--graph-degree", type=int, default=0, help="Also build the local index's search graph"
+    )
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"),
+                        help="Load documents and embedded chunks into this database")
+    results.add_output_argument(parser)
+    args = parser.parse_args()
+
+    outputs: List[Tuple[str, Path | str, object]] = []
+    if args.text_dir:
+        outputs.append(("text documents", args.text_dir, write_text_documents))
+    if args.jsonl:
+        outputs.append(("jsonl chunks", args.jsonl, write_jsonl))
+    if args.local_index:
+        outputs.append(("local index", args.local_index, build_local_index))
+    if args.db_url:
+        outputs.append(("postgres chunks", args.db_url, load_postgres))
+    if not outputs:
+        parser.error("Choose at least one of --text-dir, --jsonl, --local-index, --db-url")
+
+    measured = []
+    for name, target, write in outputs:
+        started = time.perf_counter()
+        count = write(target, args)  # type: ignore[operator]
+        seconds = time.perf_counter() - started
+        print(f"{name:<16} {count:>10,} in {seconds:8.2f}s ({count / seconds:,.0f}/s)")
+        measured.append({"name": name, "items": count, "seconds": seconds,
+                         "items_per_second": count / seconds if seconds else 0.0})
+    results.save("corpus", args, {"outputs": measured})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Measure embedding throughput of the ingestion pipeline per worker count.
+
+Run with ``python -m benchmarks.embedding_workers --chunks 5000``.  Each worker
+count embeds the same synthetic chunks through ``embed_chunks`` and reports
+chunks per second and the speed-up over the serial path.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from ingestion.ingest import DEFAULT_EMBED_BATCH, ChunkRecord, embed_chunks
+
+
+def _worker_counts(limit: int) -> list[int]:
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--embed-batch", type=int, default=DEFAULT_EMBED_BATCH)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    chunks = [
+        ChunkRecord(
+            id=str(index),
+            document_path="benchmarks/synthetic.txt",
+            chunk_index=index,
+            content=f"Synthetic oncology chunk {index} EGFR HER2 PD-L1",
+            embedding=[],
+        )
+        for index in range(args.chunks)
+    ]
+
+    baseline = None
+    for workers in _worker_counts(args.max_workers):
+        started = time.perf_counter()
+        for _ in embed_chunks(chunks, workers=workers, batch_size=args.embed_batch):
+            pass
+        elapsed = time.perf_counter() - started
+        rate = args.chunks / elapsed
+        baseline = baseline or rate
+        print(f"workers={workers:<3} {rate:>10,.0f} chunks/s  speed-up x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Throughput of each ingestion stage on the synthetic corpus.
+
+Run with ``python -m benchmarks.ingest_throughput --chunks 20000``.  The
+stages are timed one at a time on the same generated documents:
+
+``chunk_text``
+    Splitting whole documents into chunks (MB/s and chunks/s).
+``generate_embedding``
+    The seeded per-chunk embedding used by ``ingestion.ingest``, on
+    ``--embed-sample`` chunks because it is pure Python.
+``EmbeddingClient.embed`` / ``EmbeddingClient.embed_batch``
+    The token-hash query embedder, per text and in batches.
+``upsert_embeddings``
+    With ``--db-url`` (or ``DATABASE_URL``), the row-by-row and bulk COPY
+    paths against Postgres, after applying pending storage migrations.
+    Without a database the bulk loader encodes into a null connection, which
+    measures the client-side cost only.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+
+from api.app.services.embedding import EmbeddingClient
+from ingestion.bulk import DEFAULT_BATCH_SIZE, BulkLoader
+from ingestion.ingest import (
+    DEFAULT_EMBED_BATCH,
+    ChunkRecord,
+    chunk_text,
+    generate_embedding,
+    upsert_embeddings,
+)
+
+from . import corpus, results
+from .bulk_load import NullConnection
+
+
+def timed(
+    name: str, items: Optional[int], func: Callable[[], Any], size_bytes: Optional[int] = None
+) -> Dict[str, Any]:
+    """Run *func* once; *items* of ``None`` counts what *func* returns."""
+    started = time.perf_counter()
+    produced = func()
+    seconds = time.perf_counter() - started
+    if items is None:
+        items = produced
+    result: Dict[str, Any] = {
+        "name": name,
+        "items": items,
+        "seconds": seconds,
+        "items_per_second": items / seconds if seconds else 0.0,
+    }
+    line = f"{name:<32} {items:>9,} in {seconds:8.2f}s ({result['items_per_second']:>10,.0f}/s"
+    if size_bytes is not None:
+        result["megabytes_per_second"] = size_bytes / 2**20 / seconds if seconds else 0.0
+        line += f", {result['megabytes_per_second']:.1f} MB/s"
+    print(line + ")")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20_000, help="Corpus size in chunks")
+    parser.add_argument("--seed", type=int, default=corpus.DEFAULT_SEED)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="chunk_text chunk size")
+    parser.add_argument("--overlap", type=int, default=200, help="chunk_text overlap")
+    parser.add_argument(
+        "--embed-sample", type=int, default=500, help="Chunks embedded with generate_embedding"
+    )
+    parser.add_argument("--embed-batch", type=int, default=DEFAULT_EMBED_BATCH)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Upsert batch")
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"))
+    results.add_output_argument(parser)
+    args = parser.parse_args()
+
+    documents = [text for _, text in corpus.iter_document_texts(args.chunks, args.seed)]
+    size = sum(len(text.encode("utf-8")) for text in documents)
+    print(f"Corpus: {len(documents):,} document(s), {size / 2**20:.1f} MB")
+
+    chunks: List[str] = []
+
+    def split() -> int:
+        for text in documents:
+            chunks.extend(chunk_text(text, args.chunk_size, args.overlap))
+        return len(chunks)
+
+    stages = [timed("chunk_text", None, split, size_bytes=size)]
+
+    sample = chunks[: args.embed_sample]
+    stages.append(
+        timed("generate_embedding", len(sample), lambda: [generate_embedding(c) for c in sample])
+    )
+
+    embedder = EmbeddingClient()
+
+    async def embed_each() -> None:
+        for text in chunks:
+            await embedder.embed(text)
+
+    stages.append(timed("EmbeddingClient.embed", len(chunks), lambda: asyncio.run(embed_each())))
+
+    vectors = np.empty((len(chunks), embedder.dimensions), dtype=np.float32)
+
+    def embed_batches() -> None:
+        for start in range(0, len(chunks), args.embed_batch):
+            batch = chunks[start : start + args.embed_batch]
+            vectors[start : start + len(batch)] = embedder.embed_batch(batch)
+
+    stages.append(timed("EmbeddingClient.embed_batch", len(chunks), embed_batches))
+
+    records = [
+        ChunkRecord(
+            id=str(uuid4()),
+            document_path=f"benchmarks/corpus/{index // corpus.CHUNKS_PER_DOCUMENT}.txt",
+            chunk_index=index % corpus.CHUNKS_PER_DOCUMENT,
+            content=text,
+            embedding=vector,
+        )
+        for index, (text, vector) in enumerate(zip(chunks, vectors))
+    ]
+    if args.db_url:
+        stages.append(
+            timed(
+                "upsert_embeddings (row-by-row)",
+                len(records),
+                lambda: upsert_embeddings(records, db_url=args.db_url, batch_size=args.batch_size),
+            )
+        )
+        stages.append(
+            timed(
+                "upsert_embeddings (bulk)",
+                len(records),
+                lambda: upsert_embeddings(
+                    records, db_url=args.db_url, bulk=True, batch_size=args.batch_size
+                ),
+            )
+        )
+    else:
+        loader = BulkLoader(NullConnection(), batch_size=args.batch_size, progress=None)
+        stages.append(
+            timed("bulk COPY encoding (no database)", len(records), lambda: loader.load(records))
+        )
+
+    results.save(
+        "ingest_throughput",
+        args,
+        {"documents": len(documents), "megabytes": size / 2**20, "stages": stages},
+    )
+
+
+if __name__ == "__main__":
+    main()
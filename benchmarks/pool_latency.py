@@ -0,0 +1,83 @@
+"""Compare /search query latency with NullPool and with a pooled engine.
+
+Run with ``DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.pool_latency``.
+Each configuration runs ``--requests`` searches with ``--concurrency`` in
+flight, opening one session per request exactly like the API dependency, and
+reports p50/p99 latency.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from dataclasses import replace
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from api.app.dependencies import PoolSettings, create_engine_from_settings
+from api.app.services.embedding import EmbeddingClient
+from api.app.services.search import PgVectorSearchService
+
+QUERIES = (
+    "EGFR exon 19 osimertinib",
+    "PD-L1 NSCLC first line",
+    "HER2 positive metastatic breast cancer",
+    "BRAF V600E melanoma adjuvant",
+)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run(database_url: str, settings: PoolSettings, requests: int, concurrency: int) -> list[float]:
+    engine = create_engine_from_settings(database_url, settings)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    embedder = EmbeddingClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            async with sessions() as session:
+                service = PgVectorSearchService(session=session, embedder=embedder)
+                await service.search(QUERIES[index % len(QUERIES)], 5)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    try:
+        await asyncio.gather(*(one(index) for index in range(requests)))
+    finally:
+        await engine.dispose()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    if not args.db_url:
+        parser.error("--db-url or DATABASE_URL is required")
+
+    pooled = PoolSettings.from_env()
+    configurations = {
+        "NullPool": replace(pooled, enabled=False),
+        "pooled": replace(pooled, enabled=True),
+    }
+    for label, settings in configurations.items():
+        latencies = asyncio.run(run(args.db_url, settings, args.requests, args.concurrency))
+        print(
+            f"{label:<9} p50={percentile(latencies, 50):7.2f}ms "
+            f"p99={percentile(latencies, 99):7.2f}ms "
+            f"mean={statistics.fmean(latencies):7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
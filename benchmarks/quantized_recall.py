@@ -0,0 +1,167 @@
+"""Index size, latency and recall of quantized candidate search with re-ranking.
+
+Run with ``DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.quantized_recall``.
+The clustered corpus from :mod:`benchmarks.ann_recall` is loaded into a
+scratch table carrying generated ``halfvec`` and ``bit`` copies of the
+embedding.  An HNSW index is built on each column and every variant is
+timed and scored with recall@k against exact search; the quantized
+variants use the same candidate + full-precision re-rank statement shape
+as the search service.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from api.app.services.index import (
+    QUANTIZATIONS,
+    AnnIndexManager,
+    AnnIndexSpec,
+    Quantization,
+    search_settings_sql,
+)
+
+from .ann_recall import TABLE, load_corpus, synthetic_corpus, vector_literal
+
+
+def statement(quantization: Optional[Quantization], dimension: int):
+    if quantization is None:
+        return text(
+            f"SELECT c.id FROM {TABLE} c "
+            "ORDER BY c.embedding <-> CAST(:query AS vector) LIMIT :k"
+        )
+    order_by = quantization.order_by("CAST(:query AS vector)", dimension)
+    return text(
+        f"""
+        SELECT c.id
+        FROM (SELECT c.* FROM {TABLE} c ORDER BY {order_by} LIMIT :candidates) AS c
+        ORDER BY c.embedding <-> CAST(:query AS vector)
+        LIMIT :k
+        """
+    )
+
+
+async def run(
+    engine: AsyncEngine,
+    queries: np.ndarray,
+    quantization: Optional[Quantization],
+    args: argparse.Namespace,
+    settings: Optional[str],
+    rerank_factor: int = 1,
+) -> tuple[list[list[int]], list[float]]:
+    query = statement(quantization, args.dimension)
+    found, latencies = [], []
+    for vector in queries:
+        async with engine.begin() as conn:
+            if settings:
+                await conn.execute(text(settings))
+            started = time.perf_counter()
+            result = await conn.execute(
+                query,
+                {
+                    "query": vector_literal(vector),
+                    "k": args.k,
+                    "candidates": args.k * rerank_factor,
+                },
+            )
+            found.append([row.id for row in result])
+            latencies.append((time.perf_counter() - started) * 1000)
+    return found, latencies
+
+
+async def index_size(engine: AsyncEngine, name: str) -> int:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT pg_relation_size(CAST(:name AS regclass))"), {"name": name}
+        )
+        return int(result.scalar_one())
+
+
+async def compare(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.db_url)
+    try:
+        corpus = synthetic_corpus(args.rows, args.dimension, args.clusters, seed=7)
+        queries = synthetic_corpus(args.queries, args.dimension, args.clusters, seed=11)
+        await load_corpus(engine, corpus)
+
+        manager = AnnIndexManager(engine)
+        for quantization in QUANTIZATIONS.values():
+            await manager.ensure_quantized_column(quantization, TABLE, args.dimension)
+
+        truth, exact = await run(engine, queries, None, args, search_settings_sql(exact=True))
+        print(
+            f"{'exact':<22} {'':>10} p50={statistics.median(exact):8.2f}ms "
+            f"recall@{args.k}=1.000"
+        )
+
+        variants = [("vector", None)] + [(name, q) for name, q in QUANTIZATIONS.items()]
+        settings = search_settings_sql(ef_search=args.ef_search)
+        for name, quantization in variants:
+            spec = AnnIndexSpec(
+                table=TABLE,
+                column=quantization.column if quantization else "embedding",
+                opclass=quantization.opclass if quantization else "vector_l2_ops",
+                m=args.m,
+                ef_construction=args.ef_construction,
+            )
+            started = time.perf_counter()
+            await manager.create(spec, concurrently=False)
+            built = time.perf_counter() - started
+            size = await index_size(engine, spec.name)
+            factors = args.rerank_factors if quantization else [1]
+            for factor in factors:
+                found, latencies = await run(engine, queries, quantization, args, settings, factor)
+                recall = statistics.fmean(
+                    len(set(expected).intersection(ids)) / args.k
+                    for expected, ids in zip(truth, found)
+                )
+                label = f"{name} x{factor}" if quantization else name
+                print(
+                    f"{label:<22} {size / 2**20:>7.1f}MiB "
+                    f"p50={statistics.median(latencies):8.2f}ms "
+                    f"recall@{args.k}={recall:.3f} (built in {built:.1f}s)"
+                )
+            # One index at a time, so each variant is measured on its own.
+            await manager.drop(spec, concurrently=False)
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--ef-search", type=int, default=100)
+    parser.add_argument(
+        "--rerank-factors",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="Candidates fetched per result from the quantized index",
+    )
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch table")
+    args = parser.parse_args()
+    if not args.db_url:
+        parser.error("--db-url or DATABASE_URL is required")
+    asyncio.run(compare(args))
+
+
+if __name__ == "__main__":
+    main()
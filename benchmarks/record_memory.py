@@ -0,0 +1,98 @@
+"""Memory and serialisation cost of chunk records, list vs float32 embeddings.
+
+Run with ``python -m benchmarks.record_memory --rows 20000``.  The same
+synthetic embeddings are held once as the previous ``List[float]`` records
+and once as slotted ``ChunkRecord`` objects carrying float32 row views, and
+each set is serialised the way ingestion writes it: a pgvector text literal
+for the former and pgvector's binary format for the latter.  Memory is
+measured with ``tracemalloc`` and projected to one million chunks.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+from ingestion.bulk import encode_vector
+from ingestion.ingest import VECTOR_DIMENSION, ChunkRecord
+
+
+@dataclass
+class ListChunkRecord:
+    """Record layout before float32 embeddings: a dict-backed dataclass of floats."""
+
+    id: str
+    document_path: str
+    chunk_index: int
+    content: str
+    embedding: List[float]
+
+
+def vector_literal(values: Sequence[float]) -> str:
+    return "[" + ",".join(f"{value:.6f}" for value in values) + "]"
+
+
+def measure(build: Callable[[], list]) -> Tuple[list, int]:
+    tracemalloc.start()
+    records = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return records, size
+
+
+def throughput(records: list, encode: Callable[[object], object]) -> float:
+    started = time.perf_counter()
+    for record in records:
+        encode(record.embedding)
+    return len(records) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=VECTOR_DIMENSION)
+    parser.add_argument("--encode-rows", type=int, default=2000, help="Rows timed per encoder")
+    args = parser.parse_args()
+
+    def matrix() -> np.ndarray:
+        rng = np.random.default_rng(7)
+        return rng.standard_normal((args.rows, args.dimension), dtype=np.float32)
+
+    def list_records() -> list:
+        return [
+            ListChunkRecord(str(index), "synthetic.txt", index, "chunk", row.tolist())
+            for index, row in enumerate(matrix())
+        ]
+
+    def float32_records() -> list:
+        return [
+            ChunkRecord(str(index), "synthetic.txt", index, "chunk", row)
+            for index, row in enumerate(matrix())
+        ]
+
+    results = []
+    for name, build, encode in (
+        ("list[float] + text literal", list_records, vector_literal),
+        ("float32 + binary", float32_records, encode_vector),
+    ):
+        records, size = measure(build)
+        rate = throughput(records[: args.encode_rows], encode)
+        results.append((name, size / args.rows, rate))
+        del records
+
+    baseline_bytes, baseline_rate = results[0][1], results[0][2]
+    for name, per_record, rate in results:
+        print(
+            f"{name:<28} {per_record:>10,.0f} B/chunk  "
+            f"{per_record * 1e6 / 2**30:>8.2f} GiB per 1M chunks  "
+            f"{rate:>10,.0f} vectors/s encoded  "
+            f"(x{baseline_bytes / per_record:.1f} smaller, x{rate / baseline_rate:.1f} faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
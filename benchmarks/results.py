@@ -0,0 +1,148 @@
+"""JSON result files shared by the benchmark suite, and a comparison CLI.
+
+Every suite benchmark (``corpus``, ``ingest_throughput``, ``search_load``,
+``startup``) writes one file per run to ``--output-dir`` (``BENCHMARK_RESULTS_DIR``,
+default ``benchmarks/results``) named ``<benchmark>-<time>-<commit>.json``.
+Each file records the commit, whether the tree was dirty, the machine and
+the arguments next to the measurements.  Two runs are compared with::
+
+    python -m benchmarks.results OLD.json NEW.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+RESULTS_DIR_ENV = "BENCHMARK_RESULTS_DIR"
+FORMAT_VERSION = 1
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples_ms: Sequence[float]) -> Dict[str, float]:
+    """Count, mean, p50/p95/p99 and max of latencies in milliseconds."""
+    if not samples_ms:
+        return {"count": 0}
+    return {
+        "count": len(samples_ms),
+        "mean_ms": sum(samples_ms) / len(samples_ms),
+        "p50_ms": percentile(samples_ms, 50),
+        "p95_ms": percentile(samples_ms, 95),
+        "p99_ms": percentile(samples_ms, 99),
+        "max_ms": max(samples_ms),
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True, timeout=30
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.strip()
+
+
+def environment() -> Dict[str, Any]:
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def add_output_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--output-dir",
+        default=os.environ.get(RESULTS_DIR_ENV, str(DEFAULT_RESULTS_DIR)),
+        help="Directory for the JSON result file ('' disables)",
+    )
+
+
+def save(
+    benchmark: str, args: argparse.Namespace, results: Dict[str, Any]
+) -> Optional[Path]:
+    """Write *results* for one run of *benchmark* and return the file written."""
+    if not args.output_dir:
+        return None
+    env = environment()
+    started = time.strftime("%Y%m%dT%H%M%S")
+    commit = (env["commit"] or "unknown")[:10]
+    directory = Path(args.output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{benchmark}-{started}-{commit}.json"
+    document = {
+        "format": FORMAT_VERSION,
+        "benchmark": benchmark,
+        "started": started,
+        "environment": env,
+        "arguments": {name: value for name, value in vars(args).items() if name != "output_dir"},
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2, default=str) + "\n", encoding="utf-8")
+    print(f"Results written to {path}")
+    return path
+
+
+def _flatten(value: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        for position, item in enumerate(value):
+            key = item.get("name", position) if isinstance(item, dict) else position
+            yield from _flatten(item, f"{prefix}[{key}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> Iterator[str]:
+    before = dict(_flatten(old["results"]))
+    after = dict(_flatten(new["results"]))
+    width = max((len(name) for name in after), default=0)
+    for name, value in after.items():
+        if name not in before:
+            yield f"{name:<{width}} {'':>14} {value:14.3f}"
+            continue
+        base = before[name]
+        change = f"{(value - base) / base * 100:+7.1f}%" if base else ""
+        yield f"{name:<{width}} {base:14.3f} {value:14.3f} {change}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    args = parser.parse_args()
+
+    old = json.loads(args.old.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    if old["benchmark"] != new["benchmark"]:
+        parser.error(f"Cannot compare {old['benchmark']} with {new['benchmark']}")
+    for side in (old, new):
+        env = side["environment"]
+        dirty = " (dirty)" if env.get("dirty") else ""
+        print(f"{side['started']}  {(env.get('commit') or 'unknown')[:10]}{dirty}")
+    for line in compare(old, new):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Concurrent /search load generator reporting p50/p95/p99 latency.
+
+Run with ``python -m benchmarks.search_load --chunks 50000 --concurrency 16``.
+Without ``--url`` an API server is started under uvicorn in a subprocess:
+
+- by default on the in-memory local backend, over ``--local-index`` or a
+  snapshot of ``--chunks`` synthetic chunks built into a temporary
+  directory (see ``benchmarks.corpus``);
+- with ``--db-url`` on pgvector, over whatever that database holds (load it
+  with ``python -m benchmarks.corpus --db-url ...``).
+
+``--concurrency`` clients then send ``--requests`` searches back to back,
+drawn from ``--distinct-queries`` synthetic queries, after ``--warmup``
+untimed ones.  The spawned server's result cache is shrunk to one entry
+unless ``--cache`` is given, so latencies measure the search itself.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import httpx
+
+from . import corpus, results
+from .upload_latency import free_port, wait_ready
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    queries: Sequence[str],
+    next_request: List[int],
+    total: int,
+    payload: Dict[str, Any],
+    latencies: List[float],
+    errors: List[str],
+) -> None:
+    while next_request[0] < total:
+        number = next_request[0]
+        next_request[0] += 1
+        body = dict(payload, query=queries[number % len(queries)])
+        started = time.perf_counter()
+        try:
+            response = await client.post("/search", json=body)
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            errors.append(f"{type(exc).__name__}: {exc}")
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    queries = corpus.sample_queries(args.distinct_queries, args.seed)
+    payload: Dict[str, Any] = {"top_k": args.top_k, "mode": args.mode}
+    if args.exact:
+        payload["exact"] = True
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        await wait_ready(client)
+        warm: List[float] = []
+        await client_loop(client, queries, [0], args.warmup, payload, warm, [])
+
+        latencies: List[float] = []
+        errors: List[str] = []
+        cursor = [0]
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                client_loop(client, queries, cursor, args.requests, payload, latencies, errors)
+                for _ in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        cache = (await client.get("/search/cache")).json()
+
+    summary = results.latency_summary(latencies)
+    summary.update(
+        {
+            "errors": len(errors),
+            "seconds": elapsed,
+            "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "cache": cache,
+        }
+    )
+    if errors:
+        print(f"{len(errors)} request(s) failed, first: {errors[0]}")
+    return summary
+
+
+def start_server(args: argparse.Namespace, directory: Path) -> tuple[subprocess.Popen, str]:
+    env = dict(os.environ)
+    if not args.cache:
+        env["SEARCH_CACHE_SIZE"] = "1"
+    if args.db_url:
+        env.update(SEARCH_BACKEND="pgvector", DATABASE_URL=args.db_url)
+    else:
+        index_path = args.local_index
+        if index_path is None:
+            index_path = directory / "index"
+            build = argparse.Namespace(
+                chunks=args.chunks, seed=args.seed, chunk_chars=corpus.DEFAULT_CHUNK_CHARS,
+                graph_degree=args.graph_degree,
+            )
+            started = time.perf_counter()
+            corpus.build_local_index(index_path, build)
+            elapsed = time.perf_counter() - started
+            print(f"Built a {args.chunks:,} chunk local index in {elapsed:.1f}s")
+        env.update(SEARCH_BACKEND="local", LOCAL_INDEX_PATH=str(index_path))
+
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "api.app.main:create_app", "--factory",
+            "--port", str(port), "--log-level", "warning", "--workers", str(args.workers),
+        ],
+        env=env,
+    )
+    return server, f"http://127.0.0.1:{port}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Load an already running API instead of starting one")
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"),
+                        help="Start the API on pgvector against this database")
+    parser.add_argument("--local-index", type=Path, help="Existing local index snapshot")
+    parser.add_argument("--chunks", type=int, default=50_000, help="Synthetic index size")
+    parser.add_argument("--graph-degree", type=int, default=0, help="Build the index's graph")
+    parser.add_argument("--seed", type=int, default=corpus.DEFAULT_SEED)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--requests", type=int, default=2000, help="Timed requests")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed requests first")
+    parser.add_argument("--distinct-queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--mode", choices=("vector", "hybrid"), default="vector")
+    parser.add_argument("--exact", action="store_true", help="Request exact scans")
+    parser.add_argument("--cache", action="store_true", help="Keep the server's result cache")
+    results.add_output_argument(parser)
+    args = parser.parse_args()
+
+    if args.url:
+        target = "external"
+        summary = asyncio.run(run(args, args.url))
+    else:
+        target = "pgvector" if args.db_url else "local"
+        with tempfile.TemporaryDirectory() as directory:
+            server, base_url = start_server(args, Path(directory))
+            try:
+                summary = asyncio.run(run(args, base_url))
+            finally:
+                server.terminate()
+                server.wait()
+
+    print(
+        f"{target}: {summary['count']} requests, concurrency {args.concurrency}, "
+        f"{summary['requests_per_second']:,.0f} req/s"
+    )
+    if summary["count"]:
+        print(
+            f"p50={summary['p50_ms']:.2f}ms  p95={summary['p95_ms']:.2f}ms  "
+            f"p99={summary['p99_ms']:.2f}ms  max={summary['max_ms']:.2f}ms"
+        )
+    summary["backend"] = target
+    results.save("search_load", args, summary)
+
+
+if __name__ == "__main__":
+    main()
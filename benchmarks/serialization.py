@@ -0,0 +1,137 @@
+"""Encode /search responses the previous way and with the direct encoder.
+
+Run with ``python -m benchmarks.serialization --top-k 50 --text-chars 1000``.
+The previous path rebuilt every ``ChunkMatch`` as a ``ChunkMatchModel``,
+wrapped them in ``SearchResponse`` and let FastAPI dump, re-validate and
+serialize the model before ``json.dumps``; that sequence is reproduced here.
+The direct path encodes the matches as they come from the service, with
+orjson when installed and the standard library otherwise, and as NDJSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+
+from api.app import responses
+from api.app.schemas.search import ChunkMatchModel, SearchResponse
+from api.app.services.search import ChunkMatch, DocumentRef
+
+RESPONSE_ADAPTER = TypeAdapter(SearchResponse)
+
+
+def make_matches(top_k: int, text_chars: int) -> List[ChunkMatch]:
+    sentence = "Trastuzumab plus pertuzumab is preferred for HER2-positive disease. "
+    text = (sentence * (text_chars // len(sentence) + 1))[:text_chars]
+    return [
+        ChunkMatch(
+            chunk_id=100_000 + rank,
+            text=text,
+            score=1.0 / (rank + 1),
+            document=DocumentRef(
+                id=rank // 3,
+                title=f"NCCN Guidelines: Breast Cancer v{rank}",
+                source="NCCN",
+                cancer_type="Breast" if rank % 2 else None,
+            ),
+        )
+        for rank in range(top_k)
+    ]
+
+
+def legacy_encode(query: str, top_k: int, matches: List[ChunkMatch]) -> bytes:
+    models = [
+        ChunkMatchModel(
+            chunk_id=match.chunk_id,
+            text=match.text,
+            score=match.score,
+            document={
+                "id": match.document.id,
+                "title": match.document.title,
+                "source": match.document.source,
+                "cancer_type": match.document.cancer_type,
+            },
+        )
+        for match in matches
+    ]
+    response = SearchResponse(query=query, top_k=top_k, results=models)
+    # What FastAPI does with a returned model and response_model=SearchResponse.
+    validated = RESPONSE_ADAPTER.validate_python(response.model_dump())
+    content = RESPONSE_ADAPTER.dump_python(validated, mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_encode(query: str, top_k: int, matches: List[ChunkMatch]) -> bytes:
+    return responses.dumps(responses.search_content(query, top_k, matches))
+
+
+def stdlib_encode(query: str, top_k: int, matches: List[ChunkMatch]) -> bytes:
+    orjson, responses.orjson = responses.orjson, None
+    try:
+        return fast_encode(query, top_k, matches)
+    finally:
+        responses.orjson = orjson
+
+
+def ndjson_encode(query: str, top_k: int, matches: List[ChunkMatch]) -> bytes:
+    # The generator never awaits, so drive it directly rather than paying for
+    # an event loop per response.
+    lines = responses.iter_ndjson(matches)
+    body = bytearray()
+    while True:
+        try:
+            lines.__anext__().send(None)
+        except StopIteration as step:
+            body += step.value
+        except StopAsyncIteration:
+            return bytes(body)
+
+
+def measure(encode: Callable[[str, int, List[ChunkMatch]], bytes], args, matches) -> tuple:
+    encode("warm up", args.top_k, matches)
+    best = float("inf")
+    size = 0
+    for _ in range(args.repeats):
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            size = len(encode("her2 positive metastatic", args.top_k, matches))
+        best = min(best, (time.perf_counter() - started) / args.iterations)
+    return best, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top-k", type=int, default=50, help="Results per response")
+    parser.add_argument("--text-chars", type=int, default=1000, help="Characters per chunk")
+    parser.add_argument("--iterations", type=int, default=500, help="Responses per timing")
+    parser.add_argument("--repeats", type=int, default=5, help="Timings; the best is reported")
+    args = parser.parse_args()
+
+    matches = make_matches(args.top_k, args.text_chars)
+    paths = [
+        ("legacy models", legacy_encode),
+        ("direct stdlib", stdlib_encode),
+        ("direct ndjson", ndjson_encode),
+    ]
+    if responses.orjson is not None:
+        paths.insert(1, ("direct orjson", fast_encode))
+    else:
+        print("orjson is not installed; the direct path uses the standard library.")
+
+    baseline = None
+    for name, encode in paths:
+        seconds, size = measure(encode, args, matches)
+        baseline = baseline or seconds
+        print(
+            f"{name:<14} {seconds * 1e6:9.1f}us/response  {size / 1024:7.1f} KiB  "
+            f"{baseline / seconds:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
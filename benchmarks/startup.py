@@ -0,0 +1,202 @@
+"""API cold start: import time, time to ready, first request and worker memory.
+
+Run with ``python -m benchmarks.startup --chunks 50000 --workers 2``.  Four
+things are measured over ``--runs`` repetitions each:
+
+- importing ``api.app.main`` in a fresh interpreter;
+- opening the ``--chunks`` synthetic local index snapshot (see
+  ``benchmarks.corpus``), next to parsing every row of ``chunks.jsonl`` as
+  version 1 snapshots did;
+- starting uvicorn with ``--workers`` workers on that snapshot until
+  ``/health`` answers, then the latency of the first and second /search,
+  with the lifespan warm-up enabled and with ``API_WARMUP=0``;
+- the proportional set size (PSS) of each worker once it has served a
+  search, from ``/proc/<pid>/smaps_rollup`` (Linux only), which counts pages
+  the workers share, such as the mapped snapshot, once between them.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from . import corpus, results
+from .upload_latency import free_port
+
+IMPORT_SNIPPET = (
+    "import sys, time; started = time.perf_counter(); import api.app.main; "
+    "print(time.perf_counter() - started, len(sys.modules))"
+)
+
+
+def measure_imports(runs: int) -> Dict[str, Any]:
+    seconds: List[float] = []
+    modules = 0
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=results.REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        seconds.append(float(output[0]))
+        modules = int(output[1])
+    return {**results.latency_summary([value * 1000 for value in seconds]), "modules": modules}
+
+
+def measure_snapshot_load(path: Path, runs: int) -> Dict[str, Any]:
+    from api.app.services.local_index import CHUNKS, LocalChunk, LocalVectorIndex
+
+    load_ms: List[float] = []
+    parse_ms: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        index = LocalVectorIndex.load(path)
+        index.chunks[len(index) - 1]
+        load_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        with (path / CHUNKS).open(encoding="utf-8") as fp:
+            [LocalChunk(**json.loads(line)) for line in fp]
+        parse_ms.append((time.perf_counter() - started) * 1000)
+    return {
+        "mmap_load": results.latency_summary(load_ms),
+        "parse_all_rows": results.latency_summary(parse_ms),
+    }
+
+
+def worker_pids(pid: int) -> List[int]:
+    """uvicorn's worker processes under *pid*, or *pid* itself with one worker."""
+    workers: List[int] = []
+    for task in Path(f"/proc/{pid}/task").glob("*/children"):
+        for child in task.read_text().split():
+            # Skip multiprocessing's resource tracker.
+            if b"spawn_main" in Path(f"/proc/{child}/cmdline").read_bytes():
+                workers.append(int(child))
+    return workers or [pid]
+
+
+def pss_mib(pid: int) -> Optional[float]:
+    try:
+        rollup = Path(f"/proc/{pid}/smaps_rollup").read_text()
+    except OSError:
+        return None
+    for line in rollup.splitlines():
+        if line.startswith("Pss:"):
+            return int(line.split()[1]) / 1024
+    return None
+
+
+def start_once(args: argparse.Namespace, index_path: Path, warm_up: bool) -> Dict[str, Any]:
+    port = free_port()
+    env = dict(
+        os.environ,
+        SEARCH_BACKEND="local",
+        LOCAL_INDEX_PATH=str(index_path),
+        SEARCH_CACHE_SIZE="1",
+        API_WARMUP="1" if warm_up else "0",
+    )
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "api.app.main:create_app", "--factory",
+            "--port", str(port), "--log-level", "warning", "--workers", str(args.workers),
+        ],
+        cwd=results.REPO_ROOT,
+        env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+            deadline = started + 120
+            while True:
+                try:
+                    client.get("/health").raise_for_status()
+                    break
+                except httpx.TransportError:
+                    if time.perf_counter() > deadline:
+                        raise RuntimeError("API server did not start") from None
+                    time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            requests: List[float] = []
+            for query in corpus.sample_queries(2, args.seed):
+                request_started = time.perf_counter()
+                client.post("/search", json={"query": query, "top_k": 10}).raise_for_status()
+                requests.append((time.perf_counter() - request_started) * 1000)
+        memory = [pss_mib(pid) for pid in worker_pids(server.pid)]
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "ready_ms": ready * 1000,
+        "first_search_ms": requests[0],
+        "second_search_ms": requests[1],
+        "worker_pss_mib": [value for value in memory if value is not None],
+    }
+
+
+def measure_server(args: argparse.Namespace, index_path: Path, warm_up: bool) -> Dict[str, Any]:
+    runs = [start_once(args, index_path, warm_up) for _ in range(args.runs)]
+    summary: Dict[str, Any] = {
+        name: results.latency_summary([run[name] for run in runs])
+        for name in ("ready_ms", "first_search_ms", "second_search_ms")
+    }
+    pss = runs[-1]["worker_pss_mib"]
+    if pss:
+        summary["worker_pss_mib"] = {"workers": len(pss), "total": sum(pss), "max": max(pss)}
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--local-index", type=Path, help="Existing local index snapshot")
+    parser.add_argument("--chunks", type=int, default=50_000, help="Synthetic index size")
+    parser.add_argument("--seed", type=int, default=corpus.DEFAULT_SEED)
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions of each measurement")
+    results.add_output_argument(parser)
+    args = parser.parse_args()
+
+    summary: Dict[str, Any] = {"import": measure_imports(args.runs)}
+    print(
+        f"import api.app.main: p50={summary['import']['p50_ms']:.0f}ms "
+        f"({summary['import']['modules']} modules)"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        index_path = args.local_index
+        if index_path is None:
+            index_path = Path(directory) / "index"
+            build = argparse.Namespace(
+                chunks=args.chunks, seed=args.seed, chunk_chars=corpus.DEFAULT_CHUNK_CHARS,
+                graph_degree=0,
+            )
+            corpus.build_local_index(index_path, build)
+
+        summary["snapshot"] = measure_snapshot_load(index_path, args.runs)
+        print(
+            f"snapshot: mmap load p50={summary['snapshot']['mmap_load']['p50_ms']:.1f}ms, "
+            f"parsing every row p50={summary['snapshot']['parse_all_rows']['p50_ms']:.1f}ms"
+        )
+        for name, warm_up in (("warm_up", True), ("no_warm_up", False)):
+            server = summary[name] = measure_server(args, index_path, warm_up)
+            memory = server.get("worker_pss_mib")
+            print(
+                f"{name:<10} ready p50={server['ready_ms']['p50_ms']:.0f}ms  "
+                f"first search p50={server['first_search_ms']['p50_ms']:.1f}ms  "
+                f"second p50={server['second_search_ms']['p50_ms']:.1f}ms"
+                + (f"  PSS {memory['total']:.0f} MiB over {memory['workers']}" if memory else "")
+            )
+    results.save("startup", args, summary)
+
+
+if __name__ == "__main__":
+    main()
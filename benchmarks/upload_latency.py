@@ -0,0 +1,181 @@
+"""Search latency while large documents are uploaded, buffered vs streaming.
+
+Run with ``python -m benchmarks.upload_latency --uploads 4 --megabytes 100``.
+A synthetic local vector index is served by the API under uvicorn in a
+subprocess (``SEARCH_BACKEND=local``, so no database is needed).  /search is
+called back to back, first on an idle server, then while concurrent uploads
+go to ``/benchmark/buffered-upload`` (the previous handler: ``await
+upload.read()`` and a synchronous write on the event loop) and finally to
+the streaming ``/documents`` endpoint.  p50/p95/max search latency is
+reported for each phase.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from uuid import uuid4
+
+import httpx
+import numpy as np
+from fastapi import File, UploadFile
+
+from .pool_latency import QUERIES, percentile
+
+RAW_DIR_ENV = "UPLOAD_BENCHMARK_RAW_DIR"
+
+
+def build_app():
+    """App factory for the server process: the API plus the previous upload handler."""
+    from api.app import dependencies
+    from api.app.main import create_app
+    from api.app.services.jobs import IngestionQueue
+
+    app = create_app()
+    raw_dir = Path(os.environ[RAW_DIR_ENV])
+    queue = IngestionQueue(lambda job: 0, max_pending=10_000)
+
+    async def started_queue() -> IngestionQueue:
+        queue.start()
+        return queue
+
+    app.dependency_overrides[dependencies.get_raw_data_dir] = lambda: raw_dir
+    app.dependency_overrides[dependencies.get_ingestion_queue] = started_queue
+
+    @app.post("/benchmark/buffered-upload")
+    async def buffered_upload(files: List[UploadFile] = File(...)) -> dict:
+        for upload in files:
+            contents = await upload.read()
+            with (raw_dir / f"{uuid4()}_{upload.filename}").open("wb") as fp:
+                fp.write(contents)
+        return {}
+
+    return app
+
+
+def write_index(path: Path, rows: int, dimension: int) -> None:
+    from api.app.services.local_index import LocalChunk, LocalVectorIndex
+
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((rows, dimension), dtype=np.float32)
+    chunks = [
+        LocalChunk(row, f"chunk {row}", row // 20, f"Document {row // 20}", "NCCN", None)
+        for row in range(rows)
+    ]
+    LocalVectorIndex.build(vectors, chunks).save(path)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.post("/search", json={"query": "warm up"})
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("API server did not start")
+
+
+async def search_until(
+    client: httpx.AsyncClient, done: asyncio.Event, minimum: int
+) -> List[float]:
+    latencies: List[float] = []
+    while not done.is_set() or len(latencies) < minimum:
+        started = time.perf_counter()
+        response = await client.post(
+            "/search", json={"query": QUERIES[len(latencies) % len(QUERIES)]}
+        )
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def phase(
+    client: httpx.AsyncClient, path: str | None, args: argparse.Namespace, payload: bytes
+) -> List[float]:
+    done = asyncio.Event()
+
+    async def upload(number: int) -> None:
+        body = f"{uuid4()}\n".encode() + payload
+        files = {"files": (f"upload-{number}.pdf", body, "application/pdf")}
+        response = await client.post(path, files=files, timeout=None)
+        response.raise_for_status()
+
+    searches = asyncio.create_task(search_until(client, done, args.searches))
+    if path is None:
+        await asyncio.sleep(0)
+    else:
+        await asyncio.gather(*(upload(number) for number in range(args.uploads)))
+    done.set()
+    return await searches
+
+
+async def run(args: argparse.Namespace, base_url: str) -> None:
+    payload = os.urandom(args.megabytes * 2**20)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await wait_ready(client)
+        phases = (
+            ("idle", None),
+            ("buffered uploads", "/benchmark/buffered-upload"),
+            ("streaming uploads", "/documents"),
+        )
+        for name, path in phases:
+            latencies = await phase(client, path, args, payload)
+            print(
+                f"{name:<18} {len(latencies):>5} searches  "
+                f"p50={percentile(latencies, 50):8.2f}ms  "
+                f"p95={percentile(latencies, 95):8.2f}ms  max={max(latencies):8.2f}ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=4, help="Concurrent uploads per phase")
+    parser.add_argument("--megabytes", type=int, default=100, help="Size of each upload")
+    parser.add_argument("--searches", type=int, default=50, help="Minimum searches per phase")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows in the local index")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        index_path = Path(directory) / "index"
+        raw_dir = Path(directory) / "raw"
+        raw_dir.mkdir()
+        write_index(index_path, args.rows, dimension=1536)
+
+        port = free_port()
+        env = dict(
+            os.environ,
+            SEARCH_BACKEND="local",
+            LOCAL_INDEX_PATH=str(index_path),
+            MAX_UPLOAD_BYTES=str((args.megabytes + 1) * 2**20),
+            **{RAW_DIR_ENV: str(raw_dir)},
+        )
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "benchmarks.upload_latency:build_app",
+                "--factory", "--port", str(port), "--log-level", "warning",
+            ],
+            env=env,
+        )
+        try:
+            asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+-- Documents and the embedded chunks ingestion writes and search reads.
+--
+-- Search reads chunks alone: each chunk carries a copy of its document's
+-- title, source and cancer type, kept in step by a trigger, so ranking and
+-- filtering never join documents.  Apply with
+-- `python -m api.app.storage migrate`; initdb also runs this directory.
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  version INTEGER PRIMARY KEY,
+  name TEXT NOT NULL,
+  applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Earlier layouts used these table names with other columns: db/schema.sql
+-- (documents.source_id, chunks.text) and the search service's documents /
+-- knowledge_chunks.  Move them and ingestion's document_chunks into the
+-- legacy schema; 0002 copies their rows across.
+CREATE SCHEMA IF NOT EXISTS legacy;
+
+DO $$
+BEGIN
+  IF to_regclass('documents') IS NOT NULL AND NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = 'documents' AND column_name = 'path'
+  ) THEN
+    ALTER TABLE documents SET SCHEMA legacy;
+    ALTER TABLE IF EXISTS sources SET SCHEMA legacy;
+    ALTER TABLE IF EXISTS cancers SET SCHEMA legacy;
+  END IF;
+  IF to_regclass('chunks') IS NOT NULL AND NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = 'chunks' AND column_name = 'chunk_key'
+  ) THEN
+    ALTER TABLE chunks SET SCHEMA legacy;
+  END IF;
+  ALTER TABLE IF EXISTS knowledge_chunks SET SCHEMA legacy;
+  ALTER TABLE IF EXISTS document_chunks SET SCHEMA legacy;
+END $$;
+
+CREATE TABLE IF NOT EXISTS documents (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  path TEXT NOT NULL UNIQUE,
+  title TEXT NOT NULL,
+  source TEXT NOT NULL DEFAULT 'internal',
+  cancer_type TEXT,
+  url TEXT,
+  sha256 TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS chunks (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  -- uuid5(path, content hash, occurrence) assigned by ingestion.
+  chunk_key UUID NOT NULL UNIQUE,
+  document_id BIGINT NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+  chunk_index INTEGER NOT NULL,
+  body TEXT NOT NULL,
+  embedding vector(1536),
+  content_sha256 TEXT,
+  document_sha256 TEXT,
+  -- Copies of documents.title / source / cancer_type.
+  document_title TEXT NOT NULL,
+  source TEXT NOT NULL,
+  cancer_type TEXT,
+  body_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(body, ''))) STORED
+);
+
+-- Approximate nearest neighbour index for the L2 ordering used by search.
+-- Rebuild with other parameters via `python -m api.app.services.index`.
+CREATE INDEX IF NOT EXISTS chunks_embedding_hnsw_idx
+  ON chunks USING hnsw (embedding vector_l2_ops)
+  WITH (m = 16, ef_construction = 64);
+
+-- Full-text search over chunk bodies for hybrid retrieval.
+CREATE INDEX IF NOT EXISTS chunks_body_tsv_idx ON chunks USING gin (body_tsv);
+
+-- Filter columns for source / cancer type restricted searches.
+CREATE INDEX IF NOT EXISTS chunks_source_idx ON chunks (source);
+CREATE INDEX IF NOT EXISTS chunks_cancer_type_idx ON chunks (cancer_type);
+
+-- Covers the document_ids filter and the document -> chunks lookups of
+-- incremental ingestion, which then never visit the table.
+CREATE INDEX IF NOT EXISTS chunks_document_id_idx
+  ON chunks (document_id) INCLUDE (chunk_key, chunk_index, document_sha256);
+
+CREATE OR REPLACE FUNCTION documents_copy_to_chunks() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE chunks
+  SET document_title = NEW.title, source = NEW.source, cancer_type = NEW.cancer_type
+  WHERE document_id = NEW.id;
+  RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS documents_copy_to_chunks ON documents;
+CREATE TRIGGER documents_copy_to_chunks
+  AFTER UPDATE OF title, source, cancer_type ON documents
+  FOR EACH ROW
+  WHEN (
+    OLD.title IS DISTINCT FROM NEW.title
+    OR OLD.source IS DISTINCT FROM NEW.source
+    OR OLD.cancer_type IS DISTINCT FROM NEW.cancer_type
+  )
+  EXECUTE FUNCTION documents_copy_to_chunks();
+
+INSERT INTO schema_migrations (version, name) VALUES (1, 'unified_storage')
+  ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,54 @@
+-- Copy rows from the tables 0001 moved into the legacy schema.  The legacy
+-- tables are left in place; drop the schema once the copy is verified.
+
+DO $$
+BEGIN
+  -- The search service's previous tables: integer ids, catalogue fields on
+  -- documents.  Their ids are kept so existing document_ids filters still
+  -- match; they are copied first so the identity sequences start past them.
+  IF to_regclass('legacy.knowledge_chunks') IS NOT NULL THEN
+    INSERT INTO documents (id, path, title, source, cancer_type)
+    SELECT d.id, 'knowledge_chunks/' || d.id, d.title, coalesce(d.source, 'internal'),
+      d.cancer_type
+    FROM legacy.documents d
+    WHERE d.id IN (SELECT document_id FROM legacy.knowledge_chunks)
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO chunks (
+      id, chunk_key, document_id, chunk_index, body, embedding, document_title, source,
+      cancer_type
+    )
+    SELECT k.id, md5('knowledge_chunks/' || k.id)::uuid, d.id,
+      row_number() OVER (PARTITION BY k.document_id ORDER BY k.id) - 1,
+      k.body, k.embedding, d.title, d.source, d.cancer_type
+    FROM legacy.knowledge_chunks k
+    JOIN documents d ON d.path = 'knowledge_chunks/' || k.document_id
+    ON CONFLICT DO NOTHING;
+
+    PERFORM setval(pg_get_serial_sequence('documents', 'id'), max(id)) FROM documents;
+    PERFORM setval(pg_get_serial_sequence('chunks', 'id'), max(id)) FROM chunks;
+  END IF;
+
+  -- Ingestion's previous table: uuid chunk ids keyed by document path.
+  IF to_regclass('legacy.document_chunks') IS NOT NULL THEN
+    INSERT INTO documents (path, title, sha256)
+    SELECT DISTINCT ON (document_path)
+      document_path, regexp_replace(document_path, '^.*/', ''), document_sha256
+    FROM legacy.document_chunks
+    ORDER BY document_path
+    ON CONFLICT (path) DO NOTHING;
+
+    INSERT INTO chunks (
+      chunk_key, document_id, chunk_index, body, embedding, content_sha256, document_sha256,
+      document_title, source, cancer_type
+    )
+    SELECT l.id, d.id, l.chunk_index, l.content, l.embedding, l.content_sha256,
+      l.document_sha256, d.title, d.source, d.cancer_type
+    FROM legacy.document_chunks l
+    JOIN documents d ON d.path = l.document_path
+    ON CONFLICT (chunk_key) DO NOTHING;
+  END IF;
+END $$;
+
+INSERT INTO schema_migrations (version, name) VALUES (2, 'import_legacy_tables')
+  ON CONFLICT (version) DO NOTHING;
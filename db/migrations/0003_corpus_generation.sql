@@ -0,0 +1,21 @@
+-- A counter bumped once by every transaction that changes chunks.  API
+-- workers compare it with the value their search cache was filled under,
+-- so results cached by any worker go stale as soon as the corpus changes,
+-- whichever process wrote it.
+--
+-- Writers run `UPDATE corpus_generation SET generation = generation + 1`
+-- (api.app.storage.BUMP_CORPUS_GENERATION_SQL) as their last statement
+-- before committing, so the row lock is held only for the commit itself
+-- and readers never see the new value before the chunks it stands for.
+-- There is no trigger: a statement-level one would update the row once per
+-- chunk on the row-at-a-time path and hold its lock for the whole load.
+
+CREATE TABLE IF NOT EXISTS corpus_generation (
+  id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  generation BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO corpus_generation (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO schema_migrations (version, name) VALUES (3, 'corpus_generation')
+  ON CONFLICT (version) DO NOTHING;
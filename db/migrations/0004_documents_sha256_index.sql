@@ -0,0 +1,6 @@
+-- Uploads are deduplicated by content hash against the stored documents.
+
+CREATE INDEX IF NOT EXISTS documents_sha256_idx ON documents (sha256);
+
+INSERT INTO schema_migrations (version, name) VALUES (4, 'documents_sha256_index')
+  ON CONFLICT (version) DO NOTHING;
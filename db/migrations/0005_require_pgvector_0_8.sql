@@ -0,0 +1,19 @@
+-- Filtered searches set hnsw.iterative_scan so the index keeps scanning
+-- until top_k rows pass the filters.  pgvector releases before 0.8 ignore
+-- the setting silently and return short result lists, so refuse them.
+-- Install pgvector 0.8 or later (db/docker-compose.yml pins one), then run
+-- ALTER EXTENSION vector UPDATE and migrate again.
+
+DO $$
+DECLARE
+  installed TEXT := (SELECT extversion FROM pg_extension WHERE extname = 'vector');
+BEGIN
+  IF installed IS NULL
+    OR string_to_array(installed, '.')::int[] < ARRAY[0, 8, 0] THEN
+    RAISE EXCEPTION 'pgvector 0.8.0 or later is required, found %', coalesce(installed, 'none')
+      USING HINT = 'Install pgvector >= 0.8 and run ALTER EXTENSION vector UPDATE.';
+  END IF;
+END $$;
+
+INSERT INTO schema_migrations (version, name) VALUES (5, 'require_pgvector_0_8')
+  ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,221 @@
+"""Bulk loading of chunk embeddings through PostgreSQL binary COPY."""
+from __future__ import annotations
+
+import struct
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar
+from uuid import UUID
+
+import numpy as np
+
+from api.app.storage import (
+    BUMP_CORPUS_GENERATION_SQL,
+    CREATE_STAGING_SQL,
+    MERGE_CHUNKS_SQL,
+    MERGE_DOCUMENTS_SQL,
+    STAGING_COLUMNS,
+    STAGING_TABLE,
+)
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle guard
+    from .ingest import ChunkRecord
+
+T = TypeVar("T")
+
+DEFAULT_BATCH_SIZE = 5000
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+
+COPY_COLUMNS = STAGING_COLUMNS
+
+_FIELD_COUNT = struct.pack(">h", len(COPY_COLUMNS))
+_INT4_FIELD = struct.Struct(">ii")
+_LENGTH = struct.Struct(">i")
+_NULL_FIELD = _LENGTH.pack(-1)
+_VECTOR_HEADER = struct.Struct(">HH")
+_VECTOR_DTYPE = np.dtype(">f4")
+
+
+@dataclass
+class LoadProgress:
+    """Snapshot of a running bulk load, passed to progress callbacks."""
+
+    rows: int
+    batches: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class LoadStats:
+    """Summary of a completed bulk load."""
+
+    rows: int
+    batches: int
+    copy_seconds: float
+    merge_seconds: float
+
+    @property
+    def total_seconds(self) -> float:
+        return self.copy_seconds + self.merge_seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total_seconds if self.total_seconds > 0 else 0.0
+
+
+ProgressCallback = Callable[[LoadProgress], None]
+
+
+def print_progress(progress: LoadProgress) -> None:
+    """Default progress reporter writing a single status line per batch."""
+    print(
+        f"Copied {progress.rows} row(s) in {progress.batches} batch(es) "
+        f"({progress.rows_per_second:,.0f} rows/s)."
+    )
+
+
+def encode_vector(values: np.ndarray | Sequence[float]) -> bytes:
+    """Encode *values* using pgvector's binary wire format.
+
+    The format is a big-endian ``int16`` dimension, an unused ``int16`` and
+    then one big-endian ``float4`` per component.  A float32 array is
+    byte-swapped in a single vectorised copy.
+    """
+    floats = np.asarray(values, dtype=_VECTOR_DTYPE)
+    return _VECTOR_HEADER.pack(len(floats), 0) + floats.tobytes()
+
+
+def register_vector_dumper(conn: Any) -> None:  # pragma: no cover - requires database
+    """Send NumPy vectors as binary pgvector parameters (``%b``) on *conn*."""
+    from psycopg.adapt import Dumper
+    from psycopg.pq import Format
+    from psycopg.types import TypeInfo
+
+    info = TypeInfo.fetch(conn, "vector")
+    if info is None:
+        raise RuntimeError("the pgvector extension is not installed in this database")
+
+    class VectorBinaryDumper(Dumper):
+        format = Format.BINARY
+        oid = info.oid
+
+        def dump(self, obj: np.ndarray) -> bytes:
+            return encode_vector(obj)
+
+    conn.adapters.register_dumper(np.ndarray, VectorBinaryDumper)
+
+
+def _text_field(value: str) -> bytes:
+    encoded = value.encode("utf-8")
+    return _LENGTH.pack(len(encoded)) + encoded
+
+
+def _optional_text_field(value: str) -> bytes:
+    # Empty strings are written as NULL.
+    return _text_field(value) if value else _NULL_FIELD
+
+
+def encode_copy_row(record: "ChunkRecord") -> bytes:
+    """Encode a single record as one binary COPY tuple."""
+    vector = encode_vector(record.embedding)
+    return b"".join(
+        (
+            _FIELD_COUNT,
+            _LENGTH.pack(16),
+            UUID(record.id).bytes,
+            _text_field(record.document_path),
+            _INT4_FIELD.pack(4, record.chunk_index),
+            _text_field(record.content),
+            _LENGTH.pack(len(vector)),
+            vector,
+            _optional_text_field(record.content_sha256),
+            _optional_text_field(record.document_sha256),
+            _optional_text_field(record.document_title),
+            _optional_text_field(record.source),
+            _optional_text_field(record.cancer_type),
+        )
+    )
+
+
+def iter_batches(items: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """Yield lists of at most *batch_size* items without materialising the input."""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be greater than zero")
+
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BulkLoader:
+    """Stream records into ``documents`` and ``chunks`` via a staging table.
+
+    Rows are written with a single binary ``COPY`` into a temporary staging
+    table, flushing every *batch_size* rows, and are then merged with one
+    ``INSERT ... ON CONFLICT`` statement for their documents and one for the
+    chunks.  The loader only relies on the psycopg 3 connection API
+    (``cursor``, ``copy`` and ``commit``) so any object implementing it can
+    stand in for a database.
+    """
+
+    def __init__(
+        self,
+        conn: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        progress: Optional[ProgressCallback] = print_progress,
+    ) -> None:
+        if batch_size <= 0:
+            raise ValueError("batch_size must be greater than zero")
+        self._conn = conn
+        self._batch_size = batch_size
+        self._progress = progress
+
+    def load(self, records: Iterable["ChunkRecord"]) -> LoadStats:
+        columns = ", ".join(COPY_COLUMNS)
+        rows = 0
+        batches = 0
+        with self._conn.cursor() as cur:
+            cur.execute(CREATE_STAGING_SQL)
+
+            started = time.perf_counter()
+            with cur.copy(f"COPY {STAGING_TABLE} ({columns}) FROM STDIN (FORMAT BINARY)") as copy:
+                copy.write(PGCOPY_HEADER)
+                for batch in iter_batches(records, self._batch_size):
+                    copy.write(b"".join(encode_copy_row(record) for record in batch))
+                    rows += len(batch)
+                    batches += 1
+                    if self._progress is not None:
+                        self._progress(
+                            LoadProgress(
+                                rows=rows,
+                                batches=batches,
+                                elapsed=time.perf_counter() - started,
+                            )
+                        )
+                copy.write(PGCOPY_TRAILER)
+            copy_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            cur.execute(MERGE_DOCUMENTS_SQL)
+            cur.execute(MERGE_CHUNKS_SQL)
+            cur.execute(BUMP_CORPUS_GENERATION_SQL)
+        self._conn.commit()
+        merge_seconds = time.perf_counter() - started
+
+        return LoadStats(
+            rows=rows,
+            batches=batches,
+            copy_seconds=copy_seconds,
+            merge_seconds=merge_seconds,
+        )
@@ -0,0 +1,259 @@
+"""Text extraction for PDF, HTML and JATS XML documents.
+
+Extracted text is written to a UTF-8 file that the chunker memory-maps, so
+documents of any size are processed in bounded memory.  Section titles are
+emitted as markdown headings and paragraphs are separated by blank lines,
+which is the structure :mod:`ingestion.text` splits on.  With a cache
+directory the file is kept under the source file's sha256, so re-ingesting
+a document never parses it again.
+"""
+from __future__ import annotations
+
+import contextlib
+import multiprocessing
+import os
+import tempfile
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .pipeline import ordered_map
+
+# Bump when extractor output changes so cached text is regenerated.
+EXTRACTION_VERSION = 1
+PDF_PAGES_PER_TASK = 8
+READ_BLOCK_SIZE = 1 << 20
+
+
+class ExtractionError(RuntimeError):
+    """Raised when a document's text cannot be extracted."""
+
+
+def extract_pdf(path: Path, workers: int = 1) -> Iterator[str]:
+    """Yield the text of each page, extracting page ranges on a process pool."""
+    reader = _pdf_reader(path)
+    page_count = len(reader.pages)
+    ranges = [
+        (str(path), start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    if workers <= 1 or len(ranges) <= 1:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        results = ordered_map(executor, _extract_pdf_pages, ranges, max_pending=workers * 2)
+        for _, pages in results:
+            yield from pages
+
+
+def _extract_pdf_pages(task: Tuple[str, int, int]) -> List[str]:
+    path, start, stop = task
+    pages = _pdf_reader(Path(path)).pages
+    return [pages[number].extract_text() or "" for number in range(start, stop)]
+
+
+def _pdf_reader(path: Path):
+    try:
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise ExtractionError("pypdf is not installed") from exc
+    try:
+        return PdfReader(path)
+    except PdfReadError as exc:
+        raise ExtractionError(str(exc)) from exc
+
+
+class _HTMLText(HTMLParser):
+    BLOCKS = {
+        "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+        "figcaption", "footer", "header", "li", "main", "nav", "ol", "p", "pre",
+        "section", "table", "td", "th", "tr", "ul",
+    }
+    HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+    SKIPPED = {"script", "style", "noscript", "template", "head"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[str] = []
+        self._text: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in self.SKIPPED:
+            self._skipping += 1
+        elif tag in self.BLOCKS or tag in self.HEADINGS:
+            self._flush()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.SKIPPED:
+            self._skipping = max(self._skipping - 1, 0)
+        elif tag in self.HEADINGS:
+            self._flush("#" * self.HEADINGS[tag] + " ")
+        elif tag in self.BLOCKS:
+            self._flush()
+
+    def handle_data(self, data: str) -> None:
+        if not self._skipping:
+            self._text.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+    def _flush(self, prefix: str = "") -> None:
+        text = " ".join("".join(self._text).split())
+        self._text = []
+        if text:
+            self.blocks.append(prefix + text)
+
+
+def extract_html(path: Path, workers: int = 1) -> Iterator[str]:
+    """Yield paragraphs and markdown headings from an HTML document."""
+    parser = _HTMLText()
+    with path.open(encoding="utf-8", errors="ignore") as fp:
+        while True:
+            block = fp.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            parser.feed(block)
+            yield from parser.blocks
+            parser.blocks.clear()
+    parser.close()
+    yield from parser.blocks
+
+
+# JATS elements whose text is not part of the article's prose.
+JATS_SKIPPED = {"ref-list", "fn-group", "back", "journal-meta", "contrib-group", "aff"}
+
+
+def extract_jats(path: Path, workers: int = 1) -> Iterator[str]:
+    """Yield the title, abstract and body of a JATS (PMC) article.
+
+    ``article-title`` becomes a level-one heading and each ``sec`` title a
+    heading one level deeper than its enclosing section.  The tree is
+    cleared as it is parsed, so large articles stream.
+    """
+    depth = 0
+    skipping = 0
+    try:
+        for event, element in ElementTree.iterparse(path, events=("start", "end")):
+            tag = element.tag.rpartition("}")[2]
+            if event == "start":
+                if tag in JATS_SKIPPED:
+                    skipping += 1
+                elif tag == "sec":
+                    depth += 1
+                continue
+            if tag in JATS_SKIPPED:
+                skipping -= 1
+            elif tag == "sec":
+                depth -= 1
+            elif not skipping and tag in ("article-title", "title", "p"):
+                text = " ".join("".join(element.itertext()).split())
+                if text:
+                    if tag == "article-title":
+                        text = "# " + text
+                    elif tag == "title":
+                        text = "#" * min(depth + 1, 6) + " " + text
+                    yield text
+            if tag in ("p", "title", "article-title", "sec") or tag in JATS_SKIPPED:
+                element.clear()
+    except ElementTree.ParseError as exc:
+        raise ExtractionError(str(exc)) from exc
+
+
+EXTRACTORS: Dict[str, Callable[[Path, int], Iterable[str]]] = {
+    ".pdf": extract_pdf,
+    ".html": extract_html,
+    ".htm": extract_html,
+    ".xml": extract_jats,
+    ".nxml": extract_jats,
+}
+
+
+@dataclass
+class ExtractionStats:
+    extracted: int = 0
+    cache_hits: int = 0
+
+
+class ExtractionCache:
+    """Extracted text stored as ``<sha256>.v<version>.txt`` files."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+
+    def path(self, sha256: str) -> Path:
+        return self.directory / f"{sha256}.v{EXTRACTION_VERSION}.txt"
+
+    def get(self, sha256: str) -> Optional[Path]:
+        path = self.path(sha256)
+        return path if path.exists() else None
+
+    def put(self, sha256: str, blocks: Iterable[str]) -> Path:
+        """Write *blocks* to the cache; the entry appears only once complete."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.path(sha256)
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".partial")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                _write_blocks(fp, blocks)
+            os.replace(temporary, target)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temporary)
+            raise
+        return target
+
+
+class Extractor:
+    """Turn source documents into UTF-8 text files for the chunker.
+
+    Plain text files are used as they are.  Other supported formats are
+    extracted with *workers* processes (PDF pages are extracted in parallel)
+    into *cache* when one is configured, or into a temporary file otherwise.
+    """
+
+    def __init__(self, cache: Optional[ExtractionCache] = None, workers: int = 1) -> None:
+        self.cache = cache
+        self.workers = workers
+        self.stats = ExtractionStats()
+
+    @contextlib.contextmanager
+    def open_text(self, path: Path, sha256: str = "") -> Iterator[Path]:
+        """Yield the path of a UTF-8 text file holding *path*'s text."""
+        extract = EXTRACTORS.get(path.suffix.lower())
+        if extract is None:
+            yield path
+            return
+
+        if self.cache is not None and sha256:
+            cached = self.cache.get(sha256)
+            if cached is not None:
+                self.stats.cache_hits += 1
+                yield cached
+                return
+            self.stats.extracted += 1
+            yield self.cache.put(sha256, extract(path, self.workers))
+            return
+
+        self.stats.extracted += 1
+        with tempfile.TemporaryDirectory() as directory:
+            target = Path(directory) / "extracted.txt"
+            with target.open("w", encoding="utf-8") as fp:
+                _write_blocks(fp, extract(path, self.workers))
+            yield target
+
+
+def _write_blocks(fp, blocks: Iterable[str]) -> None:
+    for block in blocks:
+        if block:
+            fp.write(block)
+            fp.write("\n\n")
@@ -0,0 +1,153 @@
+"""Content-hash based planning for incremental re-ingestion."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Protocol, Set
+
+from api.app.storage import (
+    BUMP_CORPUS_GENERATION_SQL,
+    CHUNK_STATE_SQL,
+    DELETE_CHUNKS_SQL,
+    REINDEX_CHUNK_SQL,
+    STAMP_DOCUMENT_SQL,
+)
+
+
+@dataclass
+class StoredDocument:
+    """What the store currently holds for one document path."""
+
+    chunks: Dict[str, int] = field(default_factory=dict)
+    document_sha256s: Set[Optional[str]] = field(default_factory=set)
+
+
+@dataclass
+class DocumentPlan:
+    """Changes to apply for one document once its new chunks are written."""
+
+    document_path: str
+    document_sha256: str
+    existing: Dict[str, int]
+    kept: Dict[str, int] = field(default_factory=dict)
+    seen: Set[str] = field(default_factory=set)
+
+    @property
+    def stale(self) -> Set[str]:
+        return set(self.existing) - self.seen
+
+
+@dataclass
+class PlanStats:
+    files_skipped: int = 0
+    chunks_reused: int = 0
+    chunks_embedded: int = 0
+    chunks_deleted: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.chunks_embedded or self.chunks_deleted)
+
+
+class ChunkState(Protocol):
+    def load(self, document_path: str) -> StoredDocument:
+        """Return the chunk ids, indexes and document hashes stored for a path."""
+
+    def finalize(self, plan: DocumentPlan) -> None:
+        """Re-index kept chunks, stamp the new document hash and drop stale chunks."""
+
+
+class IncrementalPlanner:
+    """Decide which chunks need embedding by comparing content hashes.
+
+    Chunk ids are derived from the document path and the chunk's content
+    hash, so an unchanged chunk keeps its id even when edits elsewhere shift
+    its position.  Files whose hash matches the stored one are skipped
+    outright; otherwise only chunks with unseen ids are embedded.  Kept
+    chunks are re-indexed and stale chunks deleted by :meth:`apply`, which
+    runs after the new chunks are written so an interrupted run never marks
+    a partially written document as unchanged.
+    """
+
+    def __init__(self, state: ChunkState) -> None:
+        self._state = state
+        self._plans: List[DocumentPlan] = []
+        self._current: Optional[DocumentPlan] = None
+        self.stats = PlanStats()
+
+    def begin(self, document_path: str, document_sha256: str) -> bool:
+        """Start planning a document; returns ``False`` if it is unchanged."""
+        self._finish_current()
+        stored = self._state.load(document_path)
+        if stored.chunks and stored.document_sha256s == {document_sha256}:
+            self.stats.files_skipped += 1
+            return False
+        self._current = DocumentPlan(
+            document_path=document_path,
+            document_sha256=document_sha256,
+            existing=stored.chunks,
+        )
+        return True
+
+    def needs_embedding(self, chunk_id: str, chunk_index: int) -> bool:
+        plan = self._current
+        if plan is None:
+            raise RuntimeError("begin() must be called before planning chunks")
+        plan.seen.add(chunk_id)
+        if chunk_id in plan.existing:
+            plan.kept[chunk_id] = chunk_index
+            self.stats.chunks_reused += 1
+            return False
+        self.stats.chunks_embedded += 1
+        return True
+
+    def abandon(self) -> None:
+        """Forget the current document, leaving its stored chunks untouched."""
+        self._current = None
+
+    def apply(self) -> PlanStats:
+        """Finalise every planned document; call once the new chunks are stored."""
+        self._finish_current()
+        for plan in self._plans:
+            self._state.finalize(plan)
+            self.stats.chunks_deleted += len(plan.stale)
+        self._plans.clear()
+        return self.stats
+
+    def _finish_current(self) -> None:
+        if self._current is not None:
+            self._plans.append(self._current)
+            self._current = None
+
+
+class PostgresChunkState:
+    """:class:`ChunkState` backed by the ``documents`` and ``chunks`` tables."""
+
+    def __init__(self, conn: Any) -> None:
+        self._conn = conn
+
+    def load(self, document_path: str) -> StoredDocument:
+        stored = StoredDocument()
+        with self._conn.cursor() as cur:
+            cur.execute(CHUNK_STATE_SQL, (document_path,))
+            for chunk_id, chunk_index, document_sha256 in cur.fetchall():
+                stored.chunks[chunk_id] = chunk_index
+                stored.document_sha256s.add(document_sha256)
+        self._conn.commit()
+        return stored
+
+    def finalize(self, plan: DocumentPlan) -> None:
+        with self._conn.cursor() as cur:
+            if plan.kept:
+                cur.executemany(
+                    REINDEX_CHUNK_SQL,
+                    [
+                        (chunk_index, plan.document_sha256, chunk_id)
+                        for chunk_id, chunk_index in plan.kept.items()
+                    ],
+                )
+            stale = sorted(plan.stale)
+            if stale:
+                cur.execute(DELETE_CHUNKS_SQL, (stale,))
+                cur.execute(BUMP_CORPUS_GENERATION_SQL)
+            cur.execute(STAMP_DOCUMENT_SQL, (plan.document_sha256, plan.document_path))
+        self._conn.commit()
@@ -2,134 +2,401 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import hashlib
+import itertools
+import multiprocessing
 import os
 import random
+import sys
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Iterable, List, Sequence
-from uuid import uuid4
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+from uuid import UUID, uuid5
 
-VECTOR_DIMENSION = 1536
+import numpy as np
 
+if not __package__:
+    # Run as ``python ingestion/ingest.py``: resolve the package-relative and
+    # ``api.app`` imports below from the repository root.
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    __package__ = "ingestion"
 
-@dataclass
+from api.app import metrics, storage
+
+from .bulk import DEFAULT_BATCH_SIZE, BulkLoader, iter_batches, register_vector_dumper
+from .extract import ExtractionCache, ExtractionError, Extractor
+from .incremental import IncrementalPlanner, PostgresChunkState
+from .pipeline import DEFAULT_QUEUE_SIZE, bounded, ordered_map
+from .text import chunk_file, chunk_text
+
+VECTOR_DIMENSION = storage.EMBEDDING_DIMENSION
+READ_BLOCK_SIZE = 1 << 20
+DEFAULT_EMBED_BATCH = 64
+EMBEDDERS = ("seeded", "token-hash")
+DEFAULT_EXTRACT_CACHE = Path(__file__).resolve().parents[1] / "data" / "extracted"
+# Quantized copies of the embedding column, see api.app.services.index.QUANTIZATIONS.
+QUANTIZATIONS = ("halfvec", "bit")
+# Chunk ids are uuid5(path, content hash) so re-ingesting a document updates
+# its rows in place instead of duplicating them.
+CHUNK_ID_NAMESPACE = UUID("92c1f5b6-9537-5f12-b4c8-f55499f2b183")
+
+
+@dataclass(frozen=True)
+class DocumentInfo:
+    """Catalogue fields stored with a document and copied onto its chunks."""
+
+    title: str
+    source: str = storage.DEFAULT_SOURCE
+    cancer_type: str = ""
+
+
+def describe_path(
+    path: Path, source: str = storage.DEFAULT_SOURCE, cancer_type: str = ""
+) -> DocumentInfo:
+    """Default :class:`DocumentInfo`, titled after the file name."""
+    return DocumentInfo(title=path.name, source=source, cancer_type=cancer_type)
+
+
+@dataclass(slots=True)
 class ChunkRecord:
-    """A structured representation of a chunk ready for persistence."""
+    """A structured representation of a chunk ready for persistence.
+
+    ``embedding`` is a float32 vector, usually a row view into the batch
+    matrix it was embedded in: ~6 KB per 1536-dimension chunk instead of
+    ~50 KB as a list of Python floats.  ``document_title``, ``source`` and
+    ``cancer_type`` describe the document the chunk belongs to.
+    """
 
     id: str
     document_path: str
     chunk_index: int
     content: str
-    embedding: List[float]
-
-
-def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-    """Split text into overlapping chunks suitable for embeddings."""
-    if chunk_size <= 0:
-        raise ValueError("chunk_size must be greater than zero")
-    if overlap >= chunk_size:
-        raise ValueError("overlap must be smaller than chunk_size")
-
-    normalized = " ".join(text.split())
-    if not normalized:
-        return []
-
-    chunks: List[str] = []
-    start = 0
-    while start < len(normalized):
-        end = start + chunk_size
-        chunk = normalized[start:end]
-        chunks.append(chunk)
-        if end >= len(normalized):
-            break
-        start = max(0, end - overlap)
-    return chunks
-
-
-def generate_embedding(text: str, dimension: int = VECTOR_DIMENSION) -> List[float]:
-    """Return a deterministic pseudo-random embedding vector for the text."""
+    embedding: Optional[np.ndarray] = None
+    content_sha256: str = ""
+    document_sha256: str = ""
+    document_title: str = ""
+    source: str = storage.DEFAULT_SOURCE
+    cancer_type: str = ""
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: Path, block_size: int = READ_BLOCK_SIZE) -> str:
+    """Hash the raw bytes of *path* without loading it into memory."""
+    digest = hashlib.sha256()
+    with path.open("rb") as fp:
+        for block in iter(partial(fp.read, block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(document_path: str, content_sha256: str, occurrence: int = 0) -> str:
+    """Stable id for the *occurrence*-th chunk with this content in a document."""
+    return str(uuid5(CHUNK_ID_NAMESPACE, f"{document_path}\0{content_sha256}\0{occurrence}"))
+
+
+def iter_chunk_records(
+    path: Path,
+    chunk_size: int,
+    overlap: int,
+    document_sha256: str = "",
+    extractor: Optional[Extractor] = None,
+    info: Optional[DocumentInfo] = None,
+) -> Iterator[ChunkRecord]:
+    """Yield the chunks of *path* as records awaiting an embedding.
+
+    PDF, HTML and XML files are first converted to text by *extractor*.
+    Records carry *info*, by default :func:`describe_path`.
+    """
+    document_path = str(path)
+    info = info or describe_path(path)
+    occurrences: Counter[str] = Counter()
+    with (extractor or Extractor()).open_text(path, document_sha256) as text_path:
+        for chunk in chunk_file(text_path, chunk_size, overlap):
+            digest = content_hash(chunk.text)
+            occurrence = occurrences[digest]
+            occurrences[digest] += 1
+            yield ChunkRecord(
+                id=chunk_id(document_path, digest, occurrence),
+                document_path=document_path,
+                chunk_index=chunk.index,
+                content=chunk.text,
+                content_sha256=digest,
+                document_sha256=document_sha256,
+                document_title=info.title,
+                source=info.source,
+                cancer_type=info.cancer_type,
+            )
+
+
+def generate_embedding(text: str, dimension: int = VECTOR_DIMENSION) -> np.ndarray:
+    """Return a deterministic pseudo-random float32 embedding for the text."""
     seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest(), 16) % (2**32)
     rng = random.Random(seed)
-    return [rng.uniform(-1.0, 1.0) for _ in range(dimension)]
+    return np.fromiter(
+        (rng.uniform(-1.0, 1.0) for _ in range(dimension)), dtype=np.float32, count=dimension
+    )
 
 
-def vector_literal(values: Sequence[float]) -> str:
-    """Format a Python sequence into a pgvector literal."""
-    return "[" + ",".join(f"{value:.6f}" for value in values) + "]"
+def embed_texts(texts: Sequence[str], embedder: str = "seeded") -> np.ndarray:
+    """Embed a batch of texts; the unit of work sent to embedding worker processes.
 
+    Returns a ``(len(texts), VECTOR_DIMENSION)`` float32 matrix, which also
+    crosses the process boundary as one buffer.  ``seeded`` uses
+    :func:`generate_embedding`.  ``token-hash`` uses the API's query embedder,
+    so ingested chunks live in the same space as queries and share its token
+    hash cache.
+    """
+    if embedder == "token-hash":
+        return _token_hash_embedder().embed_batch(texts)
+    matrix = np.empty((len(texts), VECTOR_DIMENSION), dtype=np.float32)
+    for row, text in zip(matrix, texts):
+        row[:] = generate_embedding(text)
+    return matrix
+
+
+@lru_cache
+def _token_hash_embedder():
+    from api.app.services.embedding import EmbeddingClient
+
+    return EmbeddingClient(dimensions=VECTOR_DIMENSION)
+
+
+def warm_token_cache(vocab_path: str) -> int:
+    """Preload the shared token hash cache from a vocabulary file."""
+    from api.app.services.token_cache import shared_token_cache
+
+    return shared_token_cache().load_vocabulary(vocab_path)
 
-def upsert_embeddings(records: Iterable[ChunkRecord], db_url: str | None) -> None:
-    """Persist embeddings into a pgvector-enabled PostgreSQL database."""
-    records = list(records)
-    if not records:
-        print("No records to upsert.")
-        return
 
+def upsert_embeddings(
+    records: Iterable[ChunkRecord],
+    db_url: str | None,
+    bulk: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    quantizations: Sequence[str] = (),
+) -> int:
+    """Persist embeddings into a pgvector-enabled PostgreSQL database.
+
+    *records* is consumed lazily and written in batches of *batch_size*, so
+    arbitrarily large generators can be loaded in constant memory.  With
+    ``bulk`` enabled the records are streamed through a binary ``COPY`` into a
+    staging table and merged in a single statement instead of issuing one
+    ``INSERT`` per record.  Each name in *quantizations* adds a generated,
+    quantized copy of the embedding column that PostgreSQL keeps in step with
+    every write.  Returns the number of records written.
+    """
     if not db_url:
+        # Return before pulling a record, so no upstream stage embeds anything.
         print("DATABASE_URL not provided; skipping database upsert.")
-        return
+        return 0
+
+    iterator = iter(records)
+    first = next(iterator, None)
+    if first is None:
+        print("No records to upsert.")
+        return 0
+    records = itertools.chain([first], iterator)
 
     try:
         import psycopg
     except ImportError:  # pragma: no cover - optional dependency
         print("psycopg is not installed; skipping database upsert.")
-        return
-
-    with psycopg.connect(db_url) as conn:  # pragma: no cover - requires database
-        with conn.cursor() as cur:
-            cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
-            cur.execute(
-                f"""
-                CREATE TABLE IF NOT EXISTS document_chunks (
-                    id UUID PRIMARY KEY,
-                    document_path TEXT NOT NULL,
-                    chunk_index INTEGER NOT NULL,
-                    content TEXT NOT NULL,
-                    embedding vector({VECTOR_DIMENSION})
-                )
-                """
+        return 0
+
+    conninfo = storage.psycopg_url(db_url)
+    with psycopg.connect(conninfo) as conn:  # pragma: no cover - requires database
+        ensure_schema(conn, quantizations)
+        register_vector_dumper(conn)
+
+        if bulk:
+            stats = BulkLoader(conn, batch_size=batch_size).load(records)
+            metrics.observe("ingest.upsert", stats.total_seconds, items=stats.rows)
+            print(
+                f"Bulk loaded {stats.rows} chunk(s) in {stats.total_seconds:.2f}s "
+                f"({stats.rows_per_second:,.0f} rows/s)."
             )
+            return stats.rows
+
+        written = 0
+        for batch in iter_batches(records, batch_size):
+            with metrics.span("ingest.upsert", items=len(batch)):
+                with conn.cursor() as cur:
+                    cur.executemany(
+                        storage.UPSERT_CHUNK_SQL,
+                        [
+                            (
+                                record.document_path,
+                                record.document_title or record.document_path,
+                                record.source,
+                                record.cancer_type or None,
+                                record.document_sha256 or None,
+                                record.id,
+                                record.chunk_index,
+                                record.content,
+                                np.asarray(record.embedding, dtype=np.float32),
+                                record.content_sha256 or None,
+                                record.document_sha256 or None,
+                            )
+                            for record in batch
+                        ],
+                    )
+                    cur.execute(storage.BUMP_CORPUS_GENERATION_SQL)
+                conn.commit()
+            written += len(batch)
+            print(f"Flushed {written} chunk(s) to pgvector store.")
+
+    print(f"Upserted {written} chunk(s) into pgvector store.")
+    return written
+
+
+def ensure_schema(conn, quantizations: Sequence[str] = ()) -> None:  # pragma: no cover
+    """Apply pending storage migrations and add any requested quantized columns."""
+    for migration in storage.migrate(conn):
+        print(f"Applied storage migration {migration.label}.")
+    if quantizations:
+        from api.app.services.index import QUANTIZATIONS
 
-            for record in records:
+        with conn.cursor() as cur:
+            for name in quantizations:
                 cur.execute(
-                    """
-                    INSERT INTO document_chunks (id, document_path, chunk_index, content, embedding)
-                    VALUES (%s, %s, %s, %s, %s::vector)
-                    ON CONFLICT (id) DO UPDATE SET
-                        document_path = EXCLUDED.document_path,
-                        chunk_index = EXCLUDED.chunk_index,
-                        content = EXCLUDED.content,
-                        embedding = EXCLUDED.embedding
-                    """,
-                    (
-                        record.id,
-                        record.document_path,
-                        record.chunk_index,
-                        record.content,
-                        vector_literal(record.embedding),
-                    ),
+                    QUANTIZATIONS[name].column_sql(storage.CHUNKS_TABLE, VECTOR_DIMENSION)
                 )
         conn.commit()
 
-    print(f"Upserted {len(records)} chunk(s) into pgvector store.")
-
-
-def ingest_file(path: Path, chunk_size: int, overlap: int) -> List[ChunkRecord]:
-    text = path.read_text(encoding="utf-8", errors="ignore")
-    chunks = chunk_text(text, chunk_size=chunk_size, overlap=overlap)
-    records: List[ChunkRecord] = []
-    for index, chunk in enumerate(chunks):
-        records.append(
-            ChunkRecord(
-                id=str(uuid4()),
-                document_path=str(path),
-                chunk_index=index,
-                content=chunk,
-                embedding=generate_embedding(chunk),
-            )
+
+def invalidate_search_cache(api_url: str) -> None:
+    """Ask one search API worker to drop its cached results right away.
+
+    Optional: the write itself bumps ``corpus_generation``, which every
+    worker checks within ``SEARCH_CACHE_CHECK_INTERVAL`` seconds.
+    """
+    request = urllib.request.Request(f"{api_url.rstrip('/')}/search/cache", method="DELETE")
+    try:
+        with urllib.request.urlopen(request, timeout=10):
+            pass
+    except (urllib.error.URLError, OSError) as exc:
+        print(f"Could not invalidate search cache at {api_url}: {exc}")
+        return
+    print(f"Invalidated search cache at {api_url}.")
+
+
+def read_chunks(
+    paths: Iterable[Path],
+    chunk_size: int,
+    overlap: int,
+    planner: Optional[IncrementalPlanner] = None,
+    extractor: Optional[Extractor] = None,
+    describe: Callable[[Path], DocumentInfo] = describe_path,
+) -> Iterator[ChunkRecord]:
+    """Stream chunk records awaiting embeddings for every file in *paths*.
+
+    With a *planner*, unchanged files and chunks that are already stored are
+    not yielded, so only new content reaches the embedding stage.  Files
+    whose text cannot be extracted are reported and skipped.  *describe*
+    supplies each document's title, source and cancer type.
+    """
+    for path in paths:
+        document_sha256 = file_sha256(path)
+        if planner is not None and not planner.begin(str(path), document_sha256):
+            print(f"Unchanged since last ingest: {path}; skipping.")
+            continue
+        count = 0
+        reused = 0
+        records = metrics.timed(
+            iter_chunk_records(
+                path, chunk_size, overlap, document_sha256, extractor, describe(path)
+            ),
+            "ingest.chunk",
+        )
+        try:
+            for record in records:
+                count += 1
+                if planner is not None and not planner.needs_embedding(
+                    record.id, record.chunk_index
+                ):
+                    reused += 1
+                    continue
+                yield record
+        except ExtractionError as exc:
+            print(f"Could not extract text from {path}: {exc}; skipping.")
+            if planner is not None:
+                planner.abandon()
+            continue
+        if count:
+            print(f"Prepared {count} chunk(s) from {path}.")
+            if reused:
+                print(f"Reusing {reused} unchanged chunk(s) from {path}.")
+        else:
+            print(f"No content extracted from {path}; skipping.")
+
+
+def embed_chunks(
+    records: Iterable[ChunkRecord],
+    workers: int = 1,
+    batch_size: int = DEFAULT_EMBED_BATCH,
+    embedder: str = "seeded",
+    vocab_path: str | None = None,
+) -> Iterator[ChunkRecord]:
+    """Attach embeddings to records produced by :func:`read_chunks`.
+
+    Chunks are embedded in batches of *batch_size*.  With more than one
+    worker the batches run on a process pool; results are yielded in input
+    order and are identical to the serial path because embeddings only
+    depend on the chunk text.  *vocab_path* warms the token hash cache of
+    every process before the ``token-hash`` embedder runs.
+    """
+    embed = partial(embed_texts, embedder=embedder)
+    warm = vocab_path if embedder == "token-hash" else None
+
+    if workers <= 1:
+        if warm:
+            warm_token_cache(warm)
+        for batch in iter_batches(records, batch_size):
+            with metrics.span("ingest.embed", items=len(batch)):
+                embeddings = embed([record.content for record in batch])
+            yield from _attach(batch, embeddings)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=warm_token_cache if warm else None,
+        initargs=(warm,) if warm else (),
+    ) as executor:
+        results = ordered_map(
+            executor,
+            embed,
+            iter_batches(records, batch_size),
+            max_pending=workers * 2,
+            payload=lambda batch: [record.content for record in batch],
         )
-    return records
+        # Embedding runs in the workers; time spent waiting on their results
+        # is what the pipeline pays for it.
+        for batch, embeddings in metrics.timed(results, "ingest.embed"):
+            yield from _attach(batch, embeddings)
+
+
+def _attach(batch: List[ChunkRecord], embeddings: np.ndarray) -> Iterator[ChunkRecord]:
+    for record, embedding in zip(batch, embeddings):
+        record.embedding = embedding
+        yield record
+
+
+def ingest_file(path: Path, chunk_size: int, overlap: int, workers: int = 1) -> List[ChunkRecord]:
+    records = iter_chunk_records(
+        path, chunk_size, overlap, file_sha256(path), Extractor(workers=workers)
+    )
+    return list(embed_chunks(records, workers=workers))
 
 
 def parse_args() -> argparse.Namespace:
@@ -157,14 +424,92 @@ def parse_args() -> argparse.Namespace:
         default=200,
         help="Number of characters of overlap between chunks",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Load embeddings with binary COPY into a staging table and merge once",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Rows written to the database per flush",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help="Maximum items buffered between pipeline stages",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Embedding worker processes (1 embeds in the main process)",
+    )
+    parser.add_argument(
+        "--embed-batch",
+        type=int,
+        default=DEFAULT_EMBED_BATCH,
+        help="Chunks sent to an embedding worker per task",
+    )
+    parser.add_argument(
+        "--embedder",
+        choices=EMBEDDERS,
+        default="seeded",
+        help="Embedding strategy; token-hash matches the API query embedder",
+    )
+    parser.add_argument(
+        "--vocab-file",
+        help="Vocabulary file used to warm the token hash cache (token-hash only)",
+    )
+    parser.add_argument(
+        "--api-url",
+        default=os.environ.get("KARKINOS_API_URL"),
+        help="Search API base URL whose result cache is invalidated after writing",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip unchanged files, re-embed only new chunks and delete stale ones",
+    )
+    parser.add_argument(
+        "--extract-cache",
+        default=os.environ.get("KARKINOS_EXTRACT_CACHE", str(DEFAULT_EXTRACT_CACHE)),
+        help="Directory caching text extracted from PDF/HTML/XML by file sha256 ('' disables)",
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=1,
+        help="Processes extracting PDF pages in parallel",
+    )
+    parser.add_argument(
+        "--quantize",
+        nargs="+",
+        choices=QUANTIZATIONS,
+        default=[],
+        help="Also store generated quantized embedding columns for re-ranked search",
+    )
+    parser.add_argument(
+        "--source",
+        default=storage.DEFAULT_SOURCE,
+        help="Source the documents are catalogued under, e.g. NCCN",
+    )
+    parser.add_argument(
+        "--cancer-type",
+        default="",
+        help="Cancer type the documents are catalogued under",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Write per-stage timings here in the Prometheus text format when done",
+    )
     return parser.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
-    all_records: List[ChunkRecord] = []
-
-    for file_path in args.files:
+def iter_input_paths(files: Iterable[str]) -> Iterator[Path]:
+    for file_path in files:
         path = Path(file_path)
         if not path.exists():
             print(f"Skipping missing file: {path}")
@@ -172,19 +517,103 @@ def main() -> None:
         if path.is_dir():
             print(f"Skipping directory (files only): {path}")
             continue
+        yield path
 
-        file_records = ingest_file(path, chunk_size=args.chunk_size, overlap=args.overlap)
-        if not file_records:
-            print(f"No content extracted from {path}; skipping.")
-            continue
-        print(f"Prepared {len(file_records)} chunk(s) from {path}.")
-        all_records.extend(file_records)
 
-    if not all_records:
-        print("No records generated from provided files.")
-        return
+def open_planner(db_url: str | None, stack: contextlib.ExitStack) -> Optional[IncrementalPlanner]:
+    """Connect the incremental planner to the chunk store, if one is reachable."""
+    if not db_url:
+        print("--incremental needs DATABASE_URL; ingesting every file in full.")
+        return None
+    try:
+        import psycopg
+    except ImportError:  # pragma: no cover - optional dependency
+        print("psycopg is not installed; ingesting every file in full.")
+        return None
+    conninfo = storage.psycopg_url(db_url)
+    conn = stack.enter_context(psycopg.connect(conninfo))  # pragma: no cover - requires database
+    ensure_schema(conn)
+    return IncrementalPlanner(PostgresChunkState(conn))
+
+
+def main() -> None:
+    args = parse_args()
+
+    with contextlib.ExitStack() as stack:
+        planner = open_planner(args.db_url, stack) if args.incremental else None
+        extractor = Extractor(
+            cache=ExtractionCache(Path(args.extract_cache)) if args.extract_cache else None,
+            workers=args.extract_workers,
+        )
+
+        # read/chunk -> embed -> write, with bounded queues between the stages so
+        # memory stays flat regardless of how many files are ingested.
+        chunks = bounded(
+            read_chunks(
+                iter_input_paths(args.files),
+                args.chunk_size,
+                args.overlap,
+                planner,
+                extractor,
+                partial(describe_path, source=args.source, cancer_type=args.cancer_type),
+            ),
+            maxsize=args.queue_size,
+            name="chunk",
+        )
+        if args.db_url:
+            records = bounded(
+                embed_chunks(
+                    chunks,
+                    workers=args.workers,
+                    batch_size=args.embed_batch,
+                    embedder=args.embedder,
+                    vocab_path=args.vocab_file,
+                ),
+                maxsize=args.queue_size,
+                name="embed",
+            )
+            written = upsert_embeddings(
+                records,
+                db_url=args.db_url,
+                bulk=args.bulk,
+                batch_size=args.batch_size,
+                quantizations=args.quantize,
+            )
+        else:
+            # A dry run: nothing would be stored, so nothing is embedded either.
+            skipped = sum(1 for _ in chunks)
+            print(
+                f"DATABASE_URL not provided; skipping embedding and upsert of "
+                f"{skipped} chunk(s)."
+            )
+            written = 0
+
+        for stage, seconds, items in metrics.stage_throughput("ingest."):
+            rate = items / seconds if seconds else 0.0
+            print(f"{stage}: {items:,.0f} item(s) in {seconds:.2f}s ({rate:,.0f}/s).")
+
+        extracted = extractor.stats
+        if extracted.extracted or extracted.cache_hits:
+            print(
+                f"Extracted text from {extracted.extracted} document(s); "
+                f"{extracted.cache_hits} served from the extraction cache."
+            )
+
+        changed = bool(written)
+        if planner is not None:
+            # Stale chunks are only dropped once their replacements are stored.
+            stats = planner.apply()
+            print(
+                f"Incremental ingest: {stats.files_skipped} unchanged file(s), "
+                f"{stats.chunks_reused} chunk(s) reused, {stats.chunks_embedded} embedded, "
+                f"{stats.chunks_deleted} deleted."
+            )
+            changed = changed or stats.changed
 
-    upsert_embeddings(all_records, db_url=args.db_url)
+    if args.metrics_file:
+        metrics.write_textfile(args.metrics_file)
+    if changed and args.api_url:
+        invalidate_search_cache(args.api_url)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+"""Streaming stage helpers used to build bounded-memory ingestion pipelines."""
+from __future__ import annotations
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Deque, Iterable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_QUEUE_SIZE = 256
+
+_DONE = object()
+
+
+class _Failure:
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+def bounded(iterable: Iterable[T], maxsize: int = DEFAULT_QUEUE_SIZE, name: str = "stage") -> Iterator[T]:
+    """Run *iterable* on a background thread behind a bounded queue.
+
+    The producer blocks as soon as *maxsize* items are waiting, so a slow
+    consumer applies backpressure to every upstream stage and at most
+    *maxsize* items are held in memory between two stages.  Exceptions raised
+    by the producer are re-raised in the consumer, and closing the consumer
+    early stops the producer.
+    """
+    if maxsize <= 0:
+        raise ValueError("maxsize must be greater than zero")
+
+    buffer: "queue.Queue[object]" = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+
+    def put(item: object) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+        except BaseException as exc:  # propagate to the consumer
+            put(_Failure(exc))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, name=f"ingest-{name}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item  # type: ignore[misc]
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def ordered_map(
+    executor: Executor,
+    func: Callable[[Any], R],
+    items: Iterable[T],
+    max_pending: int,
+    payload: Optional[Callable[[T], Any]] = None,
+) -> Iterator[Tuple[T, R]]:
+    """Apply *func* to *items* on *executor*, yielding ``(item, result)`` in input order.
+
+    Unlike :meth:`Executor.map` the input is consumed lazily: at most
+    *max_pending* tasks are in flight, which keeps the stage bounded.  When
+    *payload* is given, ``func(payload(item))`` is submitted instead so only
+    the data the task needs crosses a process boundary.
+    """
+    if max_pending <= 0:
+        raise ValueError("max_pending must be greater than zero")
+
+    pending: Deque[Tuple[T, "Future[R]"]] = deque()
+    try:
+        for item in items:
+            argument = payload(item) if payload is not None else item
+            pending.append((item, executor.submit(func, argument)))
+            if len(pending) >= max_pending:
+                head, future = pending.popleft()
+                yield head, future.result()
+        while pending:
+            head, future = pending.popleft()
+            yield head, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
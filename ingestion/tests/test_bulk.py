@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import struct
+from uuid import UUID, uuid4
+
+import numpy as np
+import pytest
+
+from ingestion.bulk import PGCOPY_HEADER, PGCOPY_TRAILER, BulkLoader, encode_vector
+from ingestion.ingest import VECTOR_DIMENSION, ChunkRecord, embed_chunks, generate_embedding
+
+
+class FakeCopy:
+    def __init__(self, statement: str) -> None:
+        self.statement = statement
+        self.writes: list[bytes] = []
+
+    def __enter__(self) -> "FakeCopy":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def write(self, data: bytes) -> None:
+        self.writes.append(bytes(data))
+
+
+class FakeCursor:
+    def __init__(self, conn: "FakeConnection") -> None:
+        self._conn = conn
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def execute(self, statement: str, params=None) -> None:
+        self._conn.statements.append(" ".join(statement.split()))
+
+    def copy(self, statement: str) -> FakeCopy:
+        copy = FakeCopy(statement)
+        self._conn.copies.append(copy)
+        return copy
+
+
+class FakeConnection:
+    """Minimal stand-in for a psycopg connection."""
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self.copies: list[FakeCopy] = []
+        self.commits = 0
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+def decode_copy_stream(payload: bytes) -> list[tuple]:
+    assert payload.startswith(PGCOPY_HEADER)
+    assert payload.endswith(PGCOPY_TRAILER)
+    offset = len(PGCOPY_HEADER)
+    rows = []
+    while True:
+        (field_count,) = struct.unpack_from(">h", payload, offset)
+        offset += 2
+        if field_count == -1:
+            break
+        fields = []
+        for _ in range(field_count):
+            (length,) = struct.unpack_from(">i", payload, offset)
+            offset += 4
+            if length == -1:
+                fields.append(None)
+                continue
+            fields.append(payload[offset : offset + length])
+            offset += length
+        dim, _unused = struct.unpack_from(">HH", fields[4])
+        rows.append(
+            (
+                str(UUID(bytes=fields[0])),
+                fields[1].decode("utf-8"),
+                struct.unpack(">i", fields[2])[0],
+                fields[3].decode("utf-8"),
+                list(struct.unpack_from(f">{dim}f", fields[4], 4)),
+                *(field.decode("ascii") if field is not None else None for field in fields[5:]),
+            )
+        )
+    assert offset == len(payload)
+    return rows
+
+
+def make_record(index: int) -> ChunkRecord:
+    return ChunkRecord(
+        id=str(uuid4()),
+        document_path="nccn/breast.txt",
+        chunk_index=index,
+        content=f"Chunk {index} — HER2 positive disease",
+        embedding=[0.5, -0.25, float(index)],
+        content_sha256=f"{index:064x}",
+        document_title="NCCN Breast Cancer",
+        source="NCCN",
+        cancer_type="Breast",
+    )
+
+
+def test_encode_vector_uses_pgvector_binary_layout() -> None:
+    encoded = encode_vector([1.0, -2.5])
+
+    assert encoded == struct.pack(">HH2f", 2, 0, 1.0, -2.5)
+    assert encode_vector(np.array([1.0, -2.5], dtype=np.float32)) == encoded
+
+
+def test_records_carry_compact_float32_embeddings() -> None:
+    (record,) = embed_chunks([ChunkRecord("1", "nccn/breast.txt", 0, "HER2 positive")])
+
+    assert not hasattr(record, "__dict__")
+    assert record.embedding.dtype == np.float32
+    assert record.embedding.shape == (VECTOR_DIMENSION,)
+    assert np.array_equal(record.embedding, generate_embedding("HER2 positive"))
+
+
+def test_bulk_loader_copies_batches_and_merges_once() -> None:
+    conn = FakeConnection()
+    records = [make_record(index) for index in range(5)]
+    progress = []
+
+    stats = BulkLoader(conn, batch_size=2, progress=progress.append).load(iter(records))
+
+    assert stats.rows == 5
+    assert stats.batches == 3
+    assert [snapshot.rows for snapshot in progress] == [2, 4, 5]
+
+    (copy,) = conn.copies
+    assert "FORMAT BINARY" in copy.statement
+    rows = decode_copy_stream(b"".join(copy.writes))
+    assert rows == [
+        (
+            record.id,
+            record.document_path,
+            record.chunk_index,
+            record.content,
+            record.embedding,
+            record.content_sha256,
+            None,
+            "NCCN Breast Cancer",
+            "NCCN",
+            "Breast",
+        )
+        for record in records
+    ]
+
+    documents, chunks = [s for s in conn.statements if s.startswith("INSERT")]
+    assert documents.startswith("INSERT INTO documents")
+    assert "ON CONFLICT (path) DO UPDATE" in documents
+    assert chunks.startswith("INSERT INTO chunks")
+    assert "JOIN documents d ON d.path = s.document_path" in chunks
+    assert "ON CONFLICT (chunk_key) DO UPDATE" in chunks
+    # One generation bump per load, as the last statement before the commit.
+    assert conn.statements[-1] == "UPDATE corpus_generation SET generation = generation + 1"
+    assert conn.commits == 1
+
+
+def test_bulk_loader_rejects_invalid_batch_size() -> None:
+    with pytest.raises(ValueError):
+        BulkLoader(FakeConnection(), batch_size=0)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from ingestion import extract
+from ingestion.extract import (
+    ExtractionCache,
+    ExtractionError,
+    Extractor,
+    extract_html,
+    extract_jats,
+)
+from ingestion.incremental import IncrementalPlanner, StoredDocument
+from ingestion.ingest import file_sha256, read_chunks
+
+HTML = """<html><head><title>ignored</title><style>p { color: red }</style></head>
+<body><h1>NCCN Breast</h1><p>HER2 positive disease is treated
+with <b>trastuzumab</b>.</p><script>track()</script>
+<h2>Adjuvant</h2><ul><li>Pertuzumab &amp; trastuzumab</li><li>T-DM1</li></ul></body></html>
+"""
+
+JATS = """<?xml version="1.0"?>
+<article><front><journal-meta><journal-title>J Oncol</journal-title></journal-meta>
+<article-meta><title-group><article-title>Osimertinib in EGFR NSCLC</article-title></title-group>
+<abstract><p>We report outcomes.</p></abstract></article-meta></front>
+<body><sec><title>Methods</title><p>Patients with <italic>exon 19</italic> deletions.</p>
+<sec><title>Endpoints</title><p>Progression-free survival.</p></sec></sec></body>
+<back><ref-list><title>References</title><ref><p>Cited work.</p></ref></ref-list></back>
+</article>
+"""
+
+
+def test_html_extraction(tmp_path) -> None:
+    document = tmp_path / "guideline.html"
+    document.write_text(HTML, encoding="utf-8")
+
+    assert list(extract_html(document)) == [
+        "# NCCN Breast",
+        "HER2 positive disease is treated with trastuzumab.",
+        "## Adjuvant",
+        "Pertuzumab & trastuzumab",
+        "T-DM1",
+    ]
+
+
+def test_jats_extraction_skips_front_matter_and_references(tmp_path) -> None:
+    document = tmp_path / "PMC123.nxml"
+    document.write_text(JATS, encoding="utf-8")
+
+    assert list(extract_jats(document)) == [
+        "# Osimertinib in EGFR NSCLC",
+        "We report outcomes.",
+        "## Methods",
+        "Patients with exon 19 deletions.",
+        "### Endpoints",
+        "Progression-free survival.",
+    ]
+
+
+def test_extracted_text_is_cached_by_file_hash(tmp_path, monkeypatch) -> None:
+    calls = []
+
+    def counting(path, workers=1):
+        calls.append(path)
+        return extract_html(path, workers)
+
+    monkeypatch.setitem(extract.EXTRACTORS, ".html", counting)
+    document = tmp_path / "guideline.html"
+    document.write_text(HTML, encoding="utf-8")
+    extractor = Extractor(cache=ExtractionCache(tmp_path / "cache"))
+
+    first = [record.content for record in read_chunks([document], 200, 0, extractor=extractor)]
+    second = [record.content for record in read_chunks([document], 200, 0, extractor=extractor)]
+
+    assert first == second
+    assert first[0].startswith("# NCCN Breast HER2 positive")
+    assert len(calls) == 1
+    assert extractor.stats.extracted == 1 and extractor.stats.cache_hits == 1
+    assert ExtractionCache(tmp_path / "cache").get(file_sha256(document)) is not None
+
+
+def test_failed_extraction_skips_the_file_and_keeps_stored_chunks(tmp_path, monkeypatch) -> None:
+    def broken(path, workers=1):
+        raise ExtractionError("not a PDF")
+        yield  # pragma: no cover
+
+    class State:
+        finalized = []
+
+        def load(self, document_path):
+            return StoredDocument(chunks={"kept": 0}, document_sha256s={"old"})
+
+        def finalize(self, plan):
+            self.finalized.append(plan)
+
+    monkeypatch.setitem(extract.EXTRACTORS, ".pdf", broken)
+    document = tmp_path / "scan.pdf"
+    document.write_bytes(b"%PDF-garbage")
+    notes = tmp_path / "notes.txt"
+    notes.write_text("Plain text notes are read directly.", encoding="utf-8")
+    planner = IncrementalPlanner(State())
+
+    records = list(read_chunks([document, notes], 200, 0, planner, Extractor()))
+
+    assert [record.document_path for record in records] == [str(notes)]
+    planner.apply()
+    assert [plan.document_path for plan in State.finalized] == [str(notes)]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from ingestion.incremental import DocumentPlan, IncrementalPlanner, StoredDocument
+from ingestion.ingest import embed_chunks, read_chunks
+
+
+class MemoryChunkState:
+    """In-memory stand-in for the ``chunks`` table."""
+
+    def __init__(self) -> None:
+        self.rows: dict[str, dict] = {}
+
+    def store(self, records) -> None:
+        for record in records:
+            self.rows[record.id] = {
+                "document_path": record.document_path,
+                "chunk_index": record.chunk_index,
+                "document_sha256": record.document_sha256,
+            }
+
+    def load(self, document_path: str) -> StoredDocument:
+        stored = StoredDocument()
+        for chunk_id, row in self.rows.items():
+            if row["document_path"] == document_path:
+                stored.chunks[chunk_id] = row["chunk_index"]
+                stored.document_sha256s.add(row["document_sha256"])
+        return stored
+
+    def finalize(self, plan: DocumentPlan) -> None:
+        for chunk_id, chunk_index in plan.kept.items():
+            self.rows[chunk_id].update(chunk_index=chunk_index, document_sha256=plan.document_sha256)
+        for chunk_id in plan.stale:
+            del self.rows[chunk_id]
+
+
+def ingest(state: MemoryChunkState, paths) -> tuple:
+    planner = IncrementalPlanner(state)
+    embedded = list(embed_chunks(read_chunks(paths, 40, 0, planner)))
+    state.store(embedded)
+    return embedded, planner.apply()
+
+
+def paragraphs(*names: str) -> str:
+    return " ".join(f"{name} guidance for stage {index} disease." for index, name in enumerate(names))
+
+
+def test_unchanged_files_are_skipped(tmp_path) -> None:
+    document = tmp_path / "nccn.txt"
+    document.write_text(paragraphs("Breast", "Lung", "Colon"), encoding="utf-8")
+    state = MemoryChunkState()
+
+    first, _ = ingest(state, [document])
+    second, stats = ingest(state, [document])
+
+    assert first and not second
+    assert stats.files_skipped == 1
+    assert not stats.changed
+
+
+def test_only_new_chunks_are_embedded_and_stale_ones_deleted(tmp_path) -> None:
+    document = tmp_path / "nccn.txt"
+    document.write_text(paragraphs("Breast", "Lung", "Colon", "Ovarian"), encoding="utf-8")
+    state = MemoryChunkState()
+    first, _ = ingest(state, [document])
+
+    document.write_text(paragraphs("Breast", "Lung", "Colon", "Cervical", "Melanoma"), encoding="utf-8")
+    second, stats = ingest(state, [document])
+
+    assert 0 < len(second) < len(first)
+    assert stats.chunks_reused > 0
+    assert stats.chunks_embedded == len(second)
+    assert stats.chunks_deleted > 0
+
+    rows = sorted(state.rows.values(), key=lambda row: row["chunk_index"])
+    assert [row["chunk_index"] for row in rows] == list(range(len(rows)))
+    assert {row["document_sha256"] for row in rows} == {second[0].document_sha256}
+
+
+def test_chunk_ids_are_stable_across_runs(tmp_path) -> None:
+    document = tmp_path / "asco.txt"
+    document.write_text("PD-L1 high NSCLC. " * 20, encoding="utf-8")
+
+    first = [record.id for record in read_chunks([document], 40, 0)]
+    second = [record.id for record in read_chunks([document], 40, 0)]
+
+    assert first == second
+    assert len(set(first)) == len(first)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ingestion.ingest import (
+    ChunkRecord,
+    embed_chunks,
+    read_chunks,
+    upsert_embeddings,
+)
+from ingestion.pipeline import bounded
+
+
+def pending(path: str, index: int, text: str) -> ChunkRecord:
+    return ChunkRecord(id=f"{path}#{index}", document_path=path, chunk_index=index, content=text)
+
+
+def test_bounded_applies_backpressure() -> None:
+    produced = []
+
+    def source():
+        for index in range(100):
+            produced.append(index)
+            yield index
+
+    stream = bounded(source(), maxsize=2)
+    assert next(stream) == 0
+    time.sleep(0.2)
+
+    # One item consumed, two buffered and at most one blocked on the queue.
+    assert len(produced) <= 4
+    assert list(stream) == list(range(1, 100))
+
+
+def test_bounded_propagates_errors_and_stops_producer() -> None:
+    def failing():
+        yield 1
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        list(bounded(failing(), maxsize=1))
+
+    stream = bounded(iter(range(1000)), maxsize=1)
+    next(stream)
+    stream.close()
+    assert not [thread for thread in threading.enumerate() if thread.name == "ingest-stage"]
+
+
+def test_streaming_pipeline_without_database(tmp_path, capsys) -> None:
+    document = tmp_path / "guideline.txt"
+    document.write_text("HER2 positive breast cancer " * 200, encoding="utf-8")
+
+    chunks = list(bounded(read_chunks([document], 500, 100), maxsize=4))
+    embedded = []
+
+    def records():
+        for record in embed_chunks(chunks):
+            embedded.append(record)
+            yield record
+
+    assert upsert_embeddings(records(), db_url=None, batch_size=3) == 0
+
+    output = capsys.readouterr().out
+    assert f"Prepared 14 chunk(s) from {document}." in output
+    assert "skipping database upsert" in output
+    assert embedded == []
+
+
+def test_parallel_embedding_matches_serial_path() -> None:
+    def chunks():
+        return [pending("nccn/lung.txt", index, f"EGFR exon {index} deletion") for index in range(11)]
+
+    serial = list(embed_chunks(chunks()))
+    parallel = list(embed_chunks(chunks(), workers=2, batch_size=3))
+
+    assert [(r.document_path, r.chunk_index, r.content) for r in parallel] == [
+        (r.document_path, r.chunk_index, r.content) for r in serial
+    ]
+    for left, right in zip(parallel, serial):
+        assert left.embedding.dtype == np.float32
+        assert np.array_equal(left.embedding, right.embedding)
+
+
+def test_token_hash_embedder_matches_api_query_embedder() -> None:
+    from api.app.services.embedding import EmbeddingClient
+
+    chunks = [pending("asco/nsclc.txt", 0, "PD-L1 NSCLC first line")]
+
+    (record,) = embed_chunks(chunks, embedder="token-hash")
+
+    expected = EmbeddingClient().embed_batch(["PD-L1 NSCLC first line"])[0]
+    assert np.array_equal(record.embedding, expected)
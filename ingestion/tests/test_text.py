@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import pytest
+
+from ingestion.ingest import chunk_text as ingest_chunk_text
+from ingestion.text import chunk_file, chunk_text, iter_chunks, iter_sections
+
+GUIDELINE = """Scope of these recommendations.
+
+# Breast Cancer
+
+HER2 positive disease is treated with trastuzumab. Pertuzumab is added in the \
+neoadjuvant setting for node positive tumours.
+
+Endocrine therapy is offered for hormone receptor positive disease.
+
+2.1 Adjuvant Therapy
+
+Adjuvant chemotherapy is recommended for high risk disease.
+
+SYSTEMIC THERAPY
+
+Osimertinib is preferred for EGFR exon 19 deletions.
+An upper-case word such as NSCLC inside a paragraph is not a heading.
+"""
+
+
+def test_sections_split_at_headings() -> None:
+    headings = [heading for _, _, heading in iter_sections(GUIDELINE.encode())]
+
+    assert headings == ["", "Breast Cancer", "2.1 Adjuvant Therapy", "SYSTEMIC THERAPY"]
+
+
+def test_chunks_carry_offsets_and_never_span_sections() -> None:
+    source = GUIDELINE.encode()
+    chunks = list(iter_chunks(source, chunk_size=120, overlap=40))
+    sections = list(iter_sections(source))
+
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert chunk.end - chunk.start <= 120
+        assert chunk.text == " ".join(source[chunk.start : chunk.end].decode().split())
+        (section,) = [s for s in sections if s[0] <= chunk.start and chunk.end <= s[1]]
+        assert chunk.heading == section[2]
+
+
+def test_chunks_end_on_paragraph_then_sentence_boundaries() -> None:
+    chunks = chunk_text(GUIDELINE, chunk_size=120, overlap=40)
+
+    assert "Endocrine therapy is offered for hormone receptor positive disease." in chunks
+    # The long paragraph ends its first chunk on a sentence, not mid-word.
+    assert any(chunk.endswith("trastuzumab.") for chunk in chunks)
+    # The chunk after a paragraph break starts with the new paragraph.
+    assert not any(chunk.startswith("tumours.") for chunk in chunks)
+
+
+def test_overlap_starts_on_a_word_and_long_words_are_cut_safely() -> None:
+    words = " ".join(f"word{index}" for index in range(200))
+    chunks = chunk_text(words, chunk_size=50, overlap=20)
+
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous.split()
+
+    cut = chunk_text("é" * 100, chunk_size=15, overlap=0)
+    assert "".join(cut) == "é" * 100
+
+
+def test_chunk_file_matches_in_memory_chunking(tmp_path) -> None:
+    document = tmp_path / "nccn.md"
+    document.write_text(GUIDELINE, encoding="utf-8")
+    (tmp_path / "empty.txt").write_bytes(b"")
+
+    from_file = [(chunk.start, chunk.end, chunk.text) for chunk in chunk_file(document, 120, 40)]
+    in_memory = [
+        (chunk.start, chunk.end, chunk.text) for chunk in iter_chunks(GUIDELINE.encode(), 120, 40)
+    ]
+
+    assert from_file == in_memory
+    assert list(chunk_file(tmp_path / "empty.txt")) == []
+    # Closing early releases the memory map.
+    stream = chunk_file(document, 120, 40)
+    next(stream)
+    stream.close()
+
+
+def test_chunk_text_is_shared_and_validates_arguments() -> None:
+    assert ingest_chunk_text is chunk_text
+    assert chunk_text("  \n\t ") == []
+    with pytest.raises(ValueError):
+        chunk_text("text", chunk_size=10, overlap=10)
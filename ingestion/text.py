@@ -1,22 +1,162 @@
-"""Text utilities for chunking documents."""
+"""Text utilities for chunking documents.
+
+Chunks are found by working on byte offsets into the UTF-8 source buffer
+(``bytes`` or a read-only ``mmap``), so a document is never copied or
+decoded as a whole: only the bytes of each emitted chunk are decoded.
+Guidelines are split into sections at headings, and within a section chunks
+end at paragraph, sentence or word boundaries where possible.
+"""
 
 from __future__ import annotations
 
-from typing import Iterable
+import mmap
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Tuple, Union
+
+Buffer = Union[bytes, bytearray, mmap.mmap]
+
+# Headings start a new section.  Markdown headings count anywhere; numbered
+# ("2.1 Adjuvant Therapy") and upper-case ("SYSTEMIC THERAPY") titles only
+# when they stand alone between blank lines and do not end like a sentence.
+_ATX = rb"[ \t]*(?P<atx>\#{1,6}[ \t]+\S[^\n]*?)[ \t\r]*(?=\r?\n|\Z)"
+_TITLE = (
+  rb"[ \t]*(?P<title>\d{1,2}(?:\.\d{1,2}){0,3}\.?[ \t]+[A-Z][^\n]{0,100}?"
+  rb"|[A-Z][A-Z0-9 ,&/()'-]{2,100}?)"
+  rb"(?<![.:;,])[ \t\r]*(?=\n[ \t\r]*\n|\n?\Z)"
+)
+# Every heading after the first line follows a newline; the literal prefix
+# lets the regex engine skip through long paragraphs quickly.
+HEADING_RE = re.compile(rb"\n(?:" + _ATX + rb"|[ \t\r]*\n" + _TITLE + rb")")
+_FIRST_HEADING_RE = re.compile(_ATX + rb"|" + _TITLE)
+_NON_SPACE_RE = re.compile(rb"\S")
+_SPACE_RE = re.compile(rb"\s")
+_SPACE_BYTES = frozenset(b" \t\r\n\f\v")
+# Break points tried in order, each with the offset of the chunk end from
+# the match: paragraph, then sentence, then word boundaries.
+_BREAKS: Tuple[Tuple[Tuple[bytes, ...], int], ...] = (
+  ((b"\n\n", b"\n\r\n"), 0),
+  ((b". ", b".\n", b"? ", b"! "), 1),
+  ((b" ", b"\n", b"\t"), 0),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Chunk:
+  """A chunk of a document and where it came from.
+
+  ``start`` and ``end`` are byte offsets into the source buffer and
+  ``heading`` is the title of the enclosing section (empty before the first
+  heading).  ``text`` is the decoded span with whitespace collapsed.
+  """
+
+  index: int
+  start: int
+  end: int
+  heading: str
+  text: str
+
+
+def iter_sections(buffer: Buffer) -> Iterator[Tuple[int, int, str]]:
+  """Yield ``(start, end, heading)`` for each section of *buffer*."""
+  first = _FIRST_HEADING_RE.match(buffer)
+  start, heading = 0, _heading(first) if first else ""
+  for match in HEADING_RE.finditer(buffer):
+    section_start = match.start("atx") if match.group("atx") else match.start("title")
+    if section_start > start:
+      yield start, section_start, heading
+    start, heading = section_start, _heading(match)
+  if len(buffer) > start:
+    yield start, len(buffer), heading
+
+
+def _heading(match: re.Match) -> str:
+  title = match.group("atx") or match.group("title")
+  return title.lstrip(b"#").strip().decode("utf-8", "ignore")
+
+
+def iter_chunks(buffer: Buffer, chunk_size: int = 1000, overlap: int = 200) -> Iterator[Chunk]:
+  """Yield overlapping chunks of at most *chunk_size* bytes from *buffer*.
+
+  Chunks never span a heading.  Inside a section a chunk ends at the last
+  paragraph break in its second half, else the last sentence end, else the
+  last whitespace; only a single word longer than half a chunk is cut
+  mid-word.  The next chunk starts at the first word within *overlap* bytes
+  of the previous end, or at the next paragraph if the previous chunk ended
+  on one.
+  """
+  if chunk_size <= 0:
+    raise ValueError("chunk_size must be greater than zero")
+  if overlap < 0 or overlap >= chunk_size:
+    raise ValueError("overlap must be smaller than chunk_size")
+
+  index = 0
+  with memoryview(buffer) as view:
+    for section_start, section_end, heading in iter_sections(buffer):
+      for start, end in _windows(buffer, section_start, section_end, chunk_size, overlap):
+        text = " ".join(str(view[start:end], "utf-8", "ignore").split())
+        if text:
+          yield Chunk(index, start, end, heading, text)
+          index += 1
+
+
+def chunk_file(
+  path: Union[str, os.PathLike], chunk_size: int = 1000, overlap: int = 200
+) -> Iterator[Chunk]:
+  """Chunk a UTF-8 file through a read-only memory map."""
+  with Path(path).open("rb") as fp:
+    if os.fstat(fp.fileno()).st_size == 0:
+      return
+    with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+      yield from iter_chunks(buffer, chunk_size, overlap)
+
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+  """Split text into overlapping chunks suitable for embeddings."""
+  return [chunk.text for chunk in iter_chunks(text.encode("utf-8"), chunk_size, overlap)]
+
+
+def _windows(
+  buffer: Buffer, start: int, stop: int, chunk_size: int, overlap: int
+) -> Iterator[Tuple[int, int]]:
+  start = _skip_space(buffer, start, stop)
+  while start < stop:
+    limit = start + chunk_size
+    if limit >= stop:
+      yield start, _strip_end(buffer, start, stop)
+      return
+    end, paragraph = _break_before(buffer, start, limit)
+    yield start, _strip_end(buffer, start, end)
+    # A chunk ending on a paragraph break is not overlapped into the next.
+    resume = end if paragraph else max(end - overlap, start + 1)
+    if resume < end and buffer[resume - 1] not in _SPACE_BYTES:
+      # Start the overlap on a word boundary.
+      space = _SPACE_RE.search(buffer, resume, end)
+      resume = space.start() if space else end
+    start = _skip_space(buffer, resume, stop)
+
+
+def _break_before(buffer: Buffer, start: int, limit: int) -> Tuple[int, bool]:
+  """Return where to end a chunk starting at *start* and whether that is a paragraph end."""
+  floor = start + (limit - start) // 2
+  for kind, (needles, offset) in enumerate(_BREAKS):
+    found = max(buffer.rfind(needle, floor, limit) for needle in needles)
+    if found > floor:
+      return found + offset, kind == 0
+  # No boundary in the second half: cut, but not inside a UTF-8 sequence.
+  while limit > start + 1 and buffer[limit] & 0xC0 == 0x80:
+    limit -= 1
+  return limit, False
+
 
+def _skip_space(buffer: Buffer, start: int, stop: int) -> int:
+  match = _NON_SPACE_RE.search(buffer, start, stop)
+  return match.start() if match else stop
 
-def chunk_text(text: str, window: int = 500, overlap: int = 50) -> Iterable[str]:
-  tokens = text.split()
-  if window <= 0:
-    raise ValueError("window must be positive")
-  if overlap >= window:
-    raise ValueError("overlap must be smaller than window")
 
-  start = 0
-  step = window - overlap
-  while start < len(tokens):
-    end = min(start + window, len(tokens))
-    yield " ".join(tokens[start:end])
-    if end == len(tokens):
-      break
-    start += step
+def _strip_end(buffer: Buffer, start: int, end: int) -> int:
+  while end > start and buffer[end - 1] in _SPACE_BYTES:
+    end -= 1
+  return end
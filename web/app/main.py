@@ -2,13 +2,26 @@
 
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
+from api.app.dependencies import dispose_engine, warm_up
+
 from .routes import search
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Search runs in this process, so it warms and closes the same pool as the API.
+    await warm_up()
+    yield
+    await dispose_engine()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Karkinos Web", version="1.0.0")
+    app = FastAPI(title="Karkinos Web", version="1.0.0", lifespan=lifespan)
     app.include_router(search.router)
     return app
 
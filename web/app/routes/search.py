@@ -1,24 +1,143 @@
-"""Routes for the web search experience."""
+"""Routes for the web search experience.
+
+Results are rendered on the server by calling the API's search service in
+process, so a search is one page load instead of a page plus a ``/search``
+round trip from the browser.  The template is streamed: the page shell is
+sent as soon as the request arrives and the results follow once the search
+returns.
+
+The status and headers go out before a streamed search has finished, so a
+failing search cannot turn into an error response; the results section
+shows an error message instead.  For the same reason only pages whose
+results are known up front carry ``Cache-Control: public, max-age=...``:
+the empty search page, and queries whose results are already in the search
+cache.  Those also get an ``ETag`` derived from the results, and a matching
+``If-None-Match`` is answered with ``304 Not Modified`` without rendering
+anything or touching the database.  Streamed pages are ``no-store``.
+
+A streamed search runs after the endpoint has returned, when FastAPI may
+already have closed the request's dependencies, so it opens and closes its
+own search service (and database session) around the query.
+"""
 
 from __future__ import annotations
 
+import hashlib
+import logging
+import os
+from functools import partial
 from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Union
 
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+import jinja2
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+
+from api.app.dependencies import (
+    SearchServiceFactory,
+    get_search_cache,
+    get_search_service_factory,
+)
+from api.app.responses import dumps, search_content
+from api.app.services.cache import SearchCache, result_key
+from api.app.services.search import ChunkMatch
 
 TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+SEARCH_TEMPLATE = "intelligence/search.html"
+CACHE_MAX_AGE_ENV = "WEB_SEARCH_MAX_AGE"
+DEFAULT_CACHE_MAX_AGE = 60
+DEFAULT_TOP_K = 5
 
 router = APIRouter()
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+logger = logging.getLogger(__name__)
+templates = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=True,
+    enable_async=True,
+)
+# Part of every ETag, so a changed template is never answered with a 304.
+_TEMPLATE_DIGEST = hashlib.sha256((TEMPLATES_DIR / SEARCH_TEMPLATE).read_bytes()).digest()
 
 
-@router.get("/intelligence/search", response_class=HTMLResponse)
-async def search_page(request: Request) -> HTMLResponse:
-    """Render the intelligence search UI."""
+def get_cache_max_age() -> int:
+    """Seconds browsers and proxies may reuse a results page (``WEB_SEARCH_MAX_AGE``)."""
+    return int(os.getenv(CACHE_MAX_AGE_ENV, DEFAULT_CACHE_MAX_AGE))
 
-    return templates.TemplateResponse(
-        "intelligence/search.html",
-        {"request": request},
+
+def results_etag(query: str, top_k: int, matches: Iterable[ChunkMatch]) -> str:
+    digest = hashlib.sha256(_TEMPLATE_DIGEST)
+    digest.update(dumps(search_content(query, top_k, matches)))
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header names *etag*, using weak comparison."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == opaque
+        for candidate in (value.strip() for value in if_none_match.split(","))
     )
+
+
+class StreamedResults:
+    """Matches iterated by the template's results loop, after the shell is sent.
+
+    A failing search ends the iteration rather than the response, is logged
+    with its traceback and sets ``failed``, so the template can say so
+    instead of cutting the page off.
+    """
+
+    def __init__(self, search: Callable[[], Awaitable[List[ChunkMatch]]]) -> None:
+        self._search = search
+        self.failed = False
+
+    async def __aiter__(self) -> AsyncIterator[ChunkMatch]:
+        try:
+            matches = await self._search()
+        except Exception:
+            self.failed = True
+            logger.exception("web search failed")
+            return
+        for match in matches:
+            yield match
+
+
+async def run_search(
+    open_service: SearchServiceFactory, query: str, top_k: int
+) -> List[ChunkMatch]:
+    async with open_service() as service:
+        return await service.search(query, top_k)
+
+
+@router.get("/intelligence/search", response_class=HTMLResponse)
+async def search_page(
+    query: str = "",
+    top_k: int = Query(DEFAULT_TOP_K, ge=1, le=50),
+    if_none_match: Optional[str] = Header(None),
+    open_service: SearchServiceFactory = Depends(get_search_service_factory),
+    cache: SearchCache = Depends(get_search_cache),
+    max_age: int = Depends(get_cache_max_age),
+) -> Response:
+    """Render the intelligence search UI, with results when a query is given."""
+
+    query = query.strip()
+    headers = {"Cache-Control": f"public, max-age={max_age}"}
+    results: Union[None, List[ChunkMatch], StreamedResults] = None
+    if query:
+        if cache.results.peek(result_key(query, top_k)) is not None:
+            # Served from the cache, so the page can be validated up front.
+            matches = await run_search(open_service, query, top_k)
+            headers["ETag"] = results_etag(query, top_k, matches)
+            if etag_matches(if_none_match, headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+            results = matches
+        else:
+            # Unknown until streamed, and possibly an error: never reuse it.
+            headers["Cache-Control"] = "no-store"
+            results = StreamedResults(partial(run_search, open_service, query, top_k))
+
+    template = templates.get_template(SEARCH_TEMPLATE)
+    stream = template.generate_async(query=query, top_k=top_k, results=results)
+    return StreamingResponse(stream, media_type="text/html; charset=utf-8", headers=headers)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+import pytest
+from httpx import AsyncClient
+
+from api.app.dependencies import get_search_cache, get_search_service_factory
+from api.app.services.cache import CachedSearchService, SearchCache
+from api.app.services.search import ChunkMatch, DocumentRef
+from web.app.main import create_app
+
+MATCHES = [
+    ChunkMatch(
+        chunk_id=21,
+        text="Neoadjuvant chemotherapy improves <b>pathological</b> response in TNBC.",
+        score=0.91,
+        document=DocumentRef(201, "TNBC management playbook", "NCCN", "Breast"),
+    ),
+    ChunkMatch(
+        chunk_id=22,
+        text="Carboplatin is recommended for BRCA1/2 mutation carriers.",
+        score=0.83,
+        document=DocumentRef(202, "Inherited mutations guidance", "ASCO", None),
+    ),
+]
+
+
+class CountingSearchService:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+        self.error: Exception | None = None
+        self.open_sessions = 0
+        self.sessions_at_search: List[int] = []
+
+    async def search(self, query: str, top_k: int, *, options=None) -> List[ChunkMatch]:
+        self.calls += 1
+        self.sessions_at_search.append(self.open_sessions)
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return MATCHES[:top_k]
+
+
+@pytest.fixture
+def web():
+    backend = CountingSearchService()
+    cache = SearchCache()
+    app = create_app()
+
+    @asynccontextmanager
+    async def open_service() -> AsyncIterator[CachedSearchService]:
+        backend.open_sessions += 1
+        try:
+            yield CachedSearchService(backend, cache)
+        finally:
+            backend.open_sessions -= 1
+
+    app.dependency_overrides[get_search_service_factory] = lambda: open_service
+    app.dependency_overrides[get_search_cache] = lambda: cache
+    return app, backend, cache
+
+
+@pytest.mark.asyncio
+async def test_results_are_rendered_on_the_server(web) -> None:
+    app, backend, _ = web
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        empty = await client.get("/intelligence/search")
+        response = await client.get("/intelligence/search", params={"query": "TNBC", "top_k": 2})
+
+    assert "Enter a query" in empty.text
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/html; charset=utf-8"
+    assert response.text.count('data-testid="search-result"') == 2
+    assert "<h3>TNBC management playbook</h3>" in response.text
+    assert "Cancer: <strong>Breast</strong>" in response.text and "Score: 0.910" in response.text
+    assert "&lt;b&gt;pathological&lt;/b&gt;" in response.text
+    assert 'value="TNBC"' in response.text
+    assert backend.calls == 1
+    # The streamed search opened its own session and closed it afterwards.
+    assert backend.sessions_at_search == [1] and backend.open_sessions == 0
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_are_validated_with_etags(web) -> None:
+    app, backend, cache = web
+    params = {"query": "TNBC", "top_k": 2}
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        first = await client.get("/intelligence/search", params=params)
+        second = await client.get("/intelligence/search", params=params)
+        etag = second.headers["etag"]
+        revalidated = await client.get(
+            "/intelligence/search", params=params, headers={"If-None-Match": etag}
+        )
+        cache.invalidate()
+        after_invalidation = await client.get(
+            "/intelligence/search", params=params, headers={"If-None-Match": etag}
+        )
+
+    assert first.headers["cache-control"] == "no-store"
+    assert "etag" not in first.headers
+    assert second.headers["cache-control"] == "public, max-age=60"
+    assert second.text == first.text and etag.startswith('W/"')
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    assert after_invalidation.status_code == 200
+    assert backend.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_searches_render_an_error_and_are_not_cached(web, caplog) -> None:
+    app, backend, cache = web
+    backend.error = RuntimeError("database unavailable")
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        with caplog.at_level(logging.ERROR):
+            response = await client.get("/intelligence/search", params={"query": "TNBC"})
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+    assert 'data-testid="search-error"' in response.text
+    assert "No results matched" not in response.text
+    assert response.text.rstrip().endswith("</html>")
+    assert len(cache.results) == 0
+    assert backend.open_sessions == 0
+    assert "database unavailable" in caplog.records[-1].exc_text
+
+
+@pytest.mark.asyncio
+async def test_page_shell_is_sent_before_the_search_finishes(web) -> None:
+    app, backend, _ = web
+    backend.release.clear()
+    bodies: List[bytes] = []
+    first_body = asyncio.Event()
+
+    async def receive() -> dict:
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.body" and message.get("body"):
+            bodies.append(message["body"])
+            first_body.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/intelligence/search",
+        "raw_path": b"/intelligence/search",
+        "query_string": b"query=TNBC",
+        "headers": [(b"host", b"testserver")],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+        "root_path": "",
+    }
+    request = asyncio.create_task(app(scope, receive, send))
+    await asyncio.wait_for(first_body.wait(), timeout=5)
+
+    shell = b"".join(bodies)
+    assert b'<form id="search-form"' in shell
+    assert b"search-result" not in shell
+
+    backend.release.set()
+    await asyncio.wait_for(request, timeout=5)
+    assert b"".join(bodies).count(b'data-testid="search-result"') == 2
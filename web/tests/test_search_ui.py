@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import threading
 import time
+from contextlib import asynccontextmanager
 from typing import Iterable
 
 import pytest
@@ -10,7 +11,7 @@ import uvicorn
 from fastapi import FastAPI
 from playwright.async_api import Page
 
-from api.app.dependencies import get_search_service
+from api.app.dependencies import get_search_service, get_search_service_factory
 from api.app.main import create_app as create_api_app
 from api.app.services.search import ChunkMatch, DocumentRef, SearchService
 from web.app.routes import search as search_routes
@@ -20,7 +21,7 @@ class StaticSearchService(SearchService):
     def __init__(self, matches: Iterable[ChunkMatch]) -> None:
         self._matches = list(matches)
 
-    async def search(self, query: str, top_k: int):
+    async def search(self, query: str, top_k: int, *, options=None):
         return self._matches[:top_k]
 
 
@@ -58,6 +59,12 @@ def test_server() -> str:
     combined = FastAPI()
     combined.include_router(api_app.router)
     combined.include_router(search_routes.router)
+    # The page renders results itself, through the combined app's overrides.
+    @asynccontextmanager
+    async def open_service():
+        yield StaticSearchService(sample_matches)
+
+    combined.dependency_overrides[get_search_service_factory] = lambda: open_service
 
     config = uvicorn.Config(combined, host="127.0.0.1", port=8765, log_level="warning")
     server = uvicorn.Server(config)
@@ -78,6 +85,7 @@ def test_server() -> str:
         server.should_exit = True
         thread.join(timeout=5)
         api_app.dependency_overrides.clear()
+        combined.dependency_overrides.clear()
 
 
 @pytest.mark.asyncio